@@ -6,88 +6,115 @@ from .idea_checker import IdeaChecker
 from .contrib_analyzer import ContribAnalyzer
 from .scorer import Scorer
 from .report_generator import ReportGenerator
-from typing import Dict
-import os
+from typing import Dict, Optional
+import time
 import logging
 
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.github_api import repo_full_name
+from ai_agents.utils.metrics import ANALYSIS_SECONDS
+from ai_agents.utils.pipeline import StageGraph
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_full_analysis(repo_url: str) -> Dict:
+def run_full_analysis(repo_url: str, registry: Optional[ModelRegistry] = None) -> Dict:
+    # Agents are cheap wrappers; the models and clients they use are shared
+    registry = registry or get_registry()
     fetcher = RepoFetcher()
-    parser = CodeParser()
-    similarity = CodeSimilarity()
-    doc_analyzer = DocAnalyzer()
-    idea_checker = IdeaChecker()
-    contrib_analyzer = ContribAnalyzer()
+    parser = CodeParser(registry)
+    similarity = CodeSimilarity(registry)
+    doc_analyzer = DocAnalyzer(registry)
+    idea_checker = IdeaChecker(registry)
+    contrib_analyzer = ContribAnalyzer(registry)
     scorer = Scorer()
-    report_generator = ReportGenerator()
-
-    try:
-        metadata = fetcher.fetch_repo(repo_url)
-    except Exception as e:
-        logger.error(f"Failed to fetch repo {repo_url}: {str(e)}")
-        metadata = {"name": "Unknown", "url": repo_url, "files": [], "readme": ""}
-
-    code_blocks = []
-    try:
-        for file in metadata.get("files", []):
-            blocks = parser.parse_code(file.get("content", ""), file_name=file.get("name", ""))
-            code_blocks.extend(blocks)
-    except Exception as e:
-        logger.warning(f"Error parsing files: {str(e)}")
-
-    code_sim = {"similarity_score": 0.0, "copied_blocks": [], "similar_repos": []}
-    if code_blocks:
-        try:
-            parser.store_embeddings(
-                [b["embedding"] for b in code_blocks if "embedding" in b],
-                [b["block"] for b in code_blocks if "block" in b],
-                metadata.get("name", "Unknown")
-            )
-            code_sim = similarity.compare(code_blocks, metadata.get("name", "Unknown"))
-        except Exception as e:
-            logger.error(f"Error in code similarity: {str(e)}")
-
-    try:
-        idea_summary = doc_analyzer.summarize_idea(metadata.get("readme", "") or "")
-    except Exception as e:
-        logger.error(f"Error summarizing idea: {str(e)}")
-        idea_summary = "No project description available."
-
-    try:
-        idea_check = idea_checker.check_idea(idea_summary, metadata.get("name", "Unknown"))
-    except Exception as e:
-        logger.error(f"Error checking idea: {str(e)}")
-        idea_check = {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
-
-    try:
-        contrib_score = contrib_analyzer.analyze_contributions(repo_url)
-    except Exception as e:
-        logger.error(f"Error analyzing contributions: {str(e)}")
-        contrib_score = {"credibility_score": 80.0}
-
-    analysis = {
-        "metadata": metadata,
-        "code_similarity": code_sim,
-        "idea_summary": idea_summary,
-        "idea_check": idea_check,
-        "contribution_credibility": contrib_score,
-    }
-    logger.info(f"Analysis dict: {analysis}")
+    report_generator = ReportGenerator(registry)
+
+    repo_key = repo_full_name(repo_url)
+
+    def fetch():
+        return fetcher.fetch_repo(repo_url)
+
+    def parse(fetch):
+        # File contents are read lazily as the parse stage asks for them; files unchanged
+        # since the repository was last analyzed are not read at all
+        if not fetch.get("path"):
+            return {"blocks": [], "parsed": {}, "base_commit": None}
+        return parser.parse_revision(fetcher, fetch, repo_key)
+
+    def code_similarity(fetch, parse):
+        if not parse["blocks"]:
+            return {"similarity_score": 0.0, "copied_blocks": [], "similar_repos": []}
+        # Query the corpus before appending, so this repo is only compared to others
+        code_sim = similarity.compare(parse["blocks"], fetch.get("name", "Unknown"), repo_key=repo_key)
+        parser.store_revision(parse, fetch, repo_key)
+        return code_sim
+
+    def idea_summary(fetch):
+        return doc_analyzer.summarize_idea(fetch.get("readme", "") or "")
+
+    def idea_check(fetch, idea_summary):
+        return idea_checker.check_idea(idea_summary, fetch.get("name", "Unknown"), repo_key=repo_key, repo_url=repo_url)
+
+    def contributions(fetch):
+        # Reads `git log` from the clone; falls back to the commits API without one
+        return contrib_analyzer.analyze_contributions(repo_url, repo_path=fetch.get("path"))
+
+    def originality(fetch, code_similarity, idea_summary, idea_check, contributions):
+        analysis = {
+            "metadata": fetch,
+            "code_similarity": code_similarity,
+            "idea_summary": idea_summary,
+            "idea_check": idea_check,
+            "contribution_credibility": contributions,
+        }
+        return scorer.calculate_originality(analysis)
+
+    def report(fetch, code_similarity, idea_summary, idea_check, contributions, originality):
+        return report_generator.generate_report({
+            "metadata": fetch,
+            "code_similarity": code_similarity,
+            "idea_summary": idea_summary,
+            "idea_check": idea_check,
+            "contribution_credibility": contributions,
+            "originality": originality,
+        })
 
-    try:
-        originality = scorer.calculate_originality(analysis)
-    except Exception as e:
-        logger.error(f"Error calculating originality: {str(e)}")
-        originality = {"originality_score": 80.0, "verdict": "Original"}
+    # Parsing, the README summary and the contribution history wait for the
+    # clone; the idea search and contribution analysis overlap with the
+    # CPU-heavy embedding stage.
+    # Fallbacks match what each step returned on failure when run in sequence.
+    graph = StageGraph(max_workers=PipelineConfig.STAGE_WORKERS)
+    graph.add("fetch", fetch,
+              fallback=lambda: {"name": "Unknown", "url": repo_url, "files": [], "readme": ""})
+    graph.add("parse", parse, deps=["fetch"],
+              fallback=lambda: {"blocks": [], "parsed": {}, "base_commit": None})
+    graph.add("code_similarity", code_similarity, deps=["fetch", "parse"],
+              fallback=lambda: {"similarity_score": 0.0, "copied_blocks": [], "similar_repos": []})
+    graph.add("idea_summary", idea_summary, deps=["fetch"], fallback="No project description available.")
+    graph.add("idea_check", idea_check, deps=["fetch", "idea_summary"],
+              fallback=lambda: {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []})
+    graph.add("contributions", contributions, deps=["fetch"], fallback=lambda: {"credibility_score": 80.0})
+    graph.add("originality", originality,
+              deps=["fetch", "code_similarity", "idea_summary", "idea_check", "contributions"],
+              fallback=lambda: {"originality_score": 80.0, "verdict": "Original"})
+    graph.add("report", report,
+              deps=["fetch", "code_similarity", "idea_summary", "idea_check", "contributions", "originality"],
+              fallback=report_generator.failed_report)
+    start = time.perf_counter()
+    stages, timings, fallbacks = graph.run()
+    ANALYSIS_SECONDS.observe(time.perf_counter() - start)
+    # Every stage that reads the clone has finished
+    if stages["fetch"].get("path"):
+        fetcher.remove_clone(stages["fetch"]["path"])
 
-    analysis["originality"] = originality
-    try:
-        report_url = report_generator.generate_report(analysis)
-    except Exception as e:
-        logger.error(f"Error generating report: {str(e)}")
-        report_url = "http://localhost:8000/static/report.txt"
+    metadata = stages["fetch"]
+    code_sim = stages["code_similarity"]
+    idea_summary = stages["idea_summary"]
+    idea_check = stages["idea_check"]
+    originality = stages["originality"]
+    report_url = stages["report"]
 
     # Extract the top 5 similar projects from combined sources
     similar_projects = []
@@ -112,6 +139,11 @@ def run_full_analysis(repo_url: str) -> Dict:
         "copied_blocks": code_sim.get("copied_blocks", []),
         "idea_summary": idea_summary,
         "report_url": report_url,
+        "commit_hash": metadata.get("commit_hash", "unknown"),
+        # Seconds spent in each stage of this run
+        "stage_timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+        # Stages whose result is a default standing in for a failure; such a result is not kept
+        "degraded_stages": fallbacks,
     }
     logger.info(f"Final result: {result}")
     return result
\ No newline at end of file
@@ -1,166 +1,232 @@
 # ai_agents/agents/code_parser.py
-from transformers import AutoTokenizer, AutoModel
-import torch
-import ast
-import faiss
-import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import numpy as np
-import os
 from dotenv import load_dotenv
 import logging
 
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.block_extractor import extract_file_blocks, iter_extracted_chunks
+from ai_agents.utils.metrics import BLOCKS_EMBEDDED, BLOCKS_PARSED, CACHE_HITS
+from ai_agents.utils.pipeline import mark_degraded
+
 # Load environment variables from .env file
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 class CodeParser:
-    def __init__(self):
-        huggingface_token = os.getenv("HUGGINGFACE_TOKEN")
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            'microsoft/codebert-base',
-            token=huggingface_token if huggingface_token else None
-        )
-        self.model = AutoModel.from_pretrained(
-            'microsoft/codebert-base',
-            token=huggingface_token if huggingface_token else None
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        # CodeBERT is loaded once per process by the shared registry
+        registry = registry or get_registry()
+        self.tokenizer = registry.codebert_tokenizer
+        self.model = registry.codebert_model
+        self.device = registry.device
+        self.corpus = registry.corpus_index
+        self.manifest = registry.file_manifest
+        self.cache = registry.embedding_cache
+        self.pool = registry.parse_pool
+        self.backend = registry.embedding_backend
+        # Quantized and exported models drift slightly from fp32, so they get their own cache entries
+        self.model_id = PipelineConfig.CODEBERT_MODEL
+        if self.backend.name != "torch":
+            self.model_id = f"{self.model_id}:{self.backend.name}"
+
+    def extract_blocks(self, code: str, file_name: str = "unknown") -> List[Dict[str, Any]]:
+        """Split a source file into a tree of function/class blocks without embedding them"""
+        return extract_file_blocks(code, file_name)
+
+    def iter_extracted(self, files: Iterable[Dict]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the blocks of each chunk of files, in file order, as soon as it is parsed"""
+        return iter_extracted_chunks(
+            files, self.pool,
+            chunk_size=PipelineConfig.PARSE_CHUNK_FILES,
+            in_flight=PipelineConfig.PARSE_WORKERS * 2,
+            max_inflight_bytes=PipelineConfig.PARSE_MAX_INFLIGHT_MB * 1024 * 1024
         )
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        
-        # Regex patterns for different languages
-        self.patterns = {
-            # JavaScript/JSX function patterns
-            'js': [
-                r'(function\s+\w+\s*\([^)]*\)\s*\{[\s\S]*?\})', # named functions
-                r'(const|let|var)\s+(\w+)\s*=\s*(?:function\s*)?\([^)]*\)\s*(?:=>)?\s*\{[\s\S]*?\}', # function expressions
-                r'(class\s+\w+(?:\s+extends\s+\w+)?\s*\{[\s\S]*?\})' # classes
-            ],
-            # Java patterns
-            'java': [
-                r'((?:public|protected|private|static|final)?\s+(?:\w+\s+)*\w+\s+\w+\s*\([^)]*\)\s*(?:throws\s+[\w,\s]+)?\s*\{[\s\S]*?\})', # methods
-                r'((?:public|protected|private)?\s+(?:abstract|final|static)?\s*class\s+\w+(?:\s+extends\s+\w+)?(?:\s+implements\s+[\w,\s]+)?\s*\{[\s\S]*?\})' # classes
-            ],
-            # C/C++ patterns
-            'c': [
-                r'((?:\w+\s+)+\w+\s*\([^)]*\)\s*\{[\s\S]*?\})', # functions
-                r'(typedef\s+struct\s*\{[\s\S]*?\}\s*\w+\s*;)', # structs
-                r'(class\s+\w+(?:\s*:\s*(?:public|private|protected)\s+\w+)?\s*\{[\s\S]*?\}\s*;?)' # C++ classes
-            ]
-        }
 
-    def _get_file_type(self, file_name: str) -> str:
-        """Determine file type based on extension"""
-        extension = file_name.split('.')[-1].lower()
-        if extension in ['js', 'jsx']:
-            return 'js'
-        elif extension == 'java':
-            return 'java'
-        elif extension in ['c', 'cpp', 'cc', 'h', 'hpp']:
-            return 'c'
-        return 'python'
-
-    def _generic_parse(self, code: str, file_type: str) -> List[str]:
-        """Parse code using regex patterns based on file type"""
-        blocks = []
-        
-        if file_type not in self.patterns:
-            logger.warning(f"No patterns defined for file type: {file_type}")
-            return blocks
-        
-        for pattern in self.patterns[file_type]:
-            matches = re.finditer(pattern, code)
-            for match in matches:
-                blocks.append(match.group(0))
-        
-        return blocks
+    def _embed_batch(self, features: List[Dict[str, List[int]]]) -> np.ndarray:
+        """Run one padded forward pass and mean-pool over the real (unpadded) tokens"""
+        inputs = self.tokenizer.pad(features, padding=True, return_tensors="np")
+        return self.backend.embed(inputs["input_ids"], inputs["attention_mask"])
 
-    def parse_code(self, code: str, file_name: str = "unknown") -> List[Dict[str, Any]]:
-        if not code.strip():
-            logger.info(f"Empty file {file_name}")
+    def _embed_texts(self, blocks: List[str], batch_size: Optional[int] = None) -> List[Optional[np.ndarray]]:
+        """Embed blocks in padded micro-batches of similar token length.
+
+        Blocks are sorted by token count so each batch carries little padding.
+        The result is aligned with `blocks`; each entry is a (1, hidden) array,
+        the same shape a batch-of-one pass produces, or None if embedding failed.
+        """
+        if not blocks:
             return []
-        
-        file_type = self._get_file_type(file_name)
-        blocks = []
-        
-        try:
-            # For Python files, use AST
-            if file_type == 'python':
-                tree = ast.parse(code)
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                        try:
-                            code_block = ast.unparse(node)
-                            blocks.append(code_block)
-                        except Exception as e:
-                            logger.warning(f"Skipping Python block in {file_name}: {str(e)}")
-                            continue
-            # For other file types, use regex patterns
-            else:
-                blocks = self._generic_parse(code, file_type)
-            
-            # Process blocks to get embeddings
-            result_blocks = []
-            for code_block in blocks:
-                if not code_block.strip():
-                    continue
-                    
+        batch_size = max(1, batch_size or PipelineConfig.EMBEDDING_BATCH_SIZE)
+
+        # Identical blocks (forks, templates, resubmissions) are embedded once, ever
+        keys = [self.cache.key(block, self.model_id) for block in blocks]
+        cached = self.cache.get_many(keys)
+        missing = list({key: i for i, key in enumerate(keys) if key not in cached}.values())
+
+        computed = {}
+        if missing:
+            encodings = self.tokenizer([blocks[i] for i in missing], truncation=True, max_length=512)
+            features = [
+                {name: encodings[name][j] for name in encodings.keys()}
+                for j in range(len(missing))
+            ]
+            order = sorted(range(len(missing)), key=lambda j: len(features[j]["input_ids"]))
+
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
                 try:
-                    inputs = self.tokenizer(
-                        code_block,
-                        return_tensors="pt",
-                        padding=True,
-                        truncation=True,
-                        max_length=512
-                    )
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                    with torch.no_grad():
-                        outputs = self.model(**inputs)
-                        embedding = outputs.last_hidden_state.mean(dim=1).cpu().numpy()
-                    if not isinstance(embedding, np.ndarray):
-                        logger.warning(f"Invalid embedding for block in {file_name}")
-                        continue
-                    result_blocks.append({"block": code_block, "embedding": embedding})
+                    pooled = self._embed_batch([features[j] for j in batch])
+                    for row, j in enumerate(batch):
+                        computed[keys[missing[j]]] = pooled[row:row + 1]
                 except Exception as e:
-                    logger.warning(f"Error embedding block in {file_name}: {str(e)}")
-                    continue
-                    
-            return result_blocks
-                
-        except SyntaxError as e:
-            logger.warning(f"Syntax error parsing file {file_name}: {str(e)}")
-            # For Python files with syntax errors, try fallback to generic parsing
-            if file_type == 'python':
-                logger.info(f"Attempting fallback parsing for {file_name}")
-                blocks = self._generic_parse(code, 'js')  # Using JS patterns as fallback
-        except Exception as e:
-            logger.error(f"Error parsing file {file_name}: {str(e)}")
-            
-        return blocks
-
-    def store_embeddings(self, embeddings: List[np.ndarray], code_blocks: List[str], repo_name: str):
-        if not embeddings or not code_blocks:
-            logger.info(f"No embeddings or code blocks to store for {repo_name}")
-            return
-        valid_embeddings = []
-        valid_blocks = []
-        for emb, block in zip(embeddings, code_blocks):
-            if isinstance(emb, np.ndarray) and emb.size > 0:
-                valid_embeddings.append(emb)
-                valid_blocks.append(block)
-            else:
-                logger.warning(f"Skipping invalid embedding for block in {repo_name}")
-        if not valid_embeddings:
-            logger.info(f"No valid embeddings to store for {repo_name}")
+                    # Retry one by one so a single bad block does not drop the batch
+                    logger.warning(f"Error embedding batch of {len(batch)} blocks: {str(e)}")
+                    for j in batch:
+                        try:
+                            computed[keys[missing[j]]] = self._embed_batch([features[j]])
+                        except Exception as e:
+                            logger.warning(f"Error embedding block: {str(e)}")
+                            mark_degraded("code block not embedded")
+            self.cache.put_many(computed)
+        BLOCKS_EMBEDDED.inc(len(computed))
+        CACHE_HITS.labels(cache="embedding").inc(len(cached))
+
+        logger.info(f"Embedded {len(computed)} blocks, {len(blocks) - len(missing)} served from cache")
+        return [cached.get(key, computed.get(key)) for key in keys]
+
+    def embed_blocks(self, blocks: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Embed code blocks and return {"block", "embedding"} records in input order"""
+        blocks = [block for block in blocks if block.strip()]
+        embeddings = self._embed_texts(blocks, batch_size=batch_size)
+        return [
+            {"block": block, "embedding": embedding}
+            for block, embedding in zip(blocks, embeddings)
+            if isinstance(embedding, np.ndarray)
+        ]
+
+    def embed_tree(self, blocks: List[Dict[str, Any]], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Embed leaf blocks once and derive every parent's vector from its children.
+
+        `blocks` is a pre-order list whose `parent` fields index into it. A block
+        with children gets the mean of their vectors and `derived=True`, so class
+        bodies are never run through the model again after their methods.
+        """
+        parents = {b["parent"] for b in blocks if b.get("parent") is not None}
+        leaves = [i for i, b in enumerate(blocks) if i not in parents and b["block"].strip()]
+        embeddings = self._embed_texts([blocks[i]["block"] for i in leaves], batch_size=batch_size)
+        vectors = {i: e for i, e in zip(leaves, embeddings) if isinstance(e, np.ndarray)}
+
+        # Children follow their parent, so walking backwards completes each subtree first
+        child_vectors: Dict[int, List[np.ndarray]] = {}
+        for i in range(len(blocks) - 1, -1, -1):
+            if i in parents and child_vectors.get(i):
+                vectors[i] = np.mean(np.vstack(child_vectors[i]), axis=0, keepdims=True)
+            parent = blocks[i].get("parent")
+            if parent is not None and i in vectors:
+                child_vectors.setdefault(parent, []).append(vectors[i])
+
+        result_blocks = []
+        for i, block in enumerate(blocks):
+            if i in vectors:
+                record = {key: value for key, value in block.items() if key != "parent"}
+                record["embedding"] = vectors[i]
+                record["derived"] = i in parents
+                result_blocks.append(record)
+        return result_blocks
+
+    def parse_code(self, code: str, file_name: str = "unknown") -> List[Dict[str, Any]]:
+        return self.embed_tree(self.extract_blocks(code, file_name))
+
+    def parse_repository(self, files: Iterable[Dict], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Parse files in worker processes and embed their blocks as they stream back.
+
+        `files` can be a lazy iterator of {"name", "path", "content"} records
+        such as RepoFetcher.read_files(); it is consumed incrementally.
+
+        Blocks are buffered into windows of several micro-batches, so each
+        window is still length-bucketed while later chunks are being parsed.
+        Chunks are consumed in file order, which keeps the output deterministic.
+        """
+        batch_size = max(1, batch_size or PipelineConfig.EMBEDDING_BATCH_SIZE)
+        window_size = batch_size * 8
+        result_blocks = []
+        window = []
+        extracted = 0
+        for chunk_blocks in self.iter_extracted(files):
+            # Re-base the chunk's parent indices onto the window
+            offset = len(window)
+            for block in chunk_blocks:
+                if block.get("parent") is not None:
+                    block["parent"] += offset
+            window.extend(chunk_blocks)
+            extracted += len(chunk_blocks)
+            if len(window) >= window_size:
+                result_blocks.extend(self.embed_tree(window, batch_size=batch_size))
+                window = []
+        if window:
+            result_blocks.extend(self.embed_tree(window, batch_size=batch_size))
+        BLOCKS_PARSED.inc(extracted)
+        logger.info(f"Extracted {extracted} blocks")
+        return result_blocks
+
+    def parse_revision(self, fetcher, metadata: Dict[str, Any], repo_key: str) -> Dict[str, Any]:
+        """Parse a fetched commit, re-parsing only the files changed since the repository's manifest.
+
+        `fetcher` is the RepoFetcher that cloned `metadata`. Returns
+        {"blocks", "parsed", "base_commit"}: every block in file order, the
+        same list parse_repository() gives for all files; the blocks of each
+        file parsed this time, by path; and the manifest commit the other
+        files' blocks came from (None when every file was parsed).
+        """
+        files = metadata.get("files", [])
+        base_commit = self.manifest.base_commit(repo_key, PipelineConfig.PIPELINE_VERSION, self.model_id)
+        reused = {}
+        if base_commit is not None:
+            changed = fetcher.changed_files(metadata["path"], base_commit)
+            if changed is None:
+                # Without the base commit, compare blob oids with the manifest's
+                stored_oids = self.manifest.blob_oids(repo_key)
+                changed = {f["path"] for f in files if f.get("oid") is None or stored_oids.get(f["path"]) != f["oid"]}
+            reused = self.manifest.load_blocks(repo_key, [f["path"] for f in files if f["path"] not in changed])
+        to_parse = [f for f in files if f["path"] not in reused]
+        parsed = {f["path"]: [] for f in to_parse}
+        for block in self.parse_repository(fetcher.read_files(metadata["path"], to_parse)):
+            parsed.setdefault(block["file"], []).append(block)
+        if base_commit is not None:
+            logger.info(f"Parsed {len(to_parse)} of {len(files)} files changed since {base_commit[:12]}")
+        return {
+            "blocks": [block for f in files for block in reused.get(f["path"], parsed.get(f["path"], []))],
+            "parsed": parsed,
+            "base_commit": base_commit if reused else None
+        }
+
+    def store_revision(self, revision: Dict[str, Any], metadata: Dict[str, Any], repo_key: str):
+        """Update the corpus and the manifest with a parse_revision() result.
+
+        Only the blocks of files that were re-parsed, added or deleted are
+        replaced in the corpus.
+        """
+        files = metadata.get("files", [])
+        commit_hash = metadata.get("commit_hash", "unknown")
+        unchanged = None
+        if revision["base_commit"] is not None:
+            unchanged = {f["path"] for f in files if f["path"] not in revision["parsed"]}
+        stored = self.corpus.add_blocks(repo_key, commit_hash, revision["blocks"],
+                                        unchanged_files=unchanged, base_commit=revision["base_commit"])
+        if len(revision["blocks"]) != stored:
+            logger.warning(f"Skipped {len(revision['blocks']) - stored} invalid embeddings for {repo_key}")
+        if commit_hash != "unknown":
+            self.manifest.save(repo_key, commit_hash, PipelineConfig.PIPELINE_VERSION, self.model_id,
+                               {f["path"]: f.get("oid") for f in files}, revision["parsed"])
+
+    def store_embeddings(self, code_blocks: List[Dict[str, Any]], repo_name: str, commit_hash: str = "unknown"):
+        """Append the repository's blocks to the cross-repository corpus index"""
+        if not code_blocks:
+            logger.info(f"No code blocks to store for {repo_name}")
             return
-        index = faiss.IndexFlatL2(valid_embeddings[0].shape[1])
-        index.add(np.vstack(valid_embeddings))
-        os.makedirs("faiss_index", exist_ok=True)
-        faiss_file = os.path.join("faiss_index", f"{repo_name}_code.faiss")
-        faiss.write_index(index, faiss_file)
-        code_file = os.path.join("faiss_index", f"{repo_name}_code.txt")
-        with open(code_file, "w", encoding="utf-8") as f:
-            for i, block in enumerate(valid_blocks):
-                f.write(f"Block {i}:\n{block}\n{'='*50}\n")
-        logger.info(f"Saved embeddings to {faiss_file} and code to {code_file}")
\ No newline at end of file
+        stored = self.corpus.add_blocks(repo_name, commit_hash, code_blocks)
+        if len(code_blocks) != stored:
+            logger.warning(f"Skipped {len(code_blocks) - stored} invalid embeddings for {repo_name}")
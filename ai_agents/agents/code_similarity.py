@@ -1,25 +1,29 @@
-import faiss
 import numpy as np
-from typing import List, Dict
-import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 import logging
-from github import Github
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-import time
+
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.metrics import span
+from ai_agents.utils.pipeline import mark_degraded
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
 class CodeSimilarity:
-    def __init__(self):
-        self.faiss_index_path = "faiss_index"
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            logger.error("GITHUB_TOKEN not set")
-            raise ValueError("GITHUB_TOKEN environment variable is required")
-        self.g = Github(github_token)
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        registry = registry or get_registry()
+        self.corpus = registry.corpus_index
+        self.g = registry.github_client
+        self.model = registry.sentence_model
+
+    def _readme_excerpt(self, repo: Dict) -> str:
+        try:
+            return self.g.get_readme(repo["full_name"])[:500]  # First 500 chars
+        except Exception:
+            return ""
 
     def find_similar_github_repos(self, repo_name: str, code_sample: str) -> List[Dict]:
         """Find similar repositories on GitHub using code samples"""
@@ -36,54 +40,70 @@ class CodeSimilarity:
             query = f"{keywords} language:python -in:name {repo_name}"
             repos = self.g.search_repositories(query=query, sort="stars", order="desc")
             
-            # Get top 10 repositories
-            count = 0
-            for repo in repos:
-                if count >= 10:
-                    break
-                    
-                if repo.full_name.lower() != repo_name.lower():
-                    try:
-                        # Get repo description and README if available
-                        description = repo.description or ""
-                        readme_content = ""
-                        try:
-                            readme = repo.get_readme()
-                            readme_content = readme.decoded_content.decode('utf-8')[:500]  # First 500 chars
-                        except:
-                            pass
-                            
-                        # Calculate semantic similarity between repos
-                        repo_text = f"{repo.name} {description} {readme_content}"
-                        query_text = f"{repo_name} {code_sample[:500]}"
-                        
-                        repo_emb = self.model.encode(repo_text, convert_to_numpy=True)
-                        query_emb = self.model.encode(query_text, convert_to_numpy=True)
-                        
-                        # Calculate cosine similarity
-                        similarity = np.dot(repo_emb, query_emb) / (np.linalg.norm(repo_emb) * np.linalg.norm(query_emb))
-                        
-                        similar_repos.append({
-                            "name": repo.full_name,
-                            "url": repo.html_url,
-                            "description": description[:100] + "..." if len(description) > 100 else description,
-                            "similarity": float(similarity)
-                        })
-                        count += 1
-                    except Exception as e:
-                        logger.warning(f"Error processing repo {repo.full_name}: {str(e)}")
-                    
-                    time.sleep(0.2)  # Avoid rate limiting
+            # Top 10 repositories other than this one
+            candidates = [repo for repo in repos if repo["full_name"].lower() != repo_name.lower()][:10]
+            if candidates:
+                # Enrich candidates with their READMEs concurrently, bounded fan-out
+                with ThreadPoolExecutor(max_workers=PipelineConfig.GITHUB_FANOUT) as executor:
+                    readmes = list(executor.map(self._readme_excerpt, candidates))
+                descriptions = [repo.get("description") or "" for repo in candidates]
+                repo_texts = [
+                    f"{repo['name']} {description} {readme_content}"
+                    for repo, description, readme_content in zip(candidates, descriptions, readmes)
+                ]
+                query_text = f"{repo_name} {code_sample[:500]}"
+
+                # Embed the query once and every candidate in a single batch
+                query_emb = self.model.encode(query_text, convert_to_numpy=True)
+                repo_embs = self.model.encode(repo_texts, convert_to_numpy=True)
+
+                # Cosine similarity of every candidate as one matrix-vector product
+                similarities = (repo_embs @ query_emb) / (np.linalg.norm(repo_embs, axis=1) * np.linalg.norm(query_emb))
+
+                for repo, description, similarity in zip(candidates, descriptions, similarities):
+                    similar_repos.append({
+                        "name": repo["full_name"],
+                        "url": repo["html_url"],
+                        "description": description[:100] + "..." if len(description) > 100 else description,
+                        "similarity": float(similarity)
+                    })
             
             # Sort by similarity score
             similar_repos = sorted(similar_repos, key=lambda x: x["similarity"], reverse=True)
             
         except Exception as e:
             logger.error(f"Failed to search GitHub: {str(e)}")
+            mark_degraded("GitHub repository search failed")
             
         return similar_repos[:10]  # Ensure we return at most 10
 
-    def compare(self, code_blocks: List[Dict], repo_name: str) -> Dict:
+    @staticmethod
+    def _line_span(block: Dict) -> Optional[List[int]]:
+        if block.get("start_line") is None or block.get("end_line") is None:
+            return None
+        return [block["start_line"], block["end_line"]]
+
+    def _copied_block(self, block: Dict, source: Optional[Dict], similarity: float, match_type: str) -> Dict:
+        block_text = block["block"]
+        block_text = block_text if len(block_text) < 400 else block_text[:397] + "..."
+        return {
+            "target_block": block_text,
+            "distance": similarity,  # Using similarity instead of distance
+            "similar_to": source["block"] if source else "External code",
+            "target_file": block.get("file"),
+            "target_lines": self._line_span(block),
+            "similar_repo": source["repo"] if source else None,
+            "similar_file": source["file"] if source else None,
+            "similar_lines": self._line_span(source) if source else None,
+            "match_type": match_type
+        }
+
+    def compare(self, code_blocks: List[Dict], repo_name: str, repo_key: Optional[str] = None) -> Dict:
+        """Compare a repository's blocks against every other repository in the corpus.
+
+        `repo_key` identifies the repository in the corpus ("owner/name");
+        its own blocks, from this or earlier commits, are never matched.
+        """
         if not code_blocks:
             logger.info(f"No code blocks for {repo_name}")
             return {"similarity_score": 0.0, "copied_blocks": [], "similar_repos": []}
@@ -96,56 +116,56 @@ class CodeSimilarity:
             logger.info(f"No valid embeddings for {repo_name}")
             return {"similarity_score": 0.0, "copied_blocks": [], "similar_repos": []}
 
-        embeddings = np.vstack([b["embedding"] for b in valid_blocks]).astype(np.float32)
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-
-        faiss_file = os.path.join(self.faiss_index_path, f"{repo_name}_code.faiss")
-        code_file = os.path.join(self.faiss_index_path, f"{repo_name}_code.txt")
-        stored_blocks = []
-        if os.path.exists(code_file):
-            try:
-                with open(code_file, "r", encoding="utf-8") as f:
-                    stored_blocks = f.read().split("==================================================")
-                    stored_blocks = [b.strip() for b in stored_blocks if b.strip()]
-            except Exception as e:
-                logger.error(f"Failed to load code file {code_file}: {str(e)}")
-
-        # Use external index to avoid self-matches
-        external_index = faiss.IndexFlatL2(dimension)
-        if os.path.exists(faiss_file):
-            try:
-                external_index = faiss.read_index(faiss_file)
-            except Exception as e:
-                logger.error(f"Failed to load FAISS index {faiss_file}: {str(e)}")
-
         copied_blocks = []
         similarity_scores = []
         
         # Combine some code for finding similar repos
         combined_code = "\n".join([block["block"][:200] for block in valid_blocks[:5]])
-        similar_repos = self.find_similar_github_repos(repo_name, combined_code)
+        with span("similar_repo_search"):
+            similar_repos = self.find_similar_github_repos(repo_name, combined_code)
+
+        # Near-verbatim copies are settled by shared fingerprints; only the rest need a dense search
+        exclude_repo = repo_key or repo_name
+        with span("fingerprint_search"):
+            fingerprint_matches = self.corpus.match_fingerprints(
+                [b["block"] for b in valid_blocks],
+                exclude_repo=exclude_repo,
+                min_prints=PipelineConfig.FINGERPRINT_MIN_PRINTS,
+                max_block_frequency=PipelineConfig.FINGERPRINT_COMMON_BLOCKS
+            )
+        fingerprinted = {
+            i: match for i, match in enumerate(fingerprint_matches)
+            if match is not None and match["overlap"] >= PipelineConfig.FINGERPRINT_MATCH_THRESHOLD
+        }
+        dense = [i for i in range(len(valid_blocks)) if i not in fingerprinted]
         
-        if external_index.ntotal > 0:
-            distances, indices = external_index.search(embeddings, k=2)
-            for i in range(len(valid_blocks)):
-                distance = distances[i, 0]
-                
-                # Calculate normalized similarity score (1.0 = identical, 0.0 = completely different)
-                # Convert L2 distance to similarity
-                # A more reasonable similarity threshold
-                similarity = max(0.0, min(1.0, 1.0 - distance / 10.0))
-                similarity_scores.append(similarity)
-                
-                # Only consider blocks with meaningful similarity
-                if similarity > 0.7:  # More reasonable threshold
-                    block_text = valid_blocks[i]["block"]
-                    block_text = block_text if len(block_text) < 400 else block_text[:397] + "..."
-                    copied_blocks.append({
-                        "target_block": block_text,
-                        "distance": float(similarity),  # Using similarity instead of distance
-                        "similar_to": stored_blocks[indices[i, 0]] if indices[i, 0] < len(stored_blocks) else "External code"
-                    })
+        # One batched query against the corpus of all other analyzed repositories
+        scores = np.empty((0, 1), dtype=np.float32)
+        indices = np.empty((0, 1), dtype=np.int64)
+        if dense:
+            embeddings = np.vstack([valid_blocks[i]["embedding"] for i in dense]).astype(np.float32)
+            with span("corpus_search"):
+                scores, indices = self.corpus.search(embeddings, k=1, exclude_repo=exclude_repo)
+        matched = self.corpus.get_blocks(indices[:, 0].tolist() + [m["id"] for m in fingerprinted.values()])
+
+        for i, match in fingerprinted.items():
+            # The shared share of fingerprints stands in for the similarity
+            similarity_scores.append(match["overlap"])
+            copied_blocks.append(self._copied_block(valid_blocks[i], matched.get(match["id"]), match["overlap"], "fingerprint"))
+
+        floor = PipelineConfig.CODE_COSINE_FLOOR
+        for row, i in enumerate(dense):
+            if indices[row, 0] < 0:
+                continue
+            # Code embeddings are all fairly close in angle; stretch cosine from the floor up to 1.0
+            # onto a 0-1 similarity (1.0 = identical, 0.0 = unrelated)
+            similarity = max(0.0, min(1.0, (float(scores[row, 0]) - floor) / (1.0 - floor)))
+            similarity_scores.append(similarity)
+            
+            # Only consider blocks with meaningful similarity
+            if similarity > 0.7:  # More reasonable threshold
+                source = matched.get(int(indices[row, 0]))
+                copied_blocks.append(self._copied_block(valid_blocks[i], source, float(similarity), "embedding"))
         
         # Calculate overall similarity - average of block similarities with reasonable weighting
         # If no similarities were found, score is 0
@@ -159,24 +179,10 @@ class CodeSimilarity:
         # Sort copied blocks by similarity (higher values first)
         copied_blocks = sorted(copied_blocks, key=lambda x: x["distance"], reverse=True)[:5]
 
-        # Update index
-        index.add(embeddings)
-        try:
-            os.makedirs(self.faiss_index_path, exist_ok=True)
-            faiss.write_index(index, faiss_file)
-            
-            # Also store the code blocks for later reference
-            with open(code_file, "w", encoding="utf-8") as f:
-                for i, block in enumerate(valid_blocks):
-                    f.write(f"Block {i}:\n{block['block']}\n{'='*50}\n")
-                    
-        except Exception as e:
-            logger.error(f"Failed to save FAISS index {faiss_file}: {str(e)}")
-
         result = {
             "similarity_score": similarity_score,
             "copied_blocks": copied_blocks,
             "similar_repos": similar_repos
         }
         logger.info(f"Code similarity result for {repo_name}: {similarity_score:.4f}")
-        return result
\ No newline at end of file
+        return result
@@ -1,31 +1,71 @@
-from github import Github
-import pandas as pd
-from typing import Dict
+import git
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional
 import os
 from dotenv import load_dotenv
+import logging
+
+from ai_agents.agents.repo_fetcher import clone_lock
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.pipeline import mark_degraded
 
 # Load environment variables from .env file
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 class ContribAnalyzer:
-    def __init__(self):
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            raise ValueError("GITHUB_TOKEN environment variable is required")
-        self.g = Github(github_token)
+    def __init__(self, registry: Optional[ModelRegistry] = None, source: Optional[str] = None):
+        registry = registry or get_registry()
+        self.g = registry.github_client
+        self.source = source or PipelineConfig.CONTRIB_SOURCE
+
+    @staticmethod
+    def credibility_from_timestamps(timestamps: np.ndarray) -> float:
+        """Score commit history: penalise days with more than 10 commits and very short histories"""
+        # Whole UTC days since the epoch, the same bucketing as commit dates in UTC
+        days = timestamps.astype(np.int64) // 86400
+        _, daily_commits = np.unique(days, return_counts=True)
+        spikes = int((daily_commits > 10).sum())
+        credibility = max(0, 100 - spikes * 5 - max(0, 10 - len(timestamps)) * 2)
+        return float(credibility)
+
+    def _local_timestamps(self, repo_path: str) -> np.ndarray:
+        """Author timestamps of every commit on HEAD, streamed from `git log`"""
+        repo = git.Repo(repo_path)
+        # The parse stage may be fetching into the same clone
+        with clone_lock(repo_path):
+            if repo.git.rev_parse("--is-shallow-repository") == "true":
+                # History-only fetch: commits without trees or blobs
+                repo.git.fetch("--unshallow", "--filter=tree:0", "origin")
+        process = repo.git.log("--format=%at", "HEAD", as_process=True)
+        timestamps = np.fromiter((int(line) for line in process.proc.stdout if line.strip()), dtype=np.int64)
+        process.wait()
+        return timestamps
+
+    def _api_timestamps(self, repo_url: str) -> np.ndarray:
+        repo_name = "/".join(repo_url.split("/")[-2:]).replace(".git", "")
+        return np.fromiter(
+            (
+                datetime.fromisoformat(commit["commit"]["author"]["date"].replace("Z", "+00:00")).timestamp()
+                for commit in self.g.iter_commits(repo_name)
+            ),
+            dtype=np.float64
+        )
 
-    def analyze_contributions(self, repo_url: str) -> Dict:
+    def analyze_contributions(self, repo_url: str, repo_path: Optional[str] = None) -> Dict:
         try:
-            repo_name = "/".join(repo_url.split("/")[-2:]).replace(".git", "")
-            repo = self.g.get_repo(repo_name)
-            commits = list(repo.get_commits())
-            dates = [commit.commit.author.date for commit in commits]
-            df = pd.DataFrame(dates, columns=['date'])
-            df['day'] = df['date'].dt.date
-            daily_commits = df['day'].value_counts().sort_index()
-            spikes = (daily_commits > 10).sum()
-            credibility = max(0, 100 - spikes * 5 - max(0, 10 - len(commits)) * 2)
-            return {"credibility_score": float(credibility)}
+            timestamps = None
+            if self.source == "local" and repo_path and os.path.isdir(os.path.join(repo_path, ".git")):
+                try:
+                    timestamps = self._local_timestamps(repo_path)
+                except Exception as e:
+                    logger.warning(f"Local commit history unavailable for {repo_url}, using the API: {str(e)}")
+            if timestamps is None:
+                timestamps = self._api_timestamps(repo_url)
+            return {"credibility_score": self.credibility_from_timestamps(timestamps)}
         except Exception as e:
             print(f"Error analyzing contributions: {str(e)}")
-            return {"credibility_score": 0.0}
\ No newline at end of file
+            mark_degraded("commit history unavailable")
+            return {"credibility_score": 0.0}
@@ -1,115 +1,134 @@
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-from typing import Dict, List
-import os
-from github import Github
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-import time
 import logging
 
+from ai_agents.models.ann_index import normalize
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.metrics import FAISS_VECTORS_SEARCHED, span
+from ai_agents.utils.pipeline import mark_degraded
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 class IdeaChecker:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            logger.error("GITHUB_TOKEN not set")
-            raise ValueError("GITHUB_TOKEN environment variable is required")
-        self.g = Github(github_token)
-
-    def check_idea(self, idea_summary: str, repo_name: str) -> Dict:
-        if not idea_summary.strip() or idea_summary == "No project description available.":
-            logger.info(f"No valid idea summary for {repo_name}")
-            return {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        registry = registry or get_registry()
+        self.model = registry.sentence_model
+        self.g = registry.github_client
+        self.corpus = registry.idea_corpus
 
+    def _search_github(self, idea_summary: str, repo_name: str, exclude_name: str) -> List[Dict]:
+        """Up to 10 repositories from live GitHub searches on the summary's first words and the repo name"""
         keywords = ' '.join(idea_summary.split()[:5]).replace("system", "").replace("project", "").strip()
         if not keywords:
             keywords = repo_name.replace("_", " ").replace("-", " ").strip()
 
         search_terms = [keywords, repo_name.replace("_", " ").replace("-", " ").strip()]
-        repo_descriptions = []
-        repo_names = []
-        repo_urls = []
-        
-        try:
-            for term in search_terms:
-                query = f"{term} language:python -in:name {repo_name}"
+        projects = []
+        seen = set()
+        for term in search_terms:
+            query = f"{term} language:python -in:name {repo_name}"
+            with span("idea_github_search"):
                 repos = self.g.search_repositories(query=query, sort="stars", order="desc")
-                
-                # Get up to 10 repositories
-                count = 0
-                for repo in repos:
-                    if count >= 10:
-                        break
-                        
-                    description = repo.description or repo.name
-                    if description and repo.full_name.lower() != repo_name.lower() and repo.full_name not in repo_names:
-                        repo_descriptions.append(description)
-                        repo_names.append(repo.full_name)
-                        repo_urls.append(repo.html_url)
-                        count += 1
-                    time.sleep(0.1)
-                    
-                if len(repo_names) >= 10:
+
+            # Get up to 10 repositories
+            count = 0
+            for repo in repos:
+                if count >= 10:
                     break
-        except Exception as e:
-            logger.error(f"Error searching GitHub: {str(e)}")
-            return {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
 
-        if not repo_descriptions:
-            logger.info(f"No similar repos found for {repo_name}")
+                description = repo.get("description") or repo["name"]
+                if description and repo["full_name"].lower() != exclude_name.lower() and repo["full_name"] not in seen:
+                    projects.append({"full_name": repo["full_name"], "url": repo["html_url"], "description": description})
+                    seen.add(repo["full_name"])
+                    count += 1
+
+            if len(projects) >= 10:
+                break
+        return projects
+
+    def check_idea(self, idea_summary: str, repo_name: str, repo_key: Optional[str] = None,
+                   repo_url: Optional[str] = None) -> Dict:
+        """Compare the idea summary with known projects: the local corpus first, GitHub search if it has too few.
+
+        `repo_key` ("owner/name") keeps the repository from matching itself;
+        with it, the summary is added to the corpus for later checks.
+        """
+        if not idea_summary.strip() or idea_summary == "No project description available.":
+            logger.info(f"No valid idea summary for {repo_name}")
             return {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
 
+        exclude_name = repo_key or repo_name
         try:
-            # Encode the idea summary
-            idea_emb = self.model.encode(idea_summary, convert_to_numpy=True).reshape(1, -1)
-            
-            # Encode all repository descriptions
-            repo_embs = self.model.encode(repo_descriptions, convert_to_numpy=True)
-            
-            # Create FAISS index
-            index = faiss.IndexFlatL2(idea_emb.shape[1])
-            index.add(repo_embs)
-            
-            # Find closest repositories
-            k = min(5, len(repo_descriptions))  # Get top 5 or all if less than 5
-            distances, indices = index.search(idea_emb, k)
-            
-            # Calculate similarity score (convert distance to similarity)
-            # L2 distance to similarity conversion
-            similarity = 1.0 - min(1.0, distances[0][0] / 4.0)
-            
-            # Create more detailed verdict with reasoning
-            if similarity < 0.2:
-                verdict = "Unique - The project idea appears to be highly original"
-            elif similarity < 0.4:
-                verdict = "Somewhat Unique - The project idea has some similarities to existing projects"
-            elif similarity < 0.6:
-                verdict = "Inspired - The project idea shows inspiration from existing projects"
-            elif similarity < 0.8:
-                verdict = "Common - The project idea is common with several similar existing projects"
-            else:
-                verdict = "Very Common - The project idea is highly similar to many existing projects"
-                
-            # Get top 5 similar projects with URLs
-            similar_projects = []
-            for i in indices[0]:
-                if i < len(repo_names):
-                    similar_projects.append({
-                        "name": repo_names[i],
-                        "url": repo_urls[i]
-                    })
-                    
-            # Extract just the names for backward compatibility
-            similar_project_names = [p["name"] for p in similar_projects]
+            idea_emb = normalize(self.model.encode(idea_summary, convert_to_numpy=True))
+        except Exception as e:
+            logger.error(f"Error encoding idea summary: {str(e)}")
+            mark_degraded("idea summary not encoded")
+            return {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
 
+        # Cosine of unit vectors mapped from [-1, 1] onto [0, 1]; equal to 1 - L2^2 / 4
+        candidates = {}
+        try:
+            with span("idea_corpus_search"):
+                for hit in self.corpus.search(idea_emb[0], k=10, exclude_name=exclude_name):
+                    candidates[hit["name"].lower()] = {"name": hit["name"], "url": hit["url"],
+                                                       "similarity": (1.0 + hit["cosine"]) / 2.0}
         except Exception as e:
-            logger.error(f"Error comparing embeddings: {str(e)}")
+            logger.error(f"Error searching idea corpus: {str(e)}")
+            mark_degraded("idea corpus search failed")
+
+        relevant = [c for c in candidates.values() if c["similarity"] >= PipelineConfig.IDEA_CORPUS_MIN_SIMILARITY]
+        if len(relevant) < PipelineConfig.IDEA_CORPUS_MIN_RESULTS:
+            # Too little stored nearby: ask GitHub, and keep what it returns for next time
+            try:
+                projects = self._search_github(idea_summary, repo_name, exclude_name)
+                if projects:
+                    embeddings = normalize(self.model.encode([p["description"] for p in projects], convert_to_numpy=True))
+                    # A handful of descriptions is scored exactly
+                    cosines = embeddings @ idea_emb[0]
+                    FAISS_VECTORS_SEARCHED.labels(index="idea").inc(len(projects))
+                    for project, cosine in zip(projects, cosines):
+                        candidates[project["full_name"].lower()] = {"name": project["full_name"], "url": project["url"],
+                                                                    "similarity": (1.0 + float(cosine)) / 2.0}
+                    self.corpus.add_projects(projects, embeddings, source="github_search")
+            except Exception as e:
+                logger.error(f"Error searching GitHub: {str(e)}")
+                mark_degraded("GitHub idea search failed")
+
+        if repo_key:
+            try:
+                self.corpus.add_projects(
+                    [{"full_name": repo_key, "url": repo_url or f"https://github.com/{repo_key}", "description": idea_summary}],
+                    idea_emb, source="analyzed"
+                )
+            except Exception as e:
+                logger.error(f"Error adding {repo_key} to idea corpus: {str(e)}")
+
+        if not candidates:
+            logger.info(f"No similar repos found for {repo_name}")
             return {"idea_similarity_score": 0.0, "verdict": "Unique", "similar_projects": []}
 
+        # Top 5 similar projects with URLs, closest first
+        similar_projects = sorted(candidates.values(), key=lambda c: c["similarity"], reverse=True)[:5]
+        similarity = max(0.0, min(1.0, similar_projects[0]["similarity"]))
+
+        # Create more detailed verdict with reasoning
+        if similarity < 0.2:
+            verdict = "Unique - The project idea appears to be highly original"
+        elif similarity < 0.4:
+            verdict = "Somewhat Unique - The project idea has some similarities to existing projects"
+        elif similarity < 0.6:
+            verdict = "Inspired - The project idea shows inspiration from existing projects"
+        elif similarity < 0.8:
+            verdict = "Common - The project idea is common with several similar existing projects"
+        else:
+            verdict = "Very Common - The project idea is highly similar to many existing projects"
+
+        similar_projects = [{"name": p["name"], "url": p["url"]} for p in similar_projects]
+        # Extract just the names for backward compatibility
+        similar_project_names = [p["name"] for p in similar_projects]
+
         result = {
             "idea_similarity_score": float(similarity),
             "verdict": verdict,
@@ -117,4 +136,4 @@ class IdeaChecker:
             "similar_project_details": similar_projects  # Add detailed project info
         }
         logger.info(f"Idea check result for {repo_name}: {result}")
-        return result
\ No newline at end of file
+        return result
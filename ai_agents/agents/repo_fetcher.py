@@ -1,88 +1,260 @@
 # ai_agents/agents/repo_fetcher.py
 import git
 import os
+import re
 import shutil
+import tempfile
+import threading
 import time
-import psutil
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, Optional, Set
+import logging
+
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.utils.block_extractor import file_language
+from ai_agents.utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Files the pipeline reads; everything else is never checked out in sparse mode
+SOURCE_EXTENSIONS = (".py", ".java", ".cpp", ".c", ".js", ".jsx")
+_TOP_LEVEL_FILES = re.compile(r"(?i)readme\.md|license")
+_PATTERN_SPECIALS = re.compile(r"([\\*?\[!# ])")
+
+def _escape_pattern(path: str) -> str:
+    """Match `path` literally in a non-cone sparse-checkout file"""
+    return _PATTERN_SPECIALS.sub(r"\\\1", path)
+
+_clone_locks: Dict[str, threading.Lock] = {}
+_clone_locks_guard = threading.Lock()
+
+def clone_lock(repo_path: str) -> threading.Lock:
+    """Lock serializing git commands that write to one clone.
+
+    Stages of an analysis run in parallel, and two fetches into the same
+    shallow clone would contend for `.git/shallow.lock`.
+    """
+    key = os.path.abspath(repo_path)
+    with _clone_locks_guard:
+        return _clone_locks.setdefault(key, threading.Lock())
 
 class RepoFetcher:
-    def __init__(self, temp_dir: str = "temp_repos"):
+    def __init__(self, temp_dir: str = "temp_repos", mode: Optional[str] = None,
+                 max_file_bytes: Optional[int] = None, max_total_bytes: Optional[int] = None):
         self.temp_dir = temp_dir
+        self.mode = mode or PipelineConfig.FETCH_MODE
+        self.max_file_bytes = max_file_bytes or PipelineConfig.FETCH_MAX_FILE_BYTES
+        self.max_total_bytes = max_total_bytes or PipelineConfig.FETCH_MAX_TOTAL_BYTES
         os.makedirs(temp_dir, exist_ok=True)
 
-    def terminate_git_processes(self):
-        """Terminate any running git processes to release file locks."""
-        for proc in psutil.process_iter(['name']):
-            if proc.info['name'].lower() == 'git.exe':
+    def _sparse_clone(self, repo_url: str, repo_path: str) -> git.Repo:
+        """Depth-1, size-filtered clone that only checks out the files the parser reads.
+
+        Blobs over the per-file cap are never transferred. The sparse-checkout
+        set lists the source files that fit the caps, in the order iter_files()
+        walks them, so the checkout lazily fetches nothing else. Servers
+        without partial-clone support ignore the filter.
+        """
+        # The filter leaves out blobs of at least `limit` bytes; the cap allows exactly max_file_bytes
+        repo = git.Repo.clone_from(repo_url, repo_path, depth=1,
+                                   filter=f"blob:limit={self.max_file_bytes + 1}", no_checkout=True)
+        with tempfile.TemporaryFile() as paths:
+            paths.write("".join(f"/{_escape_pattern(path)}\n" for path in self._checkout_paths(repo)).encode("utf-8"))
+            paths.seek(0)
+            repo.git.sparse_checkout("set", "--no-cone", "--stdin", istream=paths)
+        repo.git.checkout()
+        return repo
+
+    def _checkout_paths(self, repo: git.Repo) -> Iterator[str]:
+        """Paths at HEAD of the source files within the caps, plus README and LICENSE.
+
+        Sizes are read from the local object store; blobs the filter left on
+        the server are over the per-file cap and are not asked for.
+        """
+        missing = {line[1:] for line in repo.git.rev_list("--objects", "--missing=print", "HEAD").splitlines()
+                   if line.startswith("?")}
+        oids = self.blob_oids(repo)
+        present = {path: oid for path, oid in oids.items() if oid not in missing}
+        for path in present:
+            if _TOP_LEVEL_FILES.fullmatch(path):
+                yield path
+        total_bytes = 0
+        # os.walk in iter_files() visits a directory's files before its subdirectories
+        ordered = sorted(
+            (path for path in oids if path.endswith(SOURCE_EXTENSIONS)),
+            key=lambda path: [(1, part) for part in path.split("/")[:-1]] + [(0, path.rsplit("/", 1)[-1])]
+        )
+        for path in ordered:
+            if path not in present:
+                logger.info(f"Not checking out {path}: blob exceeds per-file cap")
+                continue
+            size = repo.odb.info(bytes.fromhex(present[path])).size
+            if size > self.max_file_bytes:
+                logger.info(f"Not checking out {path}: {size} bytes exceeds per-file cap")
+                continue
+            if total_bytes + size > self.max_total_bytes:
+                logger.info(f"Not checking out {path}: total source cap of {self.max_total_bytes} bytes reached")
+                continue
+            total_bytes += size
+            yield path
+
+    def iter_files(self, repo_path: str) -> Iterator[Dict]:
+        """Yield a summary of every source file in the clone without reading it.
+
+        Summaries are {"name", "path", "size", "language"}, with `path`
+        relative to the clone. Files over the per-file cap, and files past the
+        total cap, are skipped.
+        """
+        total_bytes = 0
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = sorted(d for d in dirs if d != ".git")
+            for file in sorted(files):
+                if not file.endswith(SOURCE_EXTENSIONS):
+                    continue
+                file_path = os.path.join(root, file)
                 try:
-                    proc.terminate()
-                    proc.wait(timeout=3)
-                    print(f"Terminated git process {proc.pid}")
-                except Exception as e:
-                    print(f"Failed to terminate git process {proc.pid}: {str(e)}")
+                    size = os.path.getsize(file_path)
+                except OSError as e:
+                    logger.error(f"Error reading file {file_path}: {str(e)}")
+                    continue
+                if size > self.max_file_bytes:
+                    logger.info(f"Skipping {file_path}: {size} bytes exceeds per-file cap")
+                    continue
+                if total_bytes + size > self.max_total_bytes:
+                    logger.info(f"Skipping {file_path}: total source cap of {self.max_total_bytes} bytes reached")
+                    continue
+                total_bytes += size
+                yield {
+                    "name": file,
+                    "path": os.path.relpath(file_path, repo_path).replace(os.sep, "/"),
+                    "size": size,
+                    "language": file_language(file)
+                }
 
-    def fetch_repo(self, repo_url: str) -> Dict:
+    def blob_oids(self, repo: git.Repo) -> Dict[str, str]:
+        """{path: blob oid} of every file at HEAD, read from the tree so no blob is needed"""
+        try:
+            entries = repo.git.ls_tree("-r", "-z", "HEAD").split("\0")
+        except git.GitCommandError as e:
+            logger.warning(f"Could not list the tree of {repo.working_dir}: {str(e)}")
+            return {}
+        oids = {}
+        for entry in filter(None, entries):
+            info, path = entry.split("\t", 1)
+            _, kind, oid = info.split()
+            if kind == "blob":
+                oids[path] = oid
+        return oids
+
+    def changed_files(self, repo_path: str, base_commit: str) -> Optional[Set[str]]:
+        """Paths added, modified or deleted between `base_commit` and HEAD.
+
+        A shallow clone lacks the base commit, so its commit and trees (no
+        blobs) are fetched first. Returns None when that is not possible,
+        e.g. the commit was force-pushed away.
+        """
+        repo = git.Repo(repo_path)
+        try:
+            with clone_lock(repo_path):
+                try:
+                    repo.git.cat_file("-e", f"{base_commit}^{{tree}}")
+                except git.GitCommandError:
+                    with span("fetch_base"):
+                        repo.git.fetch("origin", base_commit, depth=1, filter="blob:none")
+                diff = repo.git.diff("--name-status", "--no-renames", "-z", base_commit, "HEAD").split("\0")
+        except git.GitCommandError as e:
+            logger.info(f"Cannot diff {repo_path} against {base_commit[:12]}: {str(e)}")
+            return None
+        # -z output alternates status and path
+        return set(filter(None, diff[1::2]))
+
+    def read_files(self, repo_path: str, files: Iterable[Dict]) -> Iterator[Dict]:
+        """Lazily add the content of each summarized file; undecodable files are skipped"""
+        for summary in files:
+            file_path = os.path.join(repo_path, summary["path"])
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    yield dict(summary, content=f.read())
+            except UnicodeDecodeError:
+                logger.warning(f"Skipping file {file_path}: Unicode decode error")
+            except Exception as e:
+                logger.error(f"Error reading file {file_path}: {str(e)}")
+
+    def fetch_repo(self, repo_url: str, mode: Optional[str] = None) -> Dict:
+        """Clone the repository and return its metadata.
+
+        `files` holds summaries only, each with its blob "oid"; read_files()
+        streams their contents.
+        """
+        mode = mode or self.mode
         repo_name = repo_url.split("/")[-1].replace(".git", "")
-        repo_path = os.path.join(self.temp_dir, repo_name)
+        # Each job clones into its own directory: concurrent analyses of the same repository,
+        # or of repositories with the same name, keep reading their files while others start
+        repo_path = tempfile.mkdtemp(prefix=f"{repo_name}_", dir=self.temp_dir)
 
         try:
-            # Clean up existing directory
-            if os.path.exists(repo_path):
-                for attempt in range(3):
-                    try:
-                        self.terminate_git_processes()
-                        shutil.rmtree(repo_path, ignore_errors=False)
-                        break
-                    except (PermissionError, OSError) as e:
-                        print(f"Attempt {attempt + 1} failed to delete {repo_path}: {str(e)}")
-                        time.sleep(2)
+            with span("clone"):
+                if mode == "sparse":
+                    repo = self._sparse_clone(repo_url, repo_path)
                 else:
-                    print(f"Failed to delete {repo_path} after retries")
-                    repo_path = os.path.join(self.temp_dir, f"{repo_name}_{int(time.time())}")
-                    os.makedirs(repo_path, exist_ok=True)
-
-            repo = git.Repo.clone_from(repo_url, repo_path)
+                    repo = git.Repo.clone_from(repo_url, repo_path)
+            files = list(self.iter_files(repo_path))
+            # Blob oids let a later analysis tell which files changed
+            oids = self.blob_oids(repo)
+            for f in files:
+                f["oid"] = oids.get(f["path"])
             metadata = {
                 "name": repo_name,
                 "url": repo_url,
+                "path": repo_path,
                 "commit_hash": repo.head.object.hexsha if repo.head.is_valid() else "unknown",
-                "files": [],
+                "files": files,
+                "source_bytes": sum(f["size"] for f in files),
                 "readme": None,
                 "license": None
             }
 
-            for root, _, files in os.walk(repo_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        if file.endswith((".py", ".java", ".cpp", ".c", ".js", ".jsx")):
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                content = f.read()
-                            metadata["files"].append({"name": file, "content": content})
-                        elif file.lower() == "readme.md":
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                metadata["readme"] = f.read()
-                        elif file.lower() == "license":
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                metadata["license"] = f.read()
-                    except UnicodeDecodeError:
-                        print(f"Skipping file {file_path}: Unicode decode error")
-                    except Exception as e:
-                        print(f"Error reading file {file_path}: {str(e)}")
+            # README and LICENSE come from the top level of the repository
+            for file in sorted(os.listdir(repo_path)):
+                key = {"readme.md": "readme", "license": "license"}.get(file.lower())
+                if key is None:
+                    continue
+                file_path = os.path.join(repo_path, file)
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        metadata[key] = f.read(self.max_file_bytes)
+                except UnicodeDecodeError:
+                    logger.warning(f"Skipping file {file_path}: Unicode decode error")
+                except Exception as e:
+                    logger.error(f"Error reading file {file_path}: {str(e)}")
 
             return metadata
 
         except Exception as e:
+            self.remove_clone(repo_path)
             raise Exception(f"Failed to fetch repo: {str(e)}")
 
+    def remove_clone(self, repo_path: str):
+        """Delete a clone made by fetch_repo() once its analysis no longer reads it"""
+        with _clone_locks_guard:
+            _clone_locks.pop(os.path.abspath(repo_path), None)
+        for attempt in range(3):
+            try:
+                shutil.rmtree(repo_path, ignore_errors=False)
+                return
+            except FileNotFoundError:
+                return
+            except (PermissionError, OSError) as e:
+                logger.warning(f"Attempt {attempt + 1} failed to delete {repo_path}: {str(e)}")
+                time.sleep(2)
+        logger.error(f"Failed to delete {repo_path} after retries")
+
     def store_in_faiss(self, metadata: Dict):
         import numpy as np
         from faiss import write_index, IndexFlatL2
 
         if not metadata["files"]:
-            print(f"No files to store in FAISS for {metadata['name']}")
+            logger.info(f"No files to store in FAISS for {metadata['name']}")
             return
         embeddings = np.random.rand(len(metadata["files"]), 768).astype(np.float32)
         index = IndexFlatL2(768)
@@ -1,27 +1,56 @@
 # ai_agents/agents/report_generator.py
-# ai_agents/agents/report_generator.py
-from groq import Groq
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
-import os
-from typing import Dict
+from jinja2 import Environment, FileSystemLoader, Template
+from functools import lru_cache
+from typing import Dict, Optional
 from dotenv import load_dotenv
 import logging
 
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.github_api import normalize_repo_url
+from ai_agents.utils.metrics import span
+from ai_agents.utils.pipeline import mark_degraded
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def report_template(templates_dir: str = "templates") -> Template:
+    """The report template, loaded and compiled once per process"""
+    # Templates ship with the code, so skip the per-render mtime check
+    env = Environment(loader=FileSystemLoader(templates_dir), auto_reload=False)
+    return env.get_template("report_template.html")
+
 class ReportGenerator:
-    def __init__(self):
-        self.env = Environment(loader=FileSystemLoader('templates'))
-        os.makedirs("static", exist_ok=True)
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        if not groq_api_key:
-            raise ValueError("GROQ_API_KEY environment variable is required")
-        self.client = Groq(api_key=groq_api_key)
-        self.wkhtmltopdf_path = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        registry = registry or get_registry()
+        self.llm = registry.llm_gateway
+        self.store = registry.report_store
+
+    @staticmethod
+    def report_url(report_id: str) -> str:
+        return f"{PipelineConfig.REPORT_BASE_URL.rstrip('/')}/reports/{report_id}"
+
+    def failed_report(self, report_id: Optional[str] = None) -> str:
+        """Store a failure notice under `report_id` (a new id by default) and return its URL"""
+        report_id = report_id or self.store.report_id(None, None, PipelineConfig.PIPELINE_VERSION)
+        try:
+            self.store.save(report_id, "Report generation failed. Please try again.")
+        except Exception as store_error:
+            logger.error(f"Error storing report {report_id}: {str(store_error)}")
+        return self.report_url(report_id)
+
+    def generate_report(self, analysis: Dict, report_id: Optional[str] = None) -> str:
+        """Store the report under `report_id` (by default one per repository commit) and return its URL.
 
-    def generate_report(self, analysis: Dict) -> str:
+        The HTML is written now; the PDF is queued for background conversion
+        and otherwise rendered when first requested.
+        """
+        metadata = analysis.get("metadata", {})
+        if report_id is None:
+            repo_url = metadata.get("url")
+            report_id = self.store.report_id(normalize_repo_url(repo_url) if repo_url else None,
+                                             metadata.get("commit_hash"), PipelineConfig.PIPELINE_VERSION)
         try:
             # Extract key details for LLM prompt
             analysis_summary = {
@@ -50,12 +79,12 @@ class ReportGenerator:
                 f"If originality is high, explain the project's unique strengths. Write in a professional, constructive tone."
             )
             
-            response = self.client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                max_tokens=300
-            )
-            report_text = response.choices[0].message.content.strip()
+            with span("llm_report"):
+                report_text = self.llm.complete(
+                    messages=[{"role": "user", "content": prompt}],
+                    model="llama-3.3-70b-versatile",
+                    max_tokens=300
+                ).strip()
 
             # Get top similar projects
             similar_projects = []
@@ -74,35 +103,24 @@ class ReportGenerator:
             similar_projects = similar_projects[:5]
             
             # Render with more detailed data
-            template = self.env.get_template('report_template.html')
-            html = template.render(
-                report=report_text,
-                project_name=analysis.get("metadata", {}).get("name", "Unknown"),
-                originality_score=f"{analysis.get('originality', {}).get('originality_score', 0.0):.2f}",
-                verdict=analysis.get("originality", {}).get("verdict", "Unknown"),
-                idea_summary=analysis.get("idea_summary", "No summary available"),
-                similar_projects=", ".join(similar_projects) or "None found",
-                code_similarity=f"{analysis.get('code_similarity', {}).get('similarity_score', 0.0):.2f}",
-                contrib_credibility=f"{analysis.get('contribution_credibility', {}).get('credibility_score', 0.0):.2f}"
-            )
-            pdf_path = os.path.join("static", "report.pdf")
-
-            try:
-                config = pdfkit.configuration(wkhtmltopdf=self.wkhtmltopdf_path)
-                pdfkit.from_string(html, pdf_path, configuration=config)
-                logger.info(f"Generated PDF at {pdf_path}")
-                return "http://localhost:8000/static/report.pdf"
-            except Exception as e:
-                logger.error(f"Error generating PDF: {str(e)}")
-                # Fallback to text file if PDF generation fails
-                text_path = os.path.join("static", "report.txt")
-                with open(text_path, "w", encoding="utf-8") as f:
-                    f.write(report_text)
-                return "http://localhost:8000/static/report.txt"
+            with span("report_render"):
+                html = report_template().render(
+                    report=report_text,
+                    project_name=analysis.get("metadata", {}).get("name", "Unknown"),
+                    originality_score=f"{analysis.get('originality', {}).get('originality_score', 0.0):.2f}",
+                    verdict=analysis.get("originality", {}).get("verdict", "Unknown"),
+                    idea_summary=analysis.get("idea_summary", "No summary available"),
+                    similar_projects=", ".join(similar_projects) or "None found",
+                    code_similarity=f"{analysis.get('code_similarity', {}).get('similarity_score', 0.0):.2f}",
+                    contrib_credibility=f"{analysis.get('contribution_credibility', {}).get('credibility_score', 0.0):.2f}"
+                )
+            self.store.save(report_id, report_text, html)
+            # Convert ahead of the first download while the PDF queue has room
+            self.store.request_pdf(report_id, background=True)
+            logger.info(f"Stored report {report_id}")
+            return self.report_url(report_id)
                 
         except Exception as e:
             logger.error(f"Error generating report: {str(e)}")
-            text_path = os.path.join("static", "report.txt")
-            with open(text_path, "w", encoding="utf-8") as f:
-                f.write("Report generation failed. Please try again.")
-            return "http://localhost:8000/static/report.txt"
\ No newline at end of file
+            mark_degraded("report generation failed")
+            return self.failed_report(report_id)
@@ -0,0 +1,359 @@
+# ai_agents/models/ann_index.py
+import faiss
+import json
+import math
+import numpy as np
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.utils.metrics import FAISS_VECTORS_SEARCHED
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("flat", "hnsw", "ivfpq")
+
+def choose_tier(count: int, hnsw_min: int, ivfpq_min: int) -> str:
+    """Exact search while it is cheap, a graph index next, compressed IVF-PQ for the largest corpora"""
+    if count >= ivfpq_min:
+        return "ivfpq"
+    if count >= hnsw_min:
+        return "hnsw"
+    return "flat"
+
+def configured_options() -> Dict:
+    """AnnIndex keyword arguments from PipelineConfig"""
+    return {
+        "hnsw_min": PipelineConfig.ANN_HNSW_MIN_VECTORS,
+        "ivfpq_min": PipelineConfig.ANN_IVFPQ_MIN_VECTORS,
+        "hnsw_m": PipelineConfig.ANN_HNSW_M,
+        "ef_search": PipelineConfig.ANN_EF_SEARCH,
+        "nprobe": PipelineConfig.ANN_NPROBE,
+        "refine_factor": PipelineConfig.ANN_REFINE_FACTOR,
+        "rebuild_dead_fraction": PipelineConfig.ANN_REBUILD_DEAD_FRACTION,
+        "snapshot_rows": PipelineConfig.ANN_SNAPSHOT_ROWS
+    }
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Float32 copy with unit rows, so inner product is cosine similarity"""
+    vectors = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+class AnnIndex:
+    """Persistent cosine-similarity index over id'd vectors that picks its FAISS index type by size.
+
+    Unit-normalized vectors are also appended to a raw store
+    (`{name}.{generation}.vectors` and `.ids`), read through mmap. That store
+    is what rebuilds are made from: when the corpus crosses into the next
+    tier, when IVF-PQ has doubled since it was trained, or when removed
+    vectors pass `rebuild_dead_fraction`. HNSW cannot delete, so removals are
+    tombstones filtered out at search time until the next rebuild, whatever
+    the tier. IVF-PQ candidates are re-ranked with the exact vectors. A
+    rebuild writes a new generation and switches to it with one atomic
+    rename. Ids must be added in ascending order.
+
+    Adds only append to the raw store. The FAISS index on disk is a snapshot
+    of a prefix of it; later rows sit in an in-memory exact `delta` index,
+    rebuilt from the raw store on open and searched alongside. The delta is
+    folded into the snapshot once it holds `snapshot_rows` vectors, so an
+    add never pays for rewriting the whole index.
+    """
+    def __init__(self, index_dir: str, name: str, dimension: int, hnsw_min: int = 50_000,
+                 ivfpq_min: int = 1_000_000, hnsw_m: int = 32, ef_search: int = 128, nprobe: int = 16,
+                 refine_factor: int = 10, rebuild_dead_fraction: float = 0.25, snapshot_rows: int = 20_000,
+                 label: str = "corpus"):
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_dir = index_dir
+        self.name = name
+        self.dimension = dimension
+        self.hnsw_min = hnsw_min
+        self.ivfpq_min = ivfpq_min
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.nprobe = nprobe
+        self.refine_factor = refine_factor
+        self.rebuild_dead_fraction = rebuild_dead_fraction
+        self.snapshot_rows = snapshot_rows
+        self.label = label
+        self._lock = threading.RLock()
+        self._state_file = os.path.join(index_dir, f"{name}.generation")
+        state = self._read_state()
+        self.generation = state["generation"]
+        self.built = state["built"]
+        self._open()
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self._state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"generation": 0, "built": 0}
+
+    def _write_state(self, generation: int, built: int):
+        tmp_file = f"{self._state_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "built": built}, f)
+        os.replace(tmp_file, self._state_file)
+
+    def _path(self, generation: int, kind: str) -> str:
+        return os.path.join(self.index_dir, f"{self.name}.{generation}.{kind}")
+
+    def _open(self):
+        for kind in ("ids", "vectors", "dead"):
+            open(self._path(self.generation, kind), "ab").close()
+        # Vectors are written before ids, so a torn append is cut back to whole rows of both
+        rows = min(os.path.getsize(self._path(self.generation, "ids")) // 8,
+                   os.path.getsize(self._path(self.generation, "vectors")) // (4 * self.dimension))
+        for kind, row_bytes in (("ids", 8), ("vectors", 4 * self.dimension)):
+            with open(self._path(self.generation, kind), "r+b") as f:
+                f.truncate(rows * row_bytes)
+        self._map_raw()
+        dead = np.fromfile(self._path(self.generation, "dead"), dtype=np.int64)
+        self.dead = np.unique(dead[np.isin(dead, self.ids)]) if dead.size else dead
+        self.index = self._read_index()
+        self.delta = self._new_index("flat")
+        if self.index is None:
+            # Never snapshotted: every row is replayed into the delta below
+            self.index = self._new_index(choose_tier(self.ntotal, self.hnsw_min, self.ivfpq_min), self.ntotal)
+        if self.index.ntotal > len(self.ids):
+            logger.warning(f"{self.name}: index is ahead of its raw vectors; rebuilding")
+            self.rebuild()
+            return
+        # Rows appended since the snapshot live in the delta
+        start = self.index.ntotal
+        for chunk_start in range(start, len(self.ids), 65536):
+            rows = slice(chunk_start, min(chunk_start + 65536, len(self.ids)))
+            self.delta.add_with_ids(np.ascontiguousarray(self.vectors[rows]), np.ascontiguousarray(self.ids[rows]))
+        # An IVF-PQ index cannot be searched until the snapshot trains it
+        if self.delta.ntotal >= self.snapshot_rows or not self.index.is_trained:
+            self._snapshot()
+
+    def _map_raw(self):
+        rows = os.path.getsize(self._path(self.generation, "ids")) // 8
+        if rows:
+            self.ids = np.memmap(self._path(self.generation, "ids"), dtype=np.int64, mode="r", shape=(rows,))
+            self.vectors = np.memmap(self._path(self.generation, "vectors"), dtype=np.float32, mode="r",
+                                     shape=(rows, self.dimension))
+        else:
+            self.ids = np.empty(0, dtype=np.int64)
+            self.vectors = np.empty((0, self.dimension), dtype=np.float32)
+
+    def _read_index(self) -> Optional[faiss.Index]:
+        path = self._path(self.generation, "faiss")
+        if not os.path.exists(path):
+            return None
+        try:
+            # Flat and IVF codes stay on disk until a write copies them into memory
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except Exception:
+            try:
+                return faiss.read_index(path)
+            except Exception as e:
+                logger.error(f"Failed to load {path}: {str(e)}")
+                return None
+
+    def _snapshot(self):
+        """Fold the delta into the index and write it out as the generation's snapshot"""
+        path = self._path(self.generation, "faiss")
+        index = self.index
+        if self.tier == "ivfpq" and os.path.exists(path):
+            # mmap'd IVF lists are read-only; flat and HNSW copy mmap'd data on write
+            index = faiss.read_index(path)
+        self._train_if_needed(index)
+        if self.delta.ntotal:
+            inner = faiss.downcast_index(self.delta.index)
+            index.add_with_ids(inner.reconstruct_n(0, self.delta.ntotal), faiss.vector_to_array(self.delta.id_map))
+        faiss.write_index(index, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        self.index = self._read_index() or index
+        self.delta = self._new_index("flat")
+        logger.info(f"{self.name}: snapshot of {self.index.ntotal} vectors written")
+
+    def _new_index(self, tier: str, count: int = 0) -> faiss.Index:
+        d = self.dimension
+        if tier == "hnsw":
+            inner = faiss.IndexHNSWFlat(d, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            inner.hnsw.efConstruction = max(40, 4 * self.hnsw_m)
+        elif tier == "ivfpq":
+            # ~4 sqrt(n) lists, each trained on at least 39 points; 8 dimensions per subquantizer
+            nlist = int(min(65536, max(16, 4 * math.sqrt(count)), max(1, count // 39)))
+            subquantizers = max(1, d // 8)
+            while d % subquantizers:
+                subquantizers -= 1
+            inner = faiss.IndexIVFPQ(faiss.IndexFlatIP(d), d, nlist, subquantizers, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            inner = faiss.IndexFlatIP(d)
+        return faiss.IndexIDMap2(inner)
+
+    def _train_if_needed(self, index: faiss.Index, live_rows: Optional[np.ndarray] = None):
+        if index.is_trained:
+            return
+        rows = live_rows if live_rows is not None else np.arange(len(self.ids))
+        inner = faiss.downcast_index(index.index)
+        sample_size = min(len(rows), max(256 * 39, inner.nlist * 64), 200_000)
+        sample = np.sort(np.random.default_rng(0).choice(rows, size=sample_size, replace=False))
+        index.train(np.ascontiguousarray(self.vectors[sample]))
+
+    @property
+    def tier(self) -> str:
+        inner = faiss.downcast_index(self.index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivfpq"
+        return "flat"
+
+    @property
+    def ntotal(self) -> int:
+        """Live vectors, i.e. excluding tombstones"""
+        return len(self.ids) - len(self.dead)
+
+    @property
+    def next_id(self) -> int:
+        return int(self.ids[-1]) + 1 if len(self.ids) else 0
+
+    def live_ids(self) -> np.ndarray:
+        with self._lock:
+            return np.asarray(self.ids[~np.isin(self.ids, self.dead)])
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray):
+        ids = np.fromiter(ids, dtype=np.int64)
+        if not ids.size:
+            return
+        vectors = normalize(vectors)
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(f"{self.name}: expected {len(ids)} vectors of dimension {self.dimension}, got {vectors.shape}")
+        with self._lock:
+            if ids[0] < self.next_id or np.any(np.diff(ids) <= 0):
+                raise ValueError(f"{self.name}: ids must be ascending and at least {self.next_id}")
+            self.ids = self.vectors = None
+            for kind, data in (("vectors", vectors), ("ids", ids)):
+                with open(self._path(self.generation, kind), "ab") as f:
+                    f.write(data.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._map_raw()
+            target = choose_tier(self.ntotal, self.hnsw_min, self.ivfpq_min)
+            if TIERS.index(target) > TIERS.index(self.tier) or (target == "ivfpq" and self.ntotal > 2 * self.built):
+                self.rebuild()
+                return
+            self.delta.add_with_ids(vectors, ids)
+            if self.delta.ntotal >= self.snapshot_rows:
+                self._snapshot()
+
+    def remove_ids(self, ids: Iterable[int]):
+        ids = np.fromiter(ids, dtype=np.int64)
+        with self._lock:
+            ids = np.setdiff1d(ids[np.isin(ids, self.ids)], self.dead)
+            if not ids.size:
+                return
+            with open(self._path(self.generation, "dead"), "ab") as f:
+                f.write(ids.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self.dead = np.union1d(self.dead, ids)
+            if len(self.dead) > self.rebuild_dead_fraction * len(self.ids):
+                self.rebuild()
+
+    def rebuild(self):
+        """Drop tombstones, re-pick the tier for the live count and (re)train, into a new generation"""
+        with self._lock:
+            live_rows = np.flatnonzero(~np.isin(self.ids, self.dead))
+            generation = self.generation + 1
+            tier = choose_tier(len(live_rows), self.hnsw_min, self.ivfpq_min)
+            chunk = 65536
+            with open(self._path(generation, "vectors"), "wb") as vectors, open(self._path(generation, "ids"), "wb") as ids:
+                for start in range(0, len(live_rows), chunk):
+                    rows = live_rows[start:start + chunk]
+                    vectors.write(np.ascontiguousarray(self.vectors[rows]).tobytes())
+                    ids.write(np.ascontiguousarray(self.ids[rows]).tobytes())
+                for f in (vectors, ids):
+                    f.flush()
+                    os.fsync(f.fileno())
+            open(self._path(generation, "dead"), "wb").close()
+            index = self._new_index(tier, len(live_rows))
+            self._train_if_needed(index, live_rows)
+            for start in range(0, len(live_rows), chunk):
+                rows = live_rows[start:start + chunk]
+                index.add_with_ids(np.ascontiguousarray(self.vectors[rows]), np.ascontiguousarray(self.ids[rows]))
+            faiss.write_index(index, self._path(generation, "faiss"))
+            self._write_state(generation, len(live_rows))
+            old_generation = self.generation
+            self.generation, self.built = generation, len(live_rows)
+            self.ids = self.vectors = self.index = None
+            self._map_raw()
+            self.dead = np.empty(0, dtype=np.int64)
+            self.index = self._read_index() or index
+            self.delta = self._new_index("flat")
+            for kind in ("ids", "vectors", "dead", "faiss"):
+                path = self._path(old_generation, kind)
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"Rebuilt {self.name} as {tier} with {len(live_rows)} vectors")
+
+    def search(self, queries: np.ndarray, k: int = 1, exclude_ids: Optional[np.ndarray] = None,
+               ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k cosine similarities and ids per query, skipping tombstones and `exclude_ids`.
+
+        Missing results are (-inf, -1). ef_search and nprobe override the
+        configured HNSW and IVF search breadth for this call.
+        """
+        queries = normalize(queries)
+        nq = len(queries)
+        empty = (np.full((nq, k), -np.inf, dtype=np.float32), np.full((nq, k), -1, dtype=np.int64))
+        with self._lock:
+            blocked = self.dead
+            if exclude_ids is not None and len(exclude_ids):
+                blocked = np.union1d(blocked, np.asarray(exclude_ids, dtype=np.int64))
+            searchable = len(self.ids) - len(blocked)
+            if searchable <= 0 or nq == 0:
+                return empty
+            # Keep the selectors referenced until the search returns
+            batch_selector = faiss.IDSelectorBatch(blocked) if blocked.size else None
+            selector = faiss.IDSelectorNot(batch_selector) if batch_selector is not None else None
+            tier = self.tier
+            fetch = k
+            if tier == "hnsw":
+                ef = max(ef_search or self.ef_search, k)
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef)
+                compared = nq * ef
+            elif tier == "ivfpq":
+                inner = faiss.downcast_index(self.index.index)
+                probes = min(nprobe or self.nprobe, inner.nlist)
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=probes)
+                fetch = k * self.refine_factor
+                compared = nq * (searchable * probes // inner.nlist + fetch)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+                compared = nq * searchable
+            scores, ids = self.index.search(queries, fetch, params=params)
+            if tier == "ivfpq":
+                scores, ids = self._rerank(queries, ids, k)
+            if self.delta.ntotal:
+                # Exact scores from both, so the best k of the union are the answer
+                delta_scores, delta_ids = self.delta.search(queries, k, params=faiss.SearchParameters(sel=selector))
+                compared += nq * self.delta.ntotal
+                scores = np.hstack([scores[:, :k], delta_scores])
+                ids = np.hstack([ids[:, :k], delta_ids])
+                scores[ids < 0] = -np.inf
+                order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+                scores = np.take_along_axis(scores, order, axis=1)
+                ids = np.take_along_axis(ids, order, axis=1)
+            FAISS_VECTORS_SEARCHED.labels(index=self.label).inc(compared)
+            scores[ids < 0] = -np.inf
+        return scores, ids
+
+    def _rerank(self, queries: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Replace compressed IVF-PQ scores with exact cosine from the raw vectors and keep the best k"""
+        valid = ids >= 0
+        rows = np.clip(np.searchsorted(self.ids, np.where(valid, ids, 0)), 0, len(self.ids) - 1)
+        candidates = np.asarray(self.vectors[rows.ravel()]).reshape(ids.shape + (self.dimension,))
+        exact = np.einsum("nkd,nd->nk", candidates, queries)
+        exact[~valid] = -np.inf
+        order = np.argsort(-exact, axis=1)[:, :k]
+        scores = np.take_along_axis(exact, order, axis=1).astype(np.float32)
+        ids = np.where(np.isfinite(scores), np.take_along_axis(ids, order, axis=1), -1)
+        return scores, ids
@@ -0,0 +1,176 @@
+# ai_agents/models/block_store.py
+import mmap
+import numpy as np
+import os
+import threading
+from typing import Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One record per block id: where its UTF-8 text starts in the contents blob and how long it is
+RECORD = np.dtype([("offset", "<u8"), ("length", "<u4")])
+
+class BlockStore:
+    """Append-only store of block texts addressed by corpus id, read through mmap.
+
+    `{name}.{generation}.idx` is a table of fixed-width records, record i
+    describing block id i, and `{name}.{generation}.bin` holds the texts.
+    Looking a block up is one record read and one slice, whatever the corpus
+    size. Appends write the texts before the records that point at them, and
+    a torn trailing record is dropped on open, so a crash never exposes a
+    partial block. Dead texts are reclaimed by compact() into a new generation.
+    """
+    def __init__(self, store_dir: str, name: str = "corpus_blocks"):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.name = name
+        self._lock = threading.RLock()
+        self._pointer_file = os.path.join(store_dir, f"{name}.generation")
+        self.generation = self._read_generation()
+        self._index_map: Optional[mmap.mmap] = None
+        self._blob_map: Optional[mmap.mmap] = None
+        self.records = np.empty(0, dtype=RECORD)
+        for path in (self._index_path(self.generation), self._blob_path(self.generation)):
+            open(path, "ab").close()
+        self._recover()
+        self._remap()
+
+    def _read_generation(self) -> int:
+        try:
+            with open(self._pointer_file, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _index_path(self, generation: int) -> str:
+        return os.path.join(self.store_dir, f"{self.name}.{generation}.idx")
+
+    def _blob_path(self, generation: int) -> str:
+        return os.path.join(self.store_dir, f"{self.name}.{generation}.bin")
+
+    def _recover(self):
+        """Drop records that a crash left torn or pointing past the end of the blob"""
+        index_path = self._index_path(self.generation)
+        blob_size = os.path.getsize(self._blob_path(self.generation))
+        count = os.path.getsize(index_path) // RECORD.itemsize
+        records = np.fromfile(index_path, dtype=RECORD, count=count)
+        ends = records["offset"] + records["length"]
+        valid = count if not count or ends.max() <= blob_size else int(np.argmax(ends > blob_size))
+        if valid * RECORD.itemsize != os.path.getsize(index_path):
+            logger.warning(f"Block store {index_path}: dropping {count - valid} incomplete records")
+            with open(index_path, "r+b") as f:
+                f.truncate(valid * RECORD.itemsize)
+
+    def _close_maps(self):
+        self.records = np.empty(0, dtype=RECORD)
+        for mapped in (self._index_map, self._blob_map):
+            if mapped is not None:
+                mapped.close()
+        self._index_map = self._blob_map = None
+
+    def _remap(self):
+        self._close_maps()
+        index_path = self._index_path(self.generation)
+        blob_path = self._blob_path(self.generation)
+        # mmap cannot map empty files
+        if os.path.getsize(index_path):
+            with open(index_path, "rb") as f:
+                self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self._index_map, dtype=RECORD)
+        if os.path.getsize(blob_path):
+            with open(blob_path, "rb") as f:
+                self._blob_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def count(self) -> int:
+        """Number of id slots, i.e. the next id append() will assign"""
+        return len(self.records)
+
+    def append(self, ids: Iterable[int], texts: Iterable[str]):
+        """Store texts under ascending ids not below `count`; skipped ids become empty slots"""
+        ids = [int(i) for i in ids]
+        encoded = [text.encode("utf-8") for text in texts]
+        if not ids:
+            return
+        with self._lock:
+            if ids[0] < self.count or any(b <= a for a, b in zip(ids, ids[1:])):
+                raise ValueError("Block ids must be ascending and not below the store's count")
+            records = np.zeros(ids[-1] + 1 - self.count, dtype=RECORD)
+            blob_path = self._blob_path(self.generation)
+            with open(blob_path, "ab") as f:
+                offset = f.tell()
+                for block_id, data in zip(ids, encoded):
+                    records[block_id - self.count] = (offset, len(data))
+                    f.write(data)
+                    offset += len(data)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._index_path(self.generation), "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._remap()
+
+    def get(self, block_id: int) -> Optional[str]:
+        with self._lock:
+            if not 0 <= block_id < self.count:
+                return None
+            offset, length = self.records[block_id]
+            # Skipped and compacted-away ids are zero-length; corpus blocks are never empty
+            if not length:
+                return None
+            return self._blob_map[int(offset):int(offset) + int(length)].decode("utf-8")
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, str]:
+        ids = np.fromiter(ids, dtype=np.int64)
+        with self._lock:
+            ids = ids[(ids >= 0) & (ids < self.count)]
+            records = self.records[ids]
+            blob = self._blob_map
+            return {
+                block_id: blob[offset:offset + length].decode("utf-8")
+                for block_id, offset, length in zip(ids.tolist(), records["offset"].tolist(), records["length"].tolist())
+                if length
+            }
+
+    def live_bytes(self, live_ids: Iterable[int]) -> int:
+        ids = np.fromiter((i for i in live_ids if 0 <= i < self.count), dtype=np.int64)
+        with self._lock:
+            return int(self.records["length"][ids].sum()) if ids.size else 0
+
+    def blob_bytes(self) -> int:
+        return os.path.getsize(self._blob_path(self.generation))
+
+    def compact(self, live_ids: Iterable[int]):
+        """Rewrite only the texts of `live_ids` into the next generation; other ids become empty.
+
+        The generation pointer is switched with an atomic rename after both
+        new files are on disk, so readers see either the old or the new store.
+        """
+        with self._lock:
+            live = np.zeros(self.count, dtype=bool)
+            ids = np.fromiter((i for i in live_ids if 0 <= i < self.count), dtype=np.int64)
+            live[ids] = True
+            generation = self.generation + 1
+            records = np.zeros(self.count, dtype=RECORD)
+            with open(self._blob_path(generation), "wb") as dst:
+                for block_id in np.flatnonzero(live):
+                    offset, length = self.records[block_id]
+                    records[block_id] = (dst.tell(), length)
+                    dst.write(self._blob_map[int(offset):int(offset) + int(length)])
+                dst.flush()
+                os.fsync(dst.fileno())
+            with open(self._index_path(generation), "wb") as dst:
+                dst.write(records.tobytes())
+                dst.flush()
+                os.fsync(dst.fileno())
+            tmp_pointer = f"{self._pointer_file}.tmp"
+            with open(tmp_pointer, "w", encoding="utf-8") as f:
+                f.write(str(generation))
+            os.replace(tmp_pointer, self._pointer_file)
+            old_generation, self.generation = self.generation, generation
+            self._remap()
+            for path in (self._index_path(old_generation), self._blob_path(old_generation)):
+                os.remove(path)
+        logger.info(f"Compacted block store to {self.blob_bytes()} bytes")
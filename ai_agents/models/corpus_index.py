@@ -0,0 +1,205 @@
+# ai_agents/models/corpus_index.py
+import faiss
+from itertools import groupby
+import numpy as np
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from ai_agents.models.ann_index import AnnIndex, configured_options
+from ai_agents.models.block_store import BlockStore
+from ai_agents.models.fingerprint_index import FingerprintIndex
+
+logger = logging.getLogger(__name__)
+
+class CorpusIndex:
+    """Persistent vector index over the code blocks of every analyzed repository.
+
+    Vectors live in an AnnIndex (cosine similarity; flat, HNSW or IVF-PQ by
+    corpus size) and each id maps to a row of the `blocks` table holding
+    (repo, commit, file, line span); the block text is read by id from a
+    memory-mapped BlockStore. A repository keeps only the blocks of its most
+    recently analyzed commit. The same ids key a winnowing fingerprint index
+    used to find near-verbatim copies.
+    """
+    def __init__(self, index_path: str = "faiss_index", dimension: int = 768,
+                 fingerprint_k: int = 25, fingerprint_window: int = 10, ann_options: Optional[Dict] = None):
+        self.index_path = index_path
+        self.dimension = dimension
+        os.makedirs(index_path, exist_ok=True)
+        # Flat L2 index of earlier versions, migrated on first open
+        self.index_file = os.path.join(index_path, "corpus_code.faiss")
+        self.meta_file = os.path.join(index_path, "corpus_code.sqlite")
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.meta_file, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            "id INTEGER PRIMARY KEY, repo TEXT NOT NULL, commit_hash TEXT, file TEXT, "
+            "start_line INTEGER, end_line INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS blocks_repo ON blocks (repo)")
+        self._db.commit()
+        self.store = BlockStore(index_path)
+        self._migrate_texts()
+        self.index = AnnIndex(index_path, "corpus_vectors", dimension, label="corpus",
+                              **(ann_options if ann_options is not None else configured_options()))
+        self._migrate_flat_index()
+        self.fingerprints = FingerprintIndex(
+            os.path.join(index_path, "corpus_fingerprints.sqlite"), k=fingerprint_k, window=fingerprint_window
+        )
+        self._backfill_fingerprints()
+
+    def _migrate_texts(self):
+        """Move block texts out of the SQLite `block` column of older corpora into the block store"""
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(blocks)")]
+        if "block" not in columns:
+            return
+        rows = self._db.execute("SELECT id, block FROM blocks WHERE id >= ? ORDER BY id", (self.store.count,)).fetchall()
+        self.store.append([row[0] for row in rows], [row[1] for row in rows])
+        # Rebuild the table without the column in one transaction
+        self._db.execute("BEGIN")
+        self._db.execute(
+            "CREATE TABLE blocks_new ("
+            "id INTEGER PRIMARY KEY, repo TEXT NOT NULL, commit_hash TEXT, file TEXT, "
+            "start_line INTEGER, end_line INTEGER)"
+        )
+        self._db.execute(
+            "INSERT INTO blocks_new SELECT id, repo, commit_hash, file, start_line, end_line FROM blocks"
+        )
+        self._db.execute("DROP TABLE blocks")
+        self._db.execute("ALTER TABLE blocks_new RENAME TO blocks")
+        self._db.execute("CREATE INDEX IF NOT EXISTS blocks_repo ON blocks (repo)")
+        self._db.commit()
+        logger.info(f"Moved {len(rows)} corpus block texts into the block store")
+
+    def _backfill_fingerprints(self):
+        """Fingerprint corpora stored before the fingerprint index existed"""
+        if self.fingerprints.count() or not self.index.ntotal:
+            return
+        rows = self._db.execute("SELECT id, repo FROM blocks ORDER BY repo").fetchall()
+        for repo, repo_rows in groupby(rows, key=lambda row: row[1]):
+            ids = [row[0] for row in repo_rows]
+            texts = self.store.get_many(ids)
+            self.fingerprints.add(repo, list(texts), list(texts.values()))
+        logger.info(f"Fingerprinted {len(rows)} existing corpus blocks")
+
+    def _migrate_flat_index(self):
+        """Carry the vectors of an older flat L2 `corpus_code.faiss` over into the ANN index"""
+        if not os.path.exists(self.index_file):
+            return
+        if not self.index.ntotal:
+            try:
+                old_index = faiss.read_index(self.index_file)
+                ids = faiss.vector_to_array(old_index.id_map).astype(np.int64)
+                if ids.size:
+                    vectors = faiss.downcast_index(old_index.index).reconstruct_n(0, old_index.ntotal)
+                    order = np.argsort(ids)
+                    self.index.add(ids[order], vectors[order])
+                logger.info(f"Migrated {ids.size} corpus vectors from {self.index_file}")
+            except Exception as e:
+                logger.error(f"Failed to migrate corpus index {self.index_file}: {str(e)}")
+                return
+        os.remove(self.index_file)
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def repo_ids(self, repo: str) -> np.ndarray:
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM blocks WHERE repo = ?", (repo,)).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def search(self, embeddings: np.ndarray, k: int = 1, exclude_repo: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine similarities and ids of the k nearest blocks per query, skipping those of `exclude_repo`"""
+        with self._lock:
+            excluded = self.repo_ids(exclude_repo) if exclude_repo else None
+            return self.index.search(embeddings, k, exclude_ids=excluded)
+
+    def match_fingerprints(self, texts: List[str], exclude_repo: Optional[str] = None, min_prints: int = 4,
+                           max_block_frequency: int = 50) -> List[Optional[Dict]]:
+        """Closest stored block by shared fingerprints for each text; see FingerprintIndex.match"""
+        return self.fingerprints.match(texts, exclude_repo=exclude_repo, min_prints=min_prints,
+                                       max_block_frequency=max_block_frequency)
+
+    def get_blocks(self, ids: List[int]) -> Dict[int, Dict]:
+        ids = [int(i) for i in ids if i >= 0]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, repo, commit_hash, file, start_line, end_line FROM blocks WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+            texts = self.store.get_many(row[0] for row in rows)
+        return {
+            row[0]: {
+                "repo": row[1], "commit": row[2], "file": row[3],
+                "start_line": row[4], "end_line": row[5], "block": texts[row[0]]
+            } for row in rows if row[0] in texts
+        }
+
+    def _compact_store(self):
+        """Reclaim the texts of replaced blocks once they are most of the blob"""
+        live_ids = [row[0] for row in self._db.execute("SELECT id FROM blocks")]
+        live_bytes = self.store.live_bytes(live_ids)
+        if self.store.blob_bytes() > 2 * max(live_bytes, 1 << 20):
+            self.store.compact(live_ids)
+
+    def add_blocks(self, repo: str, commit_hash: str, code_blocks: List[Dict],
+                   unchanged_files: Optional[Set[str]] = None, base_commit: Optional[str] = None) -> int:
+        """Replace `repo`'s blocks in the corpus with `code_blocks` from `commit_hash`.
+
+        With `unchanged_files`, and `repo` stored at `base_commit`, only the
+        blocks of other files are removed and re-added; the rest are kept and
+        moved to `commit_hash`. Otherwise every block of `repo` is replaced.
+        """
+        valid_blocks = [
+            b for b in code_blocks
+            if isinstance(b.get("embedding"), np.ndarray) and b["embedding"].size > 0
+        ]
+        with self._lock:
+            rows = self._db.execute("SELECT id, commit_hash, file FROM blocks WHERE repo = ?", (repo,)).fetchall()
+            incremental = (
+                unchanged_files is not None and base_commit is not None
+                and bool(rows) and all(row[1] == base_commit for row in rows)
+            )
+            if incremental:
+                stale_ids = np.array([row[0] for row in rows if row[2] not in unchanged_files], dtype=np.int64)
+                new_blocks = [b for b in valid_blocks if b.get("file") not in unchanged_files]
+            else:
+                stale_ids = np.array([row[0] for row in rows], dtype=np.int64)
+                new_blocks = valid_blocks
+            if stale_ids.size:
+                self.index.remove_ids(stale_ids)
+                if incremental:
+                    self._db.executemany("DELETE FROM blocks WHERE id = ?", [(int(i),) for i in stale_ids])
+                    self.fingerprints.remove_ids(stale_ids.tolist())
+                else:
+                    self._db.execute("DELETE FROM blocks WHERE repo = ?", (repo,))
+                    self.fingerprints.remove_repo(repo)
+            self._db.execute("UPDATE blocks SET commit_hash = ? WHERE repo = ?", (commit_hash, repo))
+            if new_blocks:
+                # Ids are never reused; texts are durable before any row points at them
+                next_id = max(self.store.count, (self._db.execute("SELECT MAX(id) FROM blocks").fetchone()[0] or 0) + 1)
+                ids = np.arange(next_id, next_id + len(new_blocks), dtype=np.int64)
+                self.store.append(ids.tolist(), [b["block"] for b in new_blocks])
+                self.index.add(ids, np.vstack([b["embedding"] for b in new_blocks]))
+                self._db.executemany(
+                    "INSERT INTO blocks (id, repo, commit_hash, file, start_line, end_line) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (int(i), repo, commit_hash, b.get("file"), b.get("start_line"), b.get("end_line"))
+                        for i, b in zip(ids, new_blocks)
+                    ]
+                )
+                self.fingerprints.add(repo, ids.tolist(), [b["block"] for b in new_blocks])
+            self._db.commit()
+            self._compact_store()
+        logger.info(
+            f"Corpus index: replaced {stale_ids.size} blocks of {repo} with {len(new_blocks)}"
+            f"{' (incremental)' if incremental else ''} (total {self.index.ntotal})"
+        )
+        return len(valid_blocks)
@@ -0,0 +1,137 @@
+# ai_agents/models/embedding_backend.py
+import copy
+import hashlib
+import numpy as np
+import os
+import threading
+import torch
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average the hidden states of the real (unpadded) tokens of each sequence"""
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1, None)
+
+class EmbeddingBackend:
+    """Runs the code model on a padded batch and returns one mean-pooled vector per row."""
+    name = "base"
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+class TorchBackend(EmbeddingBackend):
+    """The fp32 PyTorch model as loaded by the registry."""
+    name = "torch"
+
+    def __init__(self, model: torch.nn.Module, device: torch.device):
+        self.model = model
+        self.device = device
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        ids = torch.from_numpy(input_ids).to(self.device)
+        mask = torch.from_numpy(attention_mask).to(self.device)
+        with torch.no_grad():
+            hidden = self.model(input_ids=ids, attention_mask=mask).last_hidden_state
+            weights = mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * weights).sum(dim=1) / weights.sum(dim=1).clamp(min=1)
+        return pooled.cpu().numpy()
+
+class QuantizedTorchBackend(TorchBackend):
+    """Dynamic int8 quantization of every Linear layer; CPU only."""
+    name = "torch-int8"
+
+    def __init__(self, model: torch.nn.Module):
+        # Quantize a CPU copy so the fp32 model stays usable by other backends
+        quantized = torch.ao.quantization.quantize_dynamic(
+            copy.deepcopy(model).to("cpu").eval(), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        super().__init__(quantized, torch.device("cpu"))
+
+class _LastHiddenState(torch.nn.Module):
+    """Export wrapper: plain tensors in, last_hidden_state out."""
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime on CPU. The model is exported once and reused from `export_dir`.
+
+    Exports are keyed by model id and model config, so changing either
+    produces a new file instead of silently reusing a stale graph.
+    """
+    name = "onnx"
+    _export_lock = threading.Lock()
+
+    def __init__(self, model: torch.nn.Module, model_id: str, export_dir: str = "onnx_cache",
+                 threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=onnx requires the onnxruntime package") from e
+
+        self.export_path = self._export_path(model, model_id, export_dir)
+        with self._export_lock:
+            if not os.path.exists(self.export_path):
+                self._export(model, self.export_path)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.export_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def _export_path(model: torch.nn.Module, model_id: str, export_dir: str) -> str:
+        config = getattr(model, "config", None)
+        fingerprint = hashlib.sha256(
+            f"{model_id}\0{config.to_json_string() if config is not None else ''}\0{torch.__version__}".encode("utf-8")
+        ).hexdigest()[:16]
+        slug = model_id.replace("/", "--")
+        return os.path.join(export_dir, f"{slug}-{fingerprint}.onnx")
+
+    @staticmethod
+    def _export(model: torch.nn.Module, export_path: str):
+        os.makedirs(os.path.dirname(export_path) or ".", exist_ok=True)
+        logger.info(f"Exporting embedding model to {export_path}")
+        wrapper = _LastHiddenState(copy.deepcopy(model).to("cpu").eval())
+        sample_ids = torch.ones((2, 8), dtype=torch.long)
+        sample_mask = torch.ones((2, 8), dtype=torch.long)
+        tmp_path = f"{export_path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper, (sample_ids, sample_mask), tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "last_hidden_state": {0: "batch", 1: "sequence"}
+                },
+                opset_version=17,
+                dynamo=False
+            )
+        os.replace(tmp_path, export_path)
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        hidden = self.session.run(["last_hidden_state"], {
+            "input_ids": input_ids.astype(np.int64),
+            "attention_mask": attention_mask.astype(np.int64)
+        })[0]
+        return mean_pool(hidden, attention_mask)
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+def create_backend(name: str, model: torch.nn.Module, device: torch.device, model_id: str,
+                   onnx_dir: str = "onnx_cache") -> EmbeddingBackend:
+    """Build the embedding backend selected by EMBEDDING_BACKEND"""
+    if name == "torch":
+        return TorchBackend(model, device)
+    if name == "torch-int8":
+        return QuantizedTorchBackend(model)
+    if name == "onnx":
+        return OnnxBackend(model, model_id, export_dir=onnx_dir)
+    raise ValueError(f"Unknown embedding backend {name!r}; expected one of {', '.join(BACKENDS)}")
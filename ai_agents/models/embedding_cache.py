@@ -0,0 +1,166 @@
+# ai_agents/models/embedding_cache.py
+import hashlib
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent, content-addressed cache of code block embeddings.
+
+    Keys are sha256(model id + whitespace-normalized block text). Vectors are
+    appended to a flat blob file; SQLite records each key's offset, size and
+    last use. When live data exceeds `max_bytes` the least recently used
+    entries are evicted, and the blob is compacted into a new generation file
+    once it is mostly dead space.
+    """
+    def __init__(self, cache_dir: str = "embedding_cache", max_bytes: int = 1 << 30, dtype: str = "float32"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.cache_dir = cache_dir
+        self.meta_file = os.path.join(cache_dir, "embeddings.sqlite")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.meta_file, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, offset INTEGER NOT NULL, dim INTEGER NOT NULL, "
+            "nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO settings (name, value) VALUES ('generation', '0'), ('dtype', ?)", (self.dtype.name,))
+        self._db.commit()
+        stored_dtype = self._setting("dtype")
+        if stored_dtype != self.dtype.name:
+            logger.warning(f"Embedding cache holds {stored_dtype} vectors; ignoring requested {self.dtype.name}")
+            self.dtype = np.dtype(stored_dtype)
+        self.blob_file = self._blob_path(int(self._setting("generation")))
+        open(self.blob_file, "ab").close()
+
+    def _setting(self, name: str) -> str:
+        return self._db.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()[0]
+
+    def _blob_path(self, generation: int) -> str:
+        return os.path.join(self.cache_dir, f"embeddings.{generation}.bin")
+
+    @staticmethod
+    def key(text: str, model_id: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model_id}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _live_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return the cached (1, dim) float32 vectors for whichever keys are present"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+        with self._lock:
+            rows = []
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.extend(self._db.execute(
+                    f"SELECT key, offset, dim, nbytes FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+            # seek + read rather than os.pread, which Windows lacks
+            with open(self.blob_file, "rb") as f:
+                for key, offset, dim, nbytes in sorted(rows, key=lambda row: row[1]):
+                    f.seek(offset)
+                    data = f.read(nbytes)
+                    if len(data) != nbytes:
+                        continue
+                    found[key] = np.frombuffer(data, dtype=self.dtype).astype(np.float32).reshape(1, dim)
+            now = time.time()
+            self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            rows = []
+            with open(self.blob_file, "ab") as f:
+                offset = f.tell()
+                for key, embedding in items.items():
+                    data = np.ascontiguousarray(embedding, dtype=self.dtype).tobytes()
+                    f.write(data)
+                    rows.append((key, offset, int(np.asarray(embedding).size), len(data), now))
+                    offset += len(data)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, offset, dim, nbytes, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        live_bytes = self._live_bytes()
+        if live_bytes > self.max_bytes:
+            # Drop least recently used entries down to 90% of the budget
+            target = live_bytes - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, nbytes in self._db.execute("SELECT key, nbytes FROM entries ORDER BY last_used"):
+                if freed >= target:
+                    break
+                victims.append((key,))
+                freed += nbytes
+            self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+            self._db.commit()
+            self.evictions += len(victims)
+            live_bytes -= freed
+            logger.info(f"Evicted {len(victims)} cached embeddings ({freed} bytes)")
+        if os.path.getsize(self.blob_file) > 2 * max(live_bytes, 1 << 20):
+            self._compact()
+
+    def _compact(self):
+        """Copy live entries into the next generation's blob file.
+
+        Offsets and the generation number are switched in one SQLite
+        transaction, so a crash at any point leaves a consistent cache.
+        """
+        generation = int(self._setting("generation")) + 1
+        new_file = self._blob_path(generation)
+        rows = self._db.execute("SELECT key, offset, nbytes FROM entries ORDER BY offset").fetchall()
+        updates = []
+        with open(self.blob_file, "rb") as src, open(new_file, "wb") as dst:
+            for key, offset, nbytes in rows:
+                updates.append((dst.tell(), key))
+                src.seek(offset)
+                dst.write(src.read(nbytes))
+            dst.flush()
+            os.fsync(dst.fileno())
+        with self._db:
+            self._db.executemany("UPDATE entries SET offset = ? WHERE key = ?", updates)
+            self._db.execute("UPDATE settings SET value = ? WHERE name = 'generation'", (str(generation),))
+        old_file, self.blob_file = self.blob_file, new_file
+        os.remove(old_file)
+        logger.info(f"Compacted embedding cache to {os.path.getsize(self.blob_file)} bytes")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            live_bytes = self._live_bytes()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": live_bytes
+        }
@@ -0,0 +1,107 @@
+# ai_agents/models/file_manifest.py
+import json
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FileManifest:
+    """Per-file blocks and vectors of each repository's last analyzed commit.
+
+    A repository's manifest records the commit, pipeline version and
+    embedding model it was built with, and for every source file its git
+    blob oid, its blocks (as parsed, without the embedding) and their
+    (n, dim) float32 vectors. Re-analysing a later commit only parses the
+    files that changed and takes the rest from here.
+    """
+    def __init__(self, db_path: str = "analysis_cache/manifests.sqlite"):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS manifests ("
+            "repo TEXT PRIMARY KEY, commit_hash TEXT NOT NULL, pipeline_version TEXT NOT NULL, "
+            "model_id TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "repo TEXT NOT NULL, path TEXT NOT NULL, blob_oid TEXT, blocks TEXT NOT NULL, "
+            "vectors BLOB NOT NULL, dim INTEGER NOT NULL, PRIMARY KEY (repo, path))"
+        )
+        self._db.commit()
+
+    def base_commit(self, repo: str, pipeline_version: str, model_id: str) -> Optional[str]:
+        """Commit of `repo`'s manifest, or None when there is none built with this pipeline and model"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT commit_hash, pipeline_version, model_id FROM manifests WHERE repo = ?", (repo,)
+            ).fetchone()
+        if row is None or row[1] != pipeline_version or row[2] != model_id:
+            return None
+        return row[0]
+
+    def blob_oids(self, repo: str) -> Dict[str, Optional[str]]:
+        with self._lock:
+            rows = self._db.execute("SELECT path, blob_oid FROM files WHERE repo = ?", (repo,)).fetchall()
+        return dict(rows)
+
+    def load_blocks(self, repo: str, paths: Iterable[str]) -> Dict[str, List[Dict]]:
+        """Stored blocks, with their (1, dim) embeddings, of whichever `paths` are in the manifest"""
+        paths = list(dict.fromkeys(paths))
+        rows = []
+        with self._lock:
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                rows.extend(self._db.execute(
+                    f"SELECT path, blocks, vectors, dim FROM files WHERE repo = ? AND path IN ({','.join('?' * len(chunk))})",
+                    [repo] + chunk
+                ).fetchall())
+        found = {}
+        for path, blocks, vectors, dim in rows:
+            blocks = json.loads(blocks)
+            vectors = np.frombuffer(vectors, dtype=np.float32).reshape(len(blocks), dim)
+            for row, block in enumerate(blocks):
+                block["embedding"] = vectors[row:row + 1].copy()
+            found[path] = blocks
+        return found
+
+    def save(self, repo: str, commit_hash: str, pipeline_version: str, model_id: str,
+             blob_oids: Dict[str, Optional[str]], parsed: Dict[str, List[Dict]]):
+        """Move `repo`'s manifest to `commit_hash`.
+
+        `blob_oids` lists every file of the commit; `parsed` holds the blocks
+        of the files that were parsed for it. Files not in `parsed` keep
+        their stored blocks, and files not in `blob_oids` are dropped.
+        """
+        rows = []
+        for path, blocks in parsed.items():
+            embeddings = [np.asarray(b["embedding"], dtype=np.float32).reshape(1, -1) for b in blocks]
+            dim = embeddings[0].shape[1] if embeddings else 0
+            records = [{key: value for key, value in b.items() if key != "embedding"} for b in blocks]
+            vectors = np.vstack(embeddings).tobytes() if embeddings else b""
+            rows.append((repo, path, blob_oids.get(path), json.dumps(records), vectors, dim))
+        with self._lock, self._db:
+            stored = {row[0] for row in self._db.execute("SELECT path FROM files WHERE repo = ?", (repo,))}
+            self._db.executemany(
+                "DELETE FROM files WHERE repo = ? AND path = ?",
+                [(repo, path) for path in stored if path not in blob_oids]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files (repo, path, blob_oid, blocks, vectors, dim) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.executemany(
+                "UPDATE files SET blob_oid = ? WHERE repo = ? AND path = ?",
+                [(oid, repo, path) for path, oid in blob_oids.items() if path not in parsed]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO manifests (repo, commit_hash, pipeline_version, model_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (repo, commit_hash, pipeline_version, model_id, time.time())
+            )
+        logger.info(f"Manifest of {repo} moved to {commit_hash[:12]} ({len(parsed)} files parsed)")
@@ -0,0 +1,183 @@
+# ai_agents/models/fingerprint_index.py
+import numpy as np
+import re
+import sqlite3
+import threading
+import zlib
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keywords of the supported languages stay as-is; every other identifier becomes "V"
+_KEYWORDS = frozenset("""
+    and as assert async await break case catch class const continue def default del do elif else enum
+    except export extends extern finally for from function global goto if implements import in instanceof
+    interface is lambda let new nonlocal not or pass private protected public raise return sizeof static
+    struct super switch this throw throws try typedef typeof union unsigned var void volatile while with yield
+    int long short char float double bool boolean byte signed None True False null true false undefined
+""".split())
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+    (?P<comment>//[^\n]*|\#[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>\"\"\".*?(?:\"\"\"|\Z)|'''.*?(?:'''|\Z)|"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?|`(?:\\.|[^`\\])*`?)
+  | (?P<number>\d[\w.]*)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<punct>\S)
+  )
+""", re.VERBOSE | re.DOTALL)
+
+# Odd multiplier of the k-gram polynomial hash; arithmetic wraps modulo 2**64
+_BASE = np.uint64(0x100000001B3)
+_MASK = np.uint64((1 << 63) - 1)
+
+def normalize_tokens(code: str) -> List[str]:
+    """Tokenize code with comments dropped and identifiers, strings and numbers replaced by placeholders.
+
+    Renaming variables, editing literals or reformatting therefore leaves
+    the token stream unchanged.
+    """
+    tokens = []
+    for match in _TOKEN.finditer(code):
+        kind = match.lastgroup
+        if kind == "ident":
+            text = match.group(kind)
+            tokens.append(text if text in _KEYWORDS else "V")
+        elif kind == "string":
+            tokens.append("S")
+        elif kind == "number":
+            tokens.append("N")
+        elif kind == "punct":
+            tokens.append(match.group(kind))
+    return tokens
+
+_TOKEN_IDS: Dict[str, int] = {}
+
+def _token_id(token: str) -> int:
+    token_id = _TOKEN_IDS.get(token)
+    if token_id is None:
+        token_id = _TOKEN_IDS.setdefault(token, zlib.crc32(token.encode("utf-8")))
+    return token_id
+
+def fingerprint(code: str, k: int = 25, window: int = 10) -> np.ndarray:
+    """Winnowed fingerprints of the code's normalized k-grams, as sorted unique int64 hashes.
+
+    Every run of `window` consecutive k-gram hashes contributes its minimum
+    (the rightmost on ties), so any shared span of at least window + k - 1
+    tokens yields at least one shared fingerprint. Blocks shorter than k
+    tokens have none.
+    """
+    ids = np.fromiter(map(_token_id, normalize_tokens(code)), dtype=np.uint64)
+    count = len(ids) - k + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for j in range(k):
+        hashes = hashes * _BASE + ids[j:j + count]
+    # Mix the high bits down, then keep 63 bits so hashes fit SQLite's signed integers
+    hashes ^= hashes >> np.uint64(31)
+    hashes &= _MASK
+    if count <= window:
+        return np.array([hashes.min()], dtype=np.int64)
+    windows = sliding_window_view(hashes, window)
+    positions = np.arange(len(windows)) + (window - 1 - windows[:, ::-1].argmin(axis=1))
+    return np.unique(hashes[positions]).astype(np.int64)
+
+class FingerprintIndex:
+    """Inverted index from winnowed fingerprints to the corpus blocks containing them.
+
+    Block ids are those of the CorpusIndex, so a match resolves to the same
+    stored block as a FAISS hit. Lookups are one SQL join for a whole batch.
+    """
+    def __init__(self, db_path: str, k: int = 25, window: int = 10):
+        self.k = k
+        self.window = window
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "hash INTEGER NOT NULL, block_id INTEGER NOT NULL, repo TEXT NOT NULL, "
+            "PRIMARY KEY (hash, block_id)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_repo ON fingerprints (repo)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_block ON fingerprints (block_id)")
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS query_prints (qid INTEGER NOT NULL, hash INTEGER NOT NULL)")
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS usable_prints (hash INTEGER PRIMARY KEY)")
+        self._db.commit()
+
+    def fingerprint(self, code: str) -> np.ndarray:
+        return fingerprint(code, self.k, self.window)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(DISTINCT block_id) FROM fingerprints").fetchone()[0]
+
+    def add(self, repo: str, ids: Iterable[int], texts: Iterable[str]):
+        """Index blocks of `repo` under their corpus ids"""
+        rows = [
+            (int(h), int(block_id), repo)
+            for block_id, text in zip(ids, texts)
+            for h in self.fingerprint(text)
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO fingerprints (hash, block_id, repo) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def remove_repo(self, repo: str):
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints WHERE repo = ?", (repo,))
+            self._db.commit()
+
+    def remove_ids(self, ids: Iterable[int]):
+        with self._lock:
+            self._db.executemany("DELETE FROM fingerprints WHERE block_id = ?", [(int(i),) for i in ids])
+            self._db.commit()
+
+    def match(self, texts: List[str], exclude_repo: Optional[str] = None, min_prints: int = 4,
+              max_block_frequency: int = 50) -> List[Optional[Dict]]:
+        """Best candidate source block for each text, or None.
+
+        A candidate is {"id", "overlap", "shared"}: `overlap` is the share of the
+        text's fingerprints also found in that block. Fingerprints stored for
+        more than `max_block_frequency` blocks are boilerplate and ignored, as
+        in MOSS. Texts left with fewer than `min_prints` fingerprints are too
+        short to judge and get None.
+        """
+        results: List[Optional[Dict]] = [None] * len(texts)
+        rows = [(qid, int(h)) for qid, text in enumerate(texts) for h in self.fingerprint(text)]
+        if not rows:
+            return results
+        with self._lock:
+            try:
+                self._db.executemany("INSERT INTO query_prints (qid, hash) VALUES (?, ?)", rows)
+                # Probing at most max_block_frequency + 1 postings keeps common hashes cheap
+                self._db.execute(
+                    "INSERT OR IGNORE INTO usable_prints (hash) "
+                    "SELECT DISTINCT q.hash FROM query_prints q WHERE "
+                    "(SELECT COUNT(*) FROM (SELECT 1 FROM fingerprints f WHERE f.hash = q.hash LIMIT ?)) <= ?",
+                    (max_block_frequency + 1, max_block_frequency)
+                )
+                usable = dict(self._db.execute(
+                    "SELECT q.qid, COUNT(*) FROM query_prints q JOIN usable_prints u ON u.hash = q.hash GROUP BY q.qid"
+                ).fetchall())
+                matches = self._db.execute(
+                    "SELECT q.qid, f.block_id, COUNT(*) FROM query_prints q "
+                    "JOIN usable_prints u ON u.hash = q.hash "
+                    "JOIN fingerprints f ON f.hash = q.hash "
+                    "WHERE ? IS NULL OR f.repo != ? "
+                    "GROUP BY q.qid, f.block_id",
+                    (exclude_repo, exclude_repo)
+                ).fetchall()
+            finally:
+                self._db.execute("DELETE FROM query_prints")
+                self._db.execute("DELETE FROM usable_prints")
+                self._db.commit()
+        for qid, block_id, shared in matches:
+            if usable.get(qid, 0) < min_prints:
+                continue
+            best = results[qid]
+            if best is None or (shared, -block_id) > (best["shared"], -best["id"]):
+                results[qid] = {"id": block_id, "shared": shared, "overlap": shared / usable[qid]}
+        return results
@@ -0,0 +1,176 @@
+# ai_agents/models/idea_corpus.py
+import argparse
+import json
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+from ai_agents.models.ann_index import AnnIndex, configured_options, normalize
+
+logger = logging.getLogger(__name__)
+
+# Characters of README text embedded with a project's description
+README_EXCERPT_CHARS = 500
+
+class IdeaCorpus:
+    """Persistent corpus of project descriptions with precomputed sentence embeddings.
+
+    Projects are keyed by GitHub full name (case-insensitive) in a SQLite
+    table; their embeddings live in an AnnIndex under the same ids, so
+    a lookup is one nearest-neighbour search. Re-adding a project replaces
+    it only if its text changed. Filled by import_jsonl() from an offline
+    dump, by IdeaChecker from live search results, and with the summary of
+    every analyzed repository.
+    """
+    def __init__(self, corpus_dir: str = "idea_corpus", dimension: int = 384, ann_options: Optional[Dict] = None):
+        os.makedirs(corpus_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(corpus_dir, "projects.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            "id INTEGER PRIMARY KEY, full_name TEXT NOT NULL UNIQUE COLLATE NOCASE, url TEXT, "
+            "description TEXT, readme TEXT, source TEXT, updated_at REAL)"
+        )
+        self._db.commit()
+        self.index = AnnIndex(corpus_dir, "idea_vectors", dimension, label="idea",
+                              **(ann_options if ann_options is not None else configured_options()))
+
+    @staticmethod
+    def document_text(project: Dict) -> str:
+        """The text embedded for a project: its description, then the start of its README"""
+        readme = (project.get("readme") or "")[:README_EXCERPT_CHARS]
+        return " ".join(part for part in (project.get("description") or project["full_name"], readme) if part)
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def add_projects(self, projects: List[Dict], embeddings: np.ndarray, source: str) -> int:
+        """Insert or replace projects ({"full_name", "url", "description", "readme"}) with their embeddings.
+
+        Projects already stored with the same text are left alone. Returns
+        the number written.
+        """
+        with self._lock:
+            stored = {}
+            names = [p["full_name"] for p in projects]
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT id, full_name, description, readme FROM projects WHERE full_name IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                stored.update({row[1].lower(): row for row in rows})
+            changed, latest = [], {}
+            for project, embedding in zip(projects, embeddings):
+                # The last copy of a project within one batch wins
+                latest[project["full_name"].lower()] = (project, embedding)
+            for key, (project, embedding) in latest.items():
+                row = stored.get(key)
+                if row is None or (row[2], row[3]) != (project.get("description"), project.get("readme")):
+                    changed.append((project, embedding))
+            if not changed:
+                return 0
+            stale_ids = [stored[p["full_name"].lower()][0] for p, _ in changed if p["full_name"].lower() in stored]
+            self.index.remove_ids(stale_ids)
+            self._db.executemany("DELETE FROM projects WHERE id = ?", [(i,) for i in stale_ids])
+            next_id = max(self.index.next_id, (self._db.execute("SELECT MAX(id) FROM projects").fetchone()[0] or -1) + 1)
+            ids = range(next_id, next_id + len(changed))
+            self.index.add(ids, np.vstack([embedding for _, embedding in changed]))
+            now = time.time()
+            self._db.executemany(
+                "INSERT INTO projects (id, full_name, url, description, readme, source, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (i, p["full_name"], p.get("url"), p.get("description"), p.get("readme"), source, now)
+                    for i, (p, _) in zip(ids, changed)
+                ]
+            )
+            self._db.commit()
+        return len(changed)
+
+    def search(self, embedding: np.ndarray, k: int = 10, exclude_name: Optional[str] = None) -> List[Dict]:
+        """The k most similar projects, best first, as {"name", "url", "description", "cosine"}"""
+        with self._lock:
+            excluded = None
+            if exclude_name:
+                excluded = [row[0] for row in self._db.execute(
+                    "SELECT id FROM projects WHERE full_name = ?", (exclude_name,)
+                )]
+            cosines, ids = self.index.search(np.asarray(embedding).reshape(1, -1), k, exclude_ids=excluded)
+            hits = [(int(i), float(c)) for i, c in zip(ids[0], cosines[0]) if i >= 0]
+            if not hits:
+                return []
+            rows = {row[0]: row for row in self._db.execute(
+                f"SELECT id, full_name, url, description FROM projects WHERE id IN ({','.join('?' * len(hits))})",
+                [i for i, _ in hits]
+            )}
+        return [
+            {"name": rows[i][1], "url": rows[i][2], "description": rows[i][3], "cosine": cosine}
+            for i, cosine in hits if i in rows
+        ]
+
+    def import_jsonl(self, path: str, encoder, batch_size: int = 256) -> int:
+        """Embed and add projects from a JSON-lines dump of GitHub repositories.
+
+        Each line needs "full_name" (or "name"), and may have "html_url" (or
+        "url"), "description" and "readme". `encoder` is a SentenceTransformer.
+        """
+        written = 0
+        for batch in _batches(_read_projects(path), batch_size):
+            embeddings = normalize(encoder.encode([self.document_text(p) for p in batch], convert_to_numpy=True))
+            written += self.add_projects(batch, embeddings, source="import")
+            logger.info(f"Imported {written} projects from {path}")
+        return written
+
+def _read_projects(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"{path}:{line_number}: skipping invalid JSON ({str(e)})")
+                continue
+            full_name = record.get("full_name") or record.get("name")
+            if not full_name:
+                continue
+            yield {
+                "full_name": full_name,
+                "url": record.get("html_url") or record.get("url") or f"https://github.com/{full_name}",
+                "description": record.get("description") or "",
+                "readme": record.get("readme") or ""
+            }
+
+def _batches(items: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def main():
+    """python -m ai_agents.models.idea_corpus projects.jsonl [more.jsonl ...]"""
+    from ai_agents.models.registry import get_registry
+
+    arg_parser = argparse.ArgumentParser(description="Import project descriptions into the idea corpus")
+    arg_parser.add_argument("paths", nargs="+", help="JSON-lines files of GitHub repositories")
+    arg_parser.add_argument("--batch-size", type=int, default=256)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    registry = get_registry()
+    corpus = registry.idea_corpus
+    for path in args.paths:
+        corpus.import_jsonl(path, registry.sentence_model, batch_size=args.batch_size)
+    logger.info(f"Idea corpus holds {corpus.ntotal} projects")
+
+if __name__ == "__main__":
+    main()
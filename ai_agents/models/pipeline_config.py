@@ -0,0 +1,97 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class PipelineConfig:
+    """Configuration for the analysis pipeline and the models it loads."""
+    CODEBERT_MODEL = os.getenv("CODEBERT_MODEL", "microsoft/codebert-base")
+    SENTENCE_MODEL = os.getenv("SENTENCE_MODEL", "all-MiniLM-L6-v2")
+    # Worker processes for block extraction (<= 1 parses in-process) and files per task
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PARSE_CHUNK_FILES = int(os.getenv("PARSE_CHUNK_FILES", "16"))
+    # Source bytes read from disk but not yet parsed, across all in-flight chunks
+    PARSE_MAX_INFLIGHT_MB = int(os.getenv("PARSE_MAX_INFLIGHT_MB", "64"))
+    # Number of code blocks per padded CodeBERT forward pass
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    # "torch" (fp32), "torch-int8" (dynamic quantization) or "onnx" (ONNX Runtime, exported once)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "onnx_cache")
+    # Directory holding the cross-repository code corpus index
+    FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "faiss_index")
+    # Vector index type by live vector count: exact flat search, then HNSW from ANN_HNSW_MIN_VECTORS,
+    # then IVF-PQ from ANN_IVFPQ_MIN_VECTORS. efSearch and nprobe trade recall for latency; IVF-PQ
+    # candidates (k * ANN_REFINE_FACTOR) are re-ranked exactly. Removed vectors are tombstoned and
+    # the index rebuilt once they exceed ANN_REBUILD_DEAD_FRACTION of it. New vectors are kept in an
+    # exact in-memory delta and folded into the on-disk index every ANN_SNAPSHOT_ROWS.
+    ANN_HNSW_MIN_VECTORS = int(os.getenv("ANN_HNSW_MIN_VECTORS", "50000"))
+    ANN_IVFPQ_MIN_VECTORS = int(os.getenv("ANN_IVFPQ_MIN_VECTORS", "1000000"))
+    ANN_HNSW_M = int(os.getenv("ANN_HNSW_M", "32"))
+    ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", "128"))
+    ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+    ANN_REFINE_FACTOR = int(os.getenv("ANN_REFINE_FACTOR", "10"))
+    ANN_REBUILD_DEAD_FRACTION = float(os.getenv("ANN_REBUILD_DEAD_FRACTION", "0.25"))
+    ANN_SNAPSHOT_ROWS = int(os.getenv("ANN_SNAPSHOT_ROWS", "20000"))
+    # Cosine similarity of code embeddings mapped to 0 similarity; 1.0 maps to 1
+    CODE_COSINE_FLOOR = float(os.getenv("CODE_COSINE_FLOOR", "0.9"))
+    # Winnowing fingerprints: normalized tokens per k-gram and k-grams per window. Blocks whose
+    # fingerprints overlap a stored block by at least the threshold are reported as copied
+    # without a dense search; blocks with fewer than FINGERPRINT_MIN_PRINTS are left to it.
+    # Fingerprints found in more than FINGERPRINT_COMMON_BLOCKS stored blocks are boilerplate.
+    FINGERPRINT_K = int(os.getenv("FINGERPRINT_K", "25"))
+    FINGERPRINT_WINDOW = int(os.getenv("FINGERPRINT_WINDOW", "10"))
+    FINGERPRINT_MATCH_THRESHOLD = float(os.getenv("FINGERPRINT_MATCH_THRESHOLD", "0.8"))
+    FINGERPRINT_MIN_PRINTS = int(os.getenv("FINGERPRINT_MIN_PRINTS", "4"))
+    FINGERPRINT_COMMON_BLOCKS = int(os.getenv("FINGERPRINT_COMMON_BLOCKS", "50"))
+    # Precomputed project descriptions searched by IdeaChecker before GitHub. Live search runs
+    # only when fewer than IDEA_CORPUS_MIN_RESULTS stored projects reach IDEA_CORPUS_MIN_SIMILARITY
+    IDEA_CORPUS_PATH = os.getenv("IDEA_CORPUS_PATH", "idea_corpus")
+    IDEA_CORPUS_MIN_RESULTS = int(os.getenv("IDEA_CORPUS_MIN_RESULTS", "5"))
+    IDEA_CORPUS_MIN_SIMILARITY = float(os.getenv("IDEA_CORPUS_MIN_SIMILARITY", "0.6"))
+    # Content-addressed cache of block embeddings, bounded in size
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+    EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+    # Bump whenever a change alters analysis results, so stored results are not reused
+    PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "5")
+    RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "analysis_cache/results.sqlite")
+    RESULT_TTL_SECONDS = int(os.getenv("RESULT_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Per-file blocks and vectors of each repository's last analyzed commit, so re-analyses
+    # only parse and embed the files changed since
+    MANIFEST_PATH = os.getenv("MANIFEST_PATH", "analysis_cache/manifests.sqlite")
+    # "sparse" = depth-1, blob-filtered clone of source files only; "full" = plain clone
+    FETCH_MODE = os.getenv("FETCH_MODE", "sparse")
+    FETCH_MAX_FILE_BYTES = int(os.getenv("FETCH_MAX_FILE_BYTES", str(1024 * 1024)))
+    FETCH_MAX_TOTAL_BYTES = int(os.getenv("FETCH_MAX_TOTAL_BYTES", str(200 * 1024 * 1024)))
+    # Analyses run on a bounded thread pool outside the API event loop
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "32"))
+    JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "500"))
+    # Threads used to overlap independent stages of one analysis
+    STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "4"))
+    # Shared GitHub REST client; point GITHUB_API_URL at a local fake for tests
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", "github_cache/responses.sqlite")
+    GITHUB_CACHE_TTL_SECONDS = int(os.getenv("GITHUB_CACHE_TTL_SECONDS", "3600"))
+    # Every Groq chat completion goes through one LLMGateway: at most LLM_MAX_CONCURRENCY requests
+    # in flight, LLM_TIMEOUT_SECONDS per call including retries, cached replies kept for the TTL.
+    # Point GROQ_BASE_URL at a local stub for tests.
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache/completions.sqlite")
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    # Reports are stored per commit under REPORT_DIR and served at {REPORT_BASE_URL}/reports/{id};
+    # PDFs are converted by wkhtmltopdf on a background pool (found on PATH when not set)
+    REPORT_DIR = os.getenv("REPORT_DIR", "static/reports")
+    REPORT_BASE_URL = os.getenv("REPORT_BASE_URL", "http://localhost:8000")
+    REPORT_PDF_WORKERS = int(os.getenv("REPORT_PDF_WORKERS", "1"))
+    REPORT_PDF_QUEUE_LIMIT = int(os.getenv("REPORT_PDF_QUEUE_LIMIT", "16"))
+    WKHTMLTOPDF_PATH = os.getenv(
+        "WKHTMLTOPDF_PATH", r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe" if os.name == "nt" else ""
+    ) or None
+    # "local" reads commit history from the clone's `git log`; "api" pages the commits API
+    CONTRIB_SOURCE = os.getenv("CONTRIB_SOURCE", "local")
+    # Concurrent GitHub requests when enriching search results
+    GITHUB_FANOUT = int(os.getenv("GITHUB_FANOUT", "8"))
@@ -0,0 +1,218 @@
+# ai_agents/models/registry.py
+from transformers import AutoTokenizer, AutoModel
+import torch
+from sentence_transformers import SentenceTransformer
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+import multiprocessing
+import os
+import threading
+from dotenv import load_dotenv
+import logging
+
+from ai_agents.models.corpus_index import CorpusIndex
+from ai_agents.models.embedding_backend import EmbeddingBackend, create_backend
+from ai_agents.models.embedding_cache import EmbeddingCache
+from ai_agents.models.file_manifest import FileManifest
+from ai_agents.models.idea_corpus import IdeaCorpus
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.report_store import ReportStore
+from ai_agents.models.result_store import ResultStore
+from ai_agents.utils.github_client import GitHubClient
+from ai_agents.utils.llm_gateway import LLMGateway
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Process-wide holder for the models and API clients shared by the agents.
+
+    Every resource is loaded at most once, either lazily on first access or
+    eagerly through warm_up(). `is_ready` only reports True once warm_up()
+    has loaded everything; if it failed, `warm_up_error` says why.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._resources = {}
+        self.warm_up_error: Optional[str] = None
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    def _get(self, name: str, loader: Callable[[], Any]) -> Any:
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            if name not in self._resources:
+                logger.info(f"Loading shared resource: {name}")
+                self._resources[name] = loader()
+            return self._resources[name]
+
+    def register(self, name: str, resource: Any):
+        """Install a preloaded resource (e.g. a small local model for benchmarks)"""
+        with self._lock:
+            self._resources[name] = resource
+
+    def _load_codebert_tokenizer(self):
+        token = os.getenv("HUGGINGFACE_TOKEN")
+        return AutoTokenizer.from_pretrained(PipelineConfig.CODEBERT_MODEL, token=token if token else None)
+
+    def _load_codebert_model(self):
+        token = os.getenv("HUGGINGFACE_TOKEN")
+        model = AutoModel.from_pretrained(PipelineConfig.CODEBERT_MODEL, token=token if token else None)
+        model.to(self.device)
+        model.eval()
+        return model
+
+    def _load_llm_gateway(self):
+        groq_api_key = os.getenv("GROQ_API_KEY")
+        if not groq_api_key:
+            logger.error("GROQ_API_KEY not set")
+            raise ValueError("GROQ_API_KEY environment variable is required")
+        return LLMGateway(
+            groq_api_key,
+            base_url=PipelineConfig.GROQ_BASE_URL,
+            cache_path=PipelineConfig.LLM_CACHE_PATH,
+            cache_ttl=PipelineConfig.LLM_CACHE_TTL_SECONDS,
+            max_concurrency=PipelineConfig.LLM_MAX_CONCURRENCY,
+            timeout=PipelineConfig.LLM_TIMEOUT_SECONDS,
+            max_retries=PipelineConfig.LLM_MAX_RETRIES
+        )
+
+    def _load_github_client(self):
+        github_token = os.getenv("GITHUB_TOKEN")
+        if not github_token:
+            logger.error("GITHUB_TOKEN not set")
+            raise ValueError("GITHUB_TOKEN environment variable is required")
+        return GitHubClient(
+            github_token,
+            base_url=PipelineConfig.GITHUB_API_URL,
+            cache_path=PipelineConfig.GITHUB_CACHE_PATH,
+            cache_ttl=PipelineConfig.GITHUB_CACHE_TTL_SECONDS
+        )
+
+    def _load_parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        if PipelineConfig.PARSE_WORKERS <= 1:
+            return None
+        # Spawned workers only import the extractor, never torch or the models
+        return ProcessPoolExecutor(
+            max_workers=PipelineConfig.PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @property
+    def codebert_tokenizer(self):
+        return self._get("codebert_tokenizer", self._load_codebert_tokenizer)
+
+    @property
+    def codebert_model(self):
+        return self._get("codebert_model", self._load_codebert_model)
+
+    @property
+    def embedding_backend(self) -> EmbeddingBackend:
+        return self._get("embedding_backend", lambda: create_backend(
+            PipelineConfig.EMBEDDING_BACKEND,
+            self.codebert_model,
+            self.device,
+            PipelineConfig.CODEBERT_MODEL,
+            onnx_dir=PipelineConfig.EMBEDDING_ONNX_DIR
+        ))
+
+    @property
+    def sentence_model(self) -> SentenceTransformer:
+        # One instance is shared by CodeSimilarity and IdeaChecker
+        return self._get("sentence_model", lambda: SentenceTransformer(PipelineConfig.SENTENCE_MODEL))
+
+    @property
+    def llm_gateway(self) -> LLMGateway:
+        return self._get("llm_gateway", self._load_llm_gateway)
+
+    @property
+    def github_client(self) -> GitHubClient:
+        return self._get("github_client", self._load_github_client)
+
+    @property
+    def corpus_index(self) -> CorpusIndex:
+        return self._get("corpus_index", lambda: CorpusIndex(
+            PipelineConfig.FAISS_INDEX_PATH,
+            fingerprint_k=PipelineConfig.FINGERPRINT_K,
+            fingerprint_window=PipelineConfig.FINGERPRINT_WINDOW
+        ))
+
+    @property
+    def idea_corpus(self) -> IdeaCorpus:
+        return self._get("idea_corpus", lambda: IdeaCorpus(
+            PipelineConfig.IDEA_CORPUS_PATH,
+            dimension=self.sentence_model.get_sentence_embedding_dimension()
+        ))
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        return self._get("embedding_cache", lambda: EmbeddingCache(
+            PipelineConfig.EMBEDDING_CACHE_DIR,
+            max_bytes=PipelineConfig.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+            dtype=PipelineConfig.EMBEDDING_CACHE_DTYPE
+        ))
+
+    @property
+    def result_store(self) -> ResultStore:
+        return self._get("result_store", lambda: ResultStore(
+            PipelineConfig.RESULT_STORE_PATH,
+            ttl_seconds=PipelineConfig.RESULT_TTL_SECONDS
+        ))
+
+    @property
+    def file_manifest(self) -> FileManifest:
+        return self._get("file_manifest", lambda: FileManifest(PipelineConfig.MANIFEST_PATH))
+
+    @property
+    def report_store(self) -> ReportStore:
+        return self._get("report_store", lambda: ReportStore(
+            PipelineConfig.REPORT_DIR,
+            wkhtmltopdf_path=PipelineConfig.WKHTMLTOPDF_PATH,
+            pdf_workers=PipelineConfig.REPORT_PDF_WORKERS,
+            max_pending=PipelineConfig.REPORT_PDF_QUEUE_LIMIT
+        ))
+
+    @property
+    def parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        return self._get("parse_pool", self._load_parse_pool)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def warm_up(self):
+        """Load every shared resource so the first request does not pay for it."""
+        self.warm_up_error = None
+        try:
+            self.codebert_tokenizer
+            self.codebert_model
+            self.embedding_backend
+            self.sentence_model
+            self.llm_gateway
+            self.github_client
+            self.corpus_index
+            self.idea_corpus
+            self.embedding_cache
+            self.result_store
+            self.file_manifest
+            self.report_store
+        except Exception as e:
+            # Kept for /ready, which would otherwise report "warming up" forever
+            self.warm_up_error = str(e)
+            raise
+        self._ready.set()
+        logger.info("Model registry warmed up")
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide ModelRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,126 @@
+# ai_agents/models/report_store.py
+import hashlib
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+import pdfkit
+import logging
+
+from ai_agents.utils.metrics import CACHE_HITS, span
+
+logger = logging.getLogger(__name__)
+
+REPORT_ID = re.compile(r"^[0-9a-f]{16,32}$")
+
+class ReportStore:
+    """Report artifacts stored per report id under `root/{report_id}/`.
+
+    report.html and report.txt (the LLM text) are written when the report is
+    generated. report.pdf is converted from the HTML by wkhtmltopdf on a
+    small background pool, either queued right after generation when the
+    queue has room or on the first request for it, and then kept on disk.
+    Concurrent requests for the same PDF share one conversion.
+    """
+    def __init__(self, root: str = "static/reports", wkhtmltopdf_path: Optional[str] = None,
+                 pdf_workers: int = 1, max_pending: int = 16):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.wkhtmltopdf_path = wkhtmltopdf_path
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=pdf_workers, thread_name_prefix="pdf")
+        self._pending: Dict[str, Future] = {}
+        # Reentrant: cancelling a pending conversion runs its _forget callback in this thread
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def report_id(repo_url: Optional[str], commit_hash: Optional[str], pipeline_version: str) -> str:
+        """Stable id for one commit's report, so re-analyses replace it; random without a known commit"""
+        if not repo_url or not commit_hash or commit_hash == "unknown":
+            return uuid.uuid4().hex
+        return hashlib.sha256(f"{repo_url}@{commit_hash}#{pipeline_version}".encode("utf-8")).hexdigest()[:32]
+
+    def path(self, report_id: str, name: str) -> str:
+        if not REPORT_ID.match(report_id):
+            raise ValueError(f"Invalid report id {report_id!r}")
+        return os.path.join(self.root, report_id, name)
+
+    def _write(self, path: str, text: str):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def save(self, report_id: str, text: str, html: Optional[str] = None):
+        """Store a report's text and, when rendered, its HTML; any older PDF of the id is dropped"""
+        os.makedirs(os.path.dirname(self.path(report_id, "report.txt")), exist_ok=True)
+        with self._lock:
+            # A conversion of the old HTML must not write its PDF over the new report
+            future = self._pending.pop(report_id, None)
+            if future is not None and not future.cancel():
+                wait([future])
+            for name in ("report.pdf", "report.html"):
+                if os.path.exists(self.path(report_id, name)):
+                    os.remove(self.path(report_id, name))
+            self._write(self.path(report_id, "report.txt"), text)
+            if html is not None:
+                self._write(self.path(report_id, "report.html"), html)
+
+    def exists(self, report_id: str, name: str = "report.txt") -> bool:
+        return os.path.exists(self.path(report_id, name))
+
+    def request_pdf(self, report_id: str, background: bool = False) -> Optional[Future]:
+        """Future of the PDF's path, converting it if needed.
+
+        With `background`, conversion is only queued while fewer than
+        `max_pending` are waiting, and None is returned otherwise.
+        """
+        pdf_path = self.path(report_id, "report.pdf")
+        with self._lock:
+            future = self._pending.get(report_id)
+            if future is not None:
+                return future
+            if os.path.exists(pdf_path):
+                CACHE_HITS.labels(cache="report_pdf").inc()
+                future = Future()
+                future.set_result(pdf_path)
+                return future
+            if not os.path.exists(self.path(report_id, "report.html")):
+                future = Future()
+                future.set_exception(FileNotFoundError(f"No HTML for report {report_id}"))
+                return future
+            if background and len(self._pending) >= self.max_pending:
+                return None
+            future = self.executor.submit(self._render_pdf, report_id)
+            self._pending[report_id] = future
+        future.add_done_callback(lambda done: self._forget(report_id, done))
+        return future
+
+    def _forget(self, report_id: str, future: Future):
+        with self._lock:
+            if self._pending.get(report_id) is future:
+                del self._pending[report_id]
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"PDF conversion of report {report_id} failed: {str(future.exception())}")
+
+    def _render_pdf(self, report_id: str) -> str:
+        html_path = self.path(report_id, "report.html")
+        pdf_path = self.path(report_id, "report.pdf")
+        tmp_path = f"{pdf_path}.{uuid.uuid4().hex}.tmp"
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        config = pdfkit.configuration(wkhtmltopdf=self.wkhtmltopdf_path) if self.wkhtmltopdf_path else pdfkit.configuration()
+        try:
+            with span("pdf_render"):
+                pdfkit.from_string(html, tmp_path, configuration=config)
+            os.replace(tmp_path, pdf_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"Generated PDF at {pdf_path}")
+        return pdf_path
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
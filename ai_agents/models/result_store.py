@@ -0,0 +1,48 @@
+# ai_agents/models/result_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResultStore:
+    """Finished analyses keyed by (normalized repo URL, commit hash, pipeline version)."""
+    def __init__(self, db_path: str = "analysis_cache/results.sqlite", ttl_seconds: int = 7 * 24 * 3600):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "repo_url TEXT NOT NULL, commit_hash TEXT NOT NULL, pipeline_version TEXT NOT NULL, "
+            "created_at REAL NOT NULL, result TEXT NOT NULL, "
+            "PRIMARY KEY (repo_url, commit_hash, pipeline_version))"
+        )
+        self._db.commit()
+
+    def get(self, repo_url: str, commit_hash: str, pipeline_version: str) -> Optional[Dict]:
+        """Return the stored result, or None when missing or older than the TTL"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created_at, result FROM results WHERE repo_url = ? AND commit_hash = ? AND pipeline_version = ?",
+                (repo_url, commit_hash, pipeline_version)
+            ).fetchone()
+        if row is None:
+            return None
+        created_at, result = row
+        if self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds:
+            logger.info(f"Stored analysis of {repo_url}@{commit_hash[:12]} expired")
+            return None
+        return json.loads(result)
+
+    def put(self, repo_url: str, commit_hash: str, pipeline_version: str, result: Dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (repo_url, commit_hash, pipeline_version, created_at, result) VALUES (?, ?, ?, ?, ?)",
+                (repo_url, commit_hash, pipeline_version, time.time(), json.dumps(result, default=str))
+            )
+            self._db.commit()
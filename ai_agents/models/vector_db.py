@@ -1,10 +1,12 @@
-import faiss
 import os
+import re
 import numpy as np
 from typing import List
 
+from ai_agents.models.ann_index import AnnIndex, configured_options
+
 class VectorDB:
-    """Manage FAISS vector database for code embeddings."""
+    """Manage per-repository vector indexes for code embeddings."""
     def __init__(self, index_path: str = "faiss_index"):
         self.index_path = index_path
         os.makedirs(index_path, exist_ok=True)
@@ -13,18 +15,21 @@ class VectorDB:
         if not embeddings:
             print(f"No embeddings to store for {repo_name}")
             return
-        index = faiss.IndexFlatL2(embeddings[0].shape[1])
-        index.add(np.vstack(embeddings))
-        faiss_file = os.path.join(self.index_path, f"{repo_name}_code.faiss")
-        faiss.write_index(index, faiss_file)
-        print(f"Saved embeddings to {faiss_file}")
+        vectors = np.vstack(embeddings)
+        # Replace the repository's previous embeddings with a fresh index; tombstoning
+        # every live vector would force a full rebuild (and IVF-PQ retraining) each time
+        self._remove_index(repo_name)
+        index = self.load_index(repo_name, dimension=vectors.shape[1])
+        index.add(range(len(vectors)), vectors)
+        print(f"Saved {len(vectors)} embeddings for {repo_name} ({index.tier} index)")
+
+    def _remove_index(self, repo_name: str):
+        """Delete every generation of the repository's index and its state file"""
+        files = re.compile(re.escape(f"{repo_name}_code") + r"\.(generation(\.tmp)?|\d+\.\w+)")
+        for file in os.listdir(self.index_path):
+            if files.fullmatch(file):
+                os.remove(os.path.join(self.index_path, file))
 
-    def load_index(self, repo_name: str) -> faiss.IndexFlatL2:
-        faiss_file = os.path.join(self.index_path, f"{repo_name}_code.faiss")
-        if os.path.exists(faiss_file):
-            try:
-                return faiss.read_index(faiss_file)
-            except Exception as e:
-                print(f"Failed to load FAISS index {faiss_file}: {str(e)}")
-        dimension = 768  # Default for CodeBERT
-        return faiss.IndexFlatL2(dimension)
\ No newline at end of file
+    def load_index(self, repo_name: str, dimension: int = 768) -> AnnIndex:
+        # 768 is CodeBERT's hidden size
+        return AnnIndex(self.index_path, f"{repo_name}_code", dimension, label="repo", **configured_options())
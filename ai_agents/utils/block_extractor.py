@@ -0,0 +1,409 @@
+import ast
+import logging
+import re
+import textwrap
+from collections import deque
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-language rules. Headers are the significant tokens between the previous
+# statement boundary (`;`, `{`, `}`) and an opening brace.
+LANGUAGE_RULES = {
+    "js": {
+        "class_keywords": {"class"},
+        "control_keywords": {"if", "for", "while", "switch", "catch", "with", "do", "else", "try", "finally", "return"},
+        "qualifiers": set(),
+        "regex_literals": True,
+        "template_literals": True,
+        "preprocessor": False,
+        "class_first": True,
+    },
+    "java": {
+        "class_keywords": {"class", "interface", "enum", "record"},
+        "control_keywords": {"if", "for", "while", "switch", "catch", "synchronized", "do", "else", "try", "finally", "return"},
+        "qualifiers": {"throws"},
+        "regex_literals": False,
+        "template_literals": False,
+        "preprocessor": False,
+        "class_first": False,
+    },
+    "c": {
+        "class_keywords": {"class", "struct", "union", "enum"},
+        "control_keywords": {"if", "for", "while", "switch", "catch", "do", "else", "try", "return", "sizeof"},
+        "qualifiers": {"const", "noexcept", "override", "final", "volatile", "mutable", "throw"},
+        "regex_literals": False,
+        "template_literals": False,
+        "preprocessor": True,
+        "class_first": False,
+    },
+}
+
+# Every alternative starts with a distinct character class and contains no
+# nested ambiguous repetition, so each match runs in time linear in its length.
+_TOKEN = re.compile(rb"""
+    (?P<nl>\n)
+  | (?P<ws>[ \t\r\f\v]+)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<template>`)
+  | (?P<ident>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<number>[0-9][A-Za-z0-9_.]*)
+  | (?P<punct>=>|->|::|.)
+""", re.X | re.S)
+# Regex literals never span lines, so a failed match has scanned at most to the end of its line
+_REGEX_LITERAL = re.compile(rb"/(?:[^/\\\[\n]|\\[^\n]|\[(?:[^\]\\\n]|\\[^\n])*\])+/[A-Za-z]*")
+_PREPROCESSOR = re.compile(rb"#(?:[^\n\\]|\\.)*", re.S)
+# A `/` after one of these starts a regex literal rather than a division
+_REGEX_PRECEDERS = set(b"(,=:[!&|?{};+-*%<>~^") | {None}
+_REGEX_KEYWORDS = {b"return", b"typeof", b"case", b"in", b"of", b"delete", b"void", b"throw", b"new"}
+
+def _classify(header: List[Tuple[str, bytes]], rules: Dict) -> Tuple[str, Optional[str]]:
+    """Decide whether an opening brace starts a function, a class or anything else"""
+    if not header:
+        return "other", None
+    texts = [text.decode("utf-8", "replace") for _, text in header]
+    class_index = max((i for i, token in enumerate(texts) if token in rules["class_keywords"]), default=None)
+    if class_index is not None and rules["class_first"]:
+        return "class", _name_after(header, texts, class_index)
+
+    # JavaScript arrow functions: `(a, b) => {` and `x => {`
+    if texts[-1] == "=>":
+        name = texts[texts.index("=") - 1] if "=" in texts and texts.index("=") > 0 else None
+        return "function", name
+
+    # Find the last top-level `)` and make sure only qualifiers follow it
+    close = None
+    depth = 0
+    for i in range(len(texts) - 1, -1, -1):
+        if texts[i] == ")":
+            if depth == 0 and close is None:
+                close = i
+            depth += 1
+        elif texts[i] == "(":
+            depth -= 1
+    if close is not None:
+        trailer = texts[close + 1:]
+        allowed = True
+        after_throws = False
+        for j, token in enumerate(trailer):
+            if token in rules["qualifiers"]:
+                after_throws = after_throws or token in ("throws", "throw")
+            elif after_throws or (token == "->" or (j > 0 and trailer[0] == "->")):
+                continue
+            else:
+                allowed = False
+                break
+        if allowed:
+            depth = 0
+            open_index = None
+            for i in range(close, -1, -1):
+                if texts[i] == ")":
+                    depth += 1
+                elif texts[i] == "(":
+                    depth -= 1
+                    if depth == 0:
+                        open_index = i
+                        break
+            if open_index is not None and open_index > 0:
+                kind, name = header[open_index - 1][0], texts[open_index - 1]
+                preceding = texts[open_index - 2] if open_index > 1 else None
+                if name == "function":
+                    return "function", None
+                if kind == "ident" and name not in rules["control_keywords"] and preceding != "new":
+                    if texts[0] not in rules["control_keywords"]:
+                        return "function", name
+
+    if class_index is not None:
+        return "class", _name_after(header, texts, class_index)
+    return "other", None
+
+def _name_after(header: List[Tuple[str, bytes]], texts: List[str], index: int) -> Optional[str]:
+    return texts[index + 1] if index + 1 < len(texts) and header[index + 1][0] == "ident" else None
+
+def extract_blocks(code: str, language: str) -> List[Dict]:
+    """Extract function and class blocks from JS, Java or C/C++ source in one pass.
+
+    A regex tokenizer with linear-time alternatives feeds a brace-matching
+    state machine that skips strings, comments, template literals, regex
+    literals and preprocessor lines, so the whole file is processed in O(n).
+    Functions nested inside other functions stay part of their parent.
+    Each block carries byte and line spans and the index of its enclosing
+    reported block (`parent`), so classes can be related to their methods.
+    """
+    rules = LANGUAGE_RULES[language]
+    data = code.encode("utf-8")
+    n = len(data)
+    blocks: List[Dict] = []
+    # Open braces: (own block index, innermost reported block index, inside a function, saved paren depth)
+    stack: List[Tuple] = []
+    header: List[Tuple[str, bytes]] = []
+    header_start: Optional[Tuple[int, int]] = None
+    paren_depth = 0
+    previous = None
+    line = 1
+    pos = 0
+    # End of the line a failed regex literal scan ran to; no `/` before it is tried again,
+    # so each byte is scanned at most once by a failed attempt
+    regex_scanned_to = 0
+
+    while pos < n:
+        char = data[pos]
+        if rules["preprocessor"] and char == 0x23 and (pos == 0 or data[pos - 1] in b"\n \t"):
+            match = _PREPROCESSOR.match(data, pos)
+            line += data.count(b"\n", pos, match.end())
+            pos = match.end()
+            continue
+        if (rules["regex_literals"] and char == 0x2F and pos >= regex_scanned_to
+                and (previous in _REGEX_PRECEDERS or previous in _REGEX_KEYWORDS)
+                and not data.startswith(b"//", pos) and not data.startswith(b"/*", pos)):
+            match = _REGEX_LITERAL.match(data, pos)
+            if match:
+                if header_start is None:
+                    header_start = (pos, line)
+                header.append(("regex", match.group(0)))
+                previous = b")"
+                pos = match.end()
+                continue
+            line_end = data.find(b"\n", pos)
+            regex_scanned_to = n if line_end < 0 else line_end
+
+        match = _TOKEN.match(data, pos)
+        kind = match.lastgroup
+        start, end = match.start(), match.end()
+        if kind == "nl":
+            line += 1
+            pos = end
+            continue
+        if kind in ("ws", "line_comment"):
+            pos = end
+            continue
+        if kind == "block_comment":
+            close = data.find(b"*/", end)
+            end = n if close < 0 else close + 2
+            line += data.count(b"\n", start, end)
+            pos = end
+            continue
+        if kind == "template" and rules["template_literals"]:
+            scan = end
+            while True:
+                close = data.find(b"`", scan)
+                if close < 0:
+                    end = n
+                    break
+                backslashes = 0
+                while data[close - 1 - backslashes] == 0x5C:
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    end = close + 1
+                    break
+                scan = close + 1
+            line += data.count(b"\n", start, end)
+            kind = "string"
+        elif kind == "string":
+            line += data.count(b"\n", start, end)
+        token = data[start:end]
+        pos = end
+
+        if token == b"{":
+            block_kind, name = _classify(header, rules)
+            inside_function = bool(stack) and stack[-1][2]
+            enclosing = stack[-1][1] if stack else None
+            if block_kind != "other" and not inside_function and header_start is not None:
+                blocks.append({
+                    "kind": block_kind,
+                    "name": name,
+                    "start_byte": header_start[0],
+                    "start_line": header_start[1],
+                    "parent": enclosing,
+                })
+                index = len(blocks) - 1
+                stack.append((index, index, block_kind == "function", paren_depth))
+            else:
+                stack.append((None, enclosing, inside_function, paren_depth))
+            paren_depth = 0
+            header, header_start, previous = [], None, data[start]
+            continue
+        if token == b"}":
+            if stack:
+                index, _, _, paren_depth = stack.pop()
+                if index is not None:
+                    blocks[index]["end_byte"] = end
+                    blocks[index]["end_line"] = line
+            header, header_start, previous = [], None, data[start]
+            continue
+        if token == b";" and paren_depth == 0:
+            header, header_start, previous = [], None, data[start]
+            continue
+
+        if token == b"(":
+            paren_depth += 1
+        elif token == b")":
+            paren_depth = max(0, paren_depth - 1)
+        if header_start is None:
+            header_start = (start, line)
+        header.append((kind, token))
+        if kind == "ident":
+            previous = token
+        elif kind == "punct" and len(token) == 1:
+            previous = data[start]
+        else:
+            # Strings, numbers and multi-character operators: a following `/` divides
+            previous = b")"
+
+    # Blocks whose closing brace never came are dropped; parents are re-indexed
+    complete = [i for i, block in enumerate(blocks) if "end_byte" in block]
+    remap = {old: new for new, old in enumerate(complete)}
+    result = []
+    for i in complete:
+        block = blocks[i]
+        block["parent"] = remap.get(block["parent"])
+        block["block"] = data[block["start_byte"]:block["end_byte"]].decode("utf-8", "replace")
+        result.append(block)
+    return result
+
+def file_language(file_name: str) -> str:
+    """Determine the extraction rules to use from a file's extension"""
+    extension = file_name.split('.')[-1].lower()
+    if extension in ['js', 'jsx']:
+        return 'js'
+    elif extension == 'java':
+        return 'java'
+    elif extension in ['c', 'cpp', 'cc', 'h', 'hpp']:
+        return 'c'
+    return 'python'
+
+def extract_python_blocks(code: str) -> List[Dict]:
+    """Slice classes and functions out of Python source by their line spans.
+
+    Blocks come out in pre-order with the index of their enclosing class in
+    `parent`. Functions are leaves: their nested helpers stay in their text.
+    """
+    tree = ast.parse(code)
+    lines = code.splitlines(keepends=True)
+    blocks = []
+
+    def visit(node: ast.AST, parent: Optional[int]):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                # Decorators belong to the block they decorate
+                start_line = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                blocks.append({
+                    "block": textwrap.dedent("".join(lines[start_line - 1:child.end_lineno])),
+                    "kind": "class" if isinstance(child, ast.ClassDef) else "function",
+                    "name": child.name,
+                    "start_line": start_line,
+                    "end_line": child.end_lineno,
+                    "parent": parent
+                })
+                if isinstance(child, ast.ClassDef):
+                    visit(child, len(blocks) - 1)
+            elif isinstance(child, ast.stmt):
+                # Definitions under if/try/with blocks still count
+                visit(child, parent)
+
+    visit(tree, None)
+    return blocks
+
+def _brace_blocks(code: str, language: str) -> List[Dict]:
+    return [
+        {key: block[key] for key in ("block", "kind", "name", "start_line", "end_line", "parent")}
+        for block in extract_blocks(code, language)
+    ]
+
+def extract_file_blocks(code: str, file_name: str = "unknown") -> List[Dict]:
+    """Split a source file into a tree of function/class blocks.
+
+    Each block is {"block", "kind", "name", "start_line", "end_line", "parent"},
+    where `parent` is the index of the enclosing block in the returned list.
+    """
+    if not code.strip():
+        logger.info(f"Empty file {file_name}")
+        return []
+
+    language = file_language(file_name)
+    blocks = []
+    try:
+        if language == 'python':
+            blocks = extract_python_blocks(code)
+        else:
+            blocks = _brace_blocks(code, language)
+    except SyntaxError as e:
+        logger.warning(f"Syntax error parsing file {file_name}: {str(e)}")
+        # For Python files with syntax errors, fall back to the JS rules
+        if language == 'python':
+            logger.info(f"Attempting fallback parsing for {file_name}")
+            blocks = _brace_blocks(code, 'js')
+    except Exception as e:
+        logger.error(f"Error parsing file {file_name}: {str(e)}")
+    return blocks
+
+def extract_files(files: List[Tuple[str, str, str]]) -> List[Dict]:
+    """Extract the blocks of a chunk of (path, name, content) files.
+
+    Module-level so it can run in a worker process. Each block gets its
+    `file` path and `parent` indices point into the returned list.
+    """
+    chunk_blocks = []
+    for path, name, content in files:
+        offset = len(chunk_blocks)
+        for block in extract_file_blocks(content, file_name=name):
+            if block["parent"] is not None:
+                block["parent"] += offset
+            block["file"] = path
+            chunk_blocks.append(block)
+    return chunk_blocks
+
+def _file_chunks(files: Iterable[Dict], chunk_size: int, max_bytes: int) -> Iterator[Tuple[List[Tuple[str, str, str]], int]]:
+    """Group files into (chunk, bytes) pairs, pulling from `files` only as chunks are needed"""
+    chunk, chunk_bytes = [], 0
+    for f in files:
+        content = f.get("content", "")
+        chunk.append((f.get("path") or f.get("name", ""), f.get("name", ""), content))
+        chunk_bytes += f.get("size", len(content))
+        if len(chunk) >= chunk_size or chunk_bytes >= max_bytes:
+            yield chunk, chunk_bytes
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        yield chunk, chunk_bytes
+
+def iter_extracted_chunks(files: Iterable[Dict], pool: Optional[Executor] = None, chunk_size: int = 16,
+                          in_flight: int = 8, max_inflight_bytes: int = 64 * 1024 * 1024) -> Iterator[List[Dict]]:
+    """Yield the blocks of each chunk of {"path", "name", "content"} files in file order.
+
+    `files` may be a lazy iterator: it is only advanced when another chunk
+    can be submitted. At most `in_flight` chunks and `max_inflight_bytes` of
+    source (always at least one chunk) are outstanding, so workers keep
+    parsing while the consumer handles earlier chunks without the whole
+    repository being held in memory. Without a pool, chunks are parsed in
+    the calling thread one at a time.
+    """
+    chunks = _file_chunks(files, max(1, chunk_size), max_inflight_bytes)
+    if pool is None:
+        for chunk, _ in chunks:
+            yield extract_files(chunk)
+        return
+
+    pending = deque()
+    pending_bytes = 0
+    while True:
+        while len(pending) < max(1, in_flight) and (not pending or pending_bytes < max_inflight_bytes):
+            next_chunk = next(chunks, None)
+            if next_chunk is None:
+                break
+            chunk, chunk_bytes = next_chunk
+            pending.append((chunk, chunk_bytes, pool.submit(extract_files, chunk)))
+            pending_bytes += chunk_bytes
+        if not pending:
+            return
+        chunk, chunk_bytes, future = pending.popleft()
+        pending_bytes -= chunk_bytes
+        try:
+            chunk_blocks = future.result()
+        except Exception as e:
+            logger.warning(f"Parse worker failed, parsing {len(chunk)} files in-process: {str(e)}")
+            chunk_blocks = extract_files(chunk)
+        del chunk
+        yield chunk_blocks
@@ -1,13 +1,40 @@
 import os
 import re
+import git
 from git import Repo
 from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 def validate_github_link(github_link: str) -> bool:
     """Validate if the provided link is a GitHub repository URL."""
     pattern = r'https?://github\.com/[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+(?:\.git)?$'
     return bool(re.match(pattern, github_link))
 
+def repo_full_name(github_link: str) -> str:
+    """Return the lowercase "owner/name" identifier of a repository URL."""
+    parts = github_link.rstrip("/").split("/")[-2:]
+    return "/".join(parts).lower().removesuffix(".git")
+
+def normalize_repo_url(github_link: str) -> str:
+    """Canonical form of a repository URL, used as a cache key."""
+    link = github_link.strip().rstrip("/").removesuffix(".git").rstrip("/")
+    link = re.sub(r"^http://", "https://", link)
+    return link.lower()
+
+def remote_head(github_link: str, timeout: int = 15) -> Optional[str]:
+    """Resolve the remote HEAD commit with `git ls-remote`, without cloning."""
+    try:
+        output = git.cmd.Git().ls_remote(github_link, "HEAD", kill_after_timeout=timeout)
+        for line in output.splitlines():
+            sha, _, ref = line.partition("\t")
+            if ref == "HEAD" and sha:
+                return sha
+    except Exception as e:
+        logger.warning(f"git ls-remote failed for {github_link}: {str(e)}")
+    return None
+
 def clone_repo(github_link: str, destination_path: str) -> str:
     """Clone a GitHub repository to the specified destination."""
     try:
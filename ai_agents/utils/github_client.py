@@ -0,0 +1,236 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+
+from ai_agents.utils.metrics import (
+    CACHE_HITS, GITHUB_RATE_LIMIT_WAIT_SECONDS, GITHUB_RATE_LIMIT_WAITS, GITHUB_REQUESTS
+)
+
+logger = logging.getLogger(__name__)
+
+class GitHubAPIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+
+class RateLimiter:
+    """Token bucket per GitHub rate-limit resource ("core", "search", ...).
+
+    The bucket is refilled from the X-RateLimit-* headers of every response:
+    `Remaining` sets the tokens left and `Reset` says when the window refills.
+    Callers only sleep when the bucket is actually empty.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, float]] = {}
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self, resource: str):
+        while True:
+            with self._lock:
+                bucket = self._buckets.get(resource)
+                now = time.time()
+                if bucket is None or bucket["tokens"] >= 1:
+                    if bucket is not None:
+                        bucket["tokens"] -= 1
+                    return
+                if now >= bucket["reset"]:
+                    bucket["tokens"] = bucket["limit"] - 1
+                    return
+                delay = bucket["reset"] - now + 0.5
+                self.waits += 1
+                self.waited_seconds += delay
+            GITHUB_RATE_LIMIT_WAITS.inc()
+            GITHUB_RATE_LIMIT_WAIT_SECONDS.inc(delay)
+            logger.warning(f"GitHub {resource} rate limit exhausted; waiting {delay:.1f}s")
+            time.sleep(delay)
+
+    def update(self, resource: str, headers: Dict[str, str]):
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self._lock:
+            self._buckets[resource] = {"limit": limit, "tokens": remaining, "reset": reset}
+
+class ResponseCache:
+    """On-disk cache of GitHub JSON responses with their ETags."""
+    def __init__(self, db_path: str, ttl_seconds: int):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, etag TEXT, body TEXT NOT NULL, next_url TEXT, stored_at REAL NOT NULL)"
+        )
+        # Stale entries stay around for ETag revalidation, but not forever
+        self._db.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - 24 * ttl_seconds,))
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], str, Optional[str], bool]]:
+        """Return (etag, body, next page URL, fresh) for a cached response, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, body, next_url, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, body, next_url, stored_at = row
+        return etag, body, next_url, time.time() - stored_at < self.ttl_seconds
+
+    def put(self, key: str, etag: Optional[str], body: str, next_url: Optional[str]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, body, next_url, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (key, etag, body, next_url, time.time())
+            )
+            self._db.commit()
+
+    def touch(self, key: str):
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+class GitHubClient:
+    """Pooled GitHub REST client shared by every agent.
+
+    - one keep-alive requests.Session with a sized connection pool
+    - a RateLimiter fed by the live X-RateLimit-* headers
+    - an on-disk ResponseCache: fresh entries skip the network, stale ones
+      are revalidated with If-None-Match (a 304 does not count against the limit)
+    - single-flight: identical in-flight GETs share one HTTP request
+    """
+    def __init__(self, token: Optional[str], base_url: str = "https://api.github.com",
+                 cache_path: str = "github_cache/responses.sqlite", cache_ttl: int = 3600,
+                 pool_size: int = 16, timeout: float = 15.0, max_retries: int = 3):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "RepoRadar"
+        })
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.limiter = RateLimiter()
+        self.cache = ResponseCache(cache_path, cache_ttl)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "coalesced": 0}
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return url
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return json.loads(self._get(self._url(path, params))[0])
+
+    def _get(self, url: str) -> Tuple[str, Optional[str]]:
+        """GET `url`, returning (body, next page URL), deduplicating concurrent calls"""
+        with self._inflight_lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[url] = future
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+        try:
+            result = self._fetch(url)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(url, None)
+
+    def _fetch(self, url: str) -> Tuple[str, Optional[str]]:
+        cached = self.cache.get(url)
+        if cached is not None and cached[3]:
+            self.stats["cache_hits"] += 1
+            CACHE_HITS.labels(cache="github").inc()
+            return cached[1], cached[2]
+        resource = "search" if "/search/" in url else "core"
+        headers = {}
+        if cached is not None and cached[0]:
+            headers["If-None-Match"] = cached[0]
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(resource)
+            self.stats["requests"] += 1
+            GITHUB_REQUESTS.labels(resource=resource).inc()
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            self.limiter.update(resource, response.headers)
+            if response.status_code == 304 and cached is not None:
+                self.stats["not_modified"] += 1
+                CACHE_HITS.labels(cache="github").inc()
+                self.cache.touch(url)
+                return cached[1], cached[2]
+            if response.status_code in (403, 429) and attempt < self.max_retries and (
+                "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"
+            ):
+                # Primary or secondary rate limit: wait as instructed, then retry
+                delay = float(response.headers.get("Retry-After", 0)) or max(
+                    1.0, float(response.headers.get("X-RateLimit-Reset", time.time())) - time.time()
+                )
+                self.limiter.waits += 1
+                self.limiter.waited_seconds += delay
+                GITHUB_RATE_LIMIT_WAITS.inc()
+                GITHUB_RATE_LIMIT_WAIT_SECONDS.inc(delay)
+                logger.warning(f"GitHub rate limited {url}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            if response.status_code >= 400:
+                try:
+                    message = response.json().get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise GitHubAPIError(response.status_code, message)
+            next_url = response.links.get("next", {}).get("url")
+            self.cache.put(url, response.headers.get("ETag"), response.text, next_url)
+            return response.text, next_url
+        raise GitHubAPIError(429, f"Rate limited after {self.max_retries} retries: {url}")
+
+    def search_repositories(self, query: str, sort: str = "stars", order: str = "desc", per_page: int = 30) -> List[Dict]:
+        """First page of repository search results as plain dicts"""
+        data = self.get_json("/search/repositories", {"q": query, "sort": sort, "order": order, "per_page": per_page})
+        return data.get("items", [])
+
+    def get_repo(self, full_name: str) -> Dict:
+        return self.get_json(f"/repos/{full_name}")
+
+    def get_readme(self, full_name: str) -> str:
+        data = self.get_json(f"/repos/{full_name}/readme")
+        return base64.b64decode(data.get("content", "")).decode("utf-8")
+
+    def iter_commits(self, full_name: str, per_page: int = 100) -> Iterator[Dict]:
+        """Yield every commit on the default branch, following Link pagination"""
+        url = self._url(f"/repos/{full_name}/commits", {"per_page": per_page})
+        while url:
+            body, url = self._get(url)
+            yield from json.loads(body)
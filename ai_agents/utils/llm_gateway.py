@@ -0,0 +1,187 @@
+# ai_agents/utils/llm_gateway.py
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import groq
+from groq import AsyncGroq
+import logging
+
+from ai_agents.utils.metrics import CACHE_HITS, LLM_REQUESTS, record_llm_usage
+
+logger = logging.getLogger(__name__)
+
+class LLMError(Exception):
+    pass
+
+class LLMCache:
+    """On-disk cache of chat completions keyed by a hash of (model, messages, params)."""
+    def __init__(self, db_path: str, ttl_seconds: int):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, content TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        if ttl_seconds > 0:
+            self._db.execute("DELETE FROM completions WHERE stored_at < ?", (time.time() - ttl_seconds,))
+        self._db.commit()
+
+    @staticmethod
+    def key(model: str, messages: List[Dict], params: Dict[str, Any]) -> str:
+        payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT content, stored_at FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl_seconds > 0 and time.time() - row[1] > self.ttl_seconds):
+            return None
+        return row[0]
+
+    def put(self, key: str, model: str, content: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, stored_at) VALUES (?, ?, ?, ?)",
+                (key, model, content, time.time())
+            )
+            self._db.commit()
+
+class LLMGateway:
+    """Single path for every Groq chat completion made by the agents.
+
+    - an AsyncGroq client on a background event loop, so blocking callers
+      (agents on worker threads) and async callers share one connection pool
+    - a semaphore bounding in-flight requests across the process
+    - a deadline per call, covering queueing, retries and backoff
+    - retries with full-jitter exponential backoff on 429, 5xx, timeouts and
+      connection errors, honouring Retry-After
+    - an on-disk LLMCache: a repeated prompt never reaches the API
+    - single-flight: identical in-flight prompts share one request
+    """
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 cache_path: str = "llm_cache/completions.sqlite", cache_ttl: int = 30 * 24 * 3600,
+                 max_concurrency: int = 4, timeout: float = 60.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = LLMCache(cache_path, cache_ttl)
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "retries": 0, "failures": 0}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        # Created on the gateway loop, which is the only place they are used
+        self._client: Optional[AsyncGroq] = None
+        self._semaphore = self._run(self._make_semaphore(max_concurrency))
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _make_semaphore(self, max_concurrency: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(max_concurrency)
+
+    def _run(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def complete(self, messages: List[Dict], model: str, deadline: Optional[float] = None, **params) -> str:
+        """Blocking chat completion; returns the reply text or raises LLMError"""
+        return self._run(self._complete(messages, model, deadline, params))
+
+    async def acomplete(self, messages: List[Dict], model: str, deadline: Optional[float] = None, **params) -> str:
+        """complete() for callers on any event loop"""
+        future = asyncio.run_coroutine_threadsafe(self._complete(messages, model, deadline, params), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def _complete(self, messages: List[Dict], model: str, deadline: Optional[float], params: Dict) -> str:
+        key = LLMCache.key(model, messages, params)
+        content = self.cache.get(key)
+        if content is not None:
+            self.stats["cache_hits"] += 1
+            CACHE_HITS.labels(cache="llm").inc()
+            return content
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            try:
+                # Waiters keep their own deadline without cancelling the shared request
+                return await asyncio.wait_for(asyncio.shield(future), deadline or self.timeout)
+            except asyncio.TimeoutError:
+                raise LLMError(f"LLM call to {model} exceeded its {deadline or self.timeout:.0f}s deadline")
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            content = await asyncio.wait_for(self._request(messages, model, params), deadline or self.timeout)
+            self.cache.put(key, model, content)
+            future.set_result(content)
+            return content
+        except asyncio.TimeoutError:
+            self.stats["failures"] += 1
+            LLM_REQUESTS.labels(outcome="timeout").inc()
+            error = LLMError(f"LLM call to {model} exceeded its {deadline or self.timeout:.0f}s deadline")
+            future.set_exception(error)
+            raise error
+        except Exception as e:
+            self.stats["failures"] += 1
+            LLM_REQUESTS.labels(outcome="error").inc()
+            error = e if isinstance(e, LLMError) else LLMError(f"LLM call to {model} failed: {str(e)}")
+            future.set_exception(error)
+            raise error
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                # The owner was cancelled; release anyone coalesced onto it
+                future.set_exception(LLMError(f"LLM call to {model} was cancelled"))
+            # Nobody may be waiting; mark the exception as retrieved
+            future.exception()
+
+    async def _request(self, messages: List[Dict], model: str, params: Dict) -> str:
+        if self._client is None:
+            # The SDK's own retries are replaced by the loop below
+            self._client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.chat.completions.create(messages=messages, model=model, **params)
+                    LLM_REQUESTS.labels(outcome="ok").inc()
+                    record_llm_usage(response)
+                    return response.choices[0].message.content or ""
+                except (groq.RateLimitError, groq.InternalServerError, groq.APITimeoutError, groq.APIConnectionError) as e:
+                    if attempt >= self.max_retries:
+                        raise LLMError(f"LLM call to {model} failed after {attempt + 1} attempts: {str(e)}")
+                    retry_after, status = self._retry_after(e)
+            self.stats["retries"] += 1
+            LLM_REQUESTS.labels(outcome="retry").inc()
+            # Full jitter spreads out callers that failed together
+            delay = retry_after if retry_after is not None else random.uniform(
+                0, min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            )
+            logger.warning(f"LLM call to {model} got {status}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        raise LLMError(f"LLM call to {model} failed")
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Tuple[Optional[float], str]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None, type(error).__name__
+        try:
+            return float(response.headers.get("retry-after")), str(response.status_code)
+        except (TypeError, ValueError):
+            return None, str(response.status_code)
+
+    def close(self):
+        if self._client is not None:
+            self._run(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
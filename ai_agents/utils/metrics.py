@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Tuple
+import logging
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+except ImportError:  # Metrics are optional; without prometheus_client every metric is a no-op
+    Counter = Histogram = None
+
+logger = logging.getLogger(__name__)
+
+class _NoOpMetric:
+    def labels(self, *args, **kwargs) -> "_NoOpMetric":
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, amount: float):
+        pass
+
+def _counter(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    return Counter(name, documentation, labelnames) if Counter is not None else _NoOpMetric()
+
+def _histogram(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    if Histogram is None:
+        return _NoOpMetric()
+    # Stages range from milliseconds (scoring) to minutes (cloning a monorepo)
+    buckets = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+STAGE_SECONDS = _histogram("reporadar_stage_seconds", "Wall time of each analysis stage and span", ("stage",))
+ANALYSIS_SECONDS = _histogram("reporadar_analysis_seconds", "Wall time of a full analysis")
+BLOCKS_PARSED = _counter("reporadar_blocks_parsed_total", "Code blocks extracted from source files")
+BLOCKS_EMBEDDED = _counter("reporadar_blocks_embedded_total", "Code blocks run through the embedding model")
+CACHE_HITS = _counter("reporadar_cache_hits_total", "Lookups served from a cache", ("cache",))
+GITHUB_REQUESTS = _counter("reporadar_github_requests_total", "HTTP requests sent to the GitHub API", ("resource",))
+GITHUB_RATE_LIMIT_WAITS = _counter("reporadar_github_rate_limit_waits_total", "Times a GitHub call waited for the rate limit")
+GITHUB_RATE_LIMIT_WAIT_SECONDS = _counter("reporadar_github_rate_limit_wait_seconds_total", "Seconds spent waiting for the GitHub rate limit")
+LLM_REQUESTS = _counter("reporadar_llm_requests_total", "LLM API calls by outcome (ok, retry, error, timeout)", ("outcome",))
+LLM_TOKENS = _counter("reporadar_llm_tokens_total", "Tokens used by LLM calls", ("kind",))
+FAISS_VECTORS_SEARCHED = _counter("reporadar_faiss_vectors_searched_total", "Vectors compared by FAISS searches", ("index",))
+
+@contextmanager
+def span(stage: str):
+    """Time a block of work into the stage histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+def record_llm_usage(response: Any):
+    """Count the prompt and completion tokens reported by an OpenAI-style response"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(kind="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(kind="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+def metrics_available() -> bool:
+    return Counter is not None
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the Prometheus text exposition of every metric and its content type"""
+    if Counter is None:
+        raise RuntimeError("prometheus_client is not installed")
+    return generate_latest(), CONTENT_TYPE_LATEST
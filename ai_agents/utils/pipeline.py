@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import logging
+
+from ai_agents.utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_running = threading.local()
+
+def mark_degraded(reason: str):
+    """Record that the stage running on this thread substituted a default for a failed step.
+
+    Agents call this where they catch an error and carry on; outside a
+    StageGraph stage it does nothing.
+    """
+    degraded = getattr(_running, "degraded", None)
+    if degraded is not None:
+        degraded.append(reason)
+
+class StageGraph:
+    """Run pipeline stages concurrently as soon as their dependencies finish.
+
+    Each stage is called with its dependencies' results as keyword arguments.
+    A stage that raises is logged and replaced by its fallback value (or the
+    fallback callable's return value), so one failure never stops the others.
+    Such stages, and those that called mark_degraded(), are reported by run().
+    """
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...], Any]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Iterable[str] = (), fallback: Any = None):
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self._stages[name] = (func, deps, fallback)
+
+    def _run_stage(self, name: str, kwargs: Dict[str, Any]) -> Tuple[Any, float, bool]:
+        func, _, fallback = self._stages[name]
+        start = time.perf_counter()
+        _running.degraded = []
+        try:
+            result = func(**kwargs)
+            fell_back = bool(_running.degraded)
+            if fell_back:
+                logger.warning(f"Stage {name} degraded: {'; '.join(_running.degraded)}")
+        except Exception as e:
+            logger.error(f"Stage {name} failed: {str(e)}")
+            result = fallback() if callable(fallback) else fallback
+            fell_back = True
+        finally:
+            _running.degraded = None
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+        return result, seconds, fell_back
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+        """Execute every stage; return (results, seconds spent per stage, stages that fell back)"""
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        fallbacks: List[str] = []
+        pending = dict(self._stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                for name, (_, deps, _) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        del pending[name]
+                        kwargs = {dep: results[dep] for dep in deps}
+                        running[executor.submit(self._run_stage, name, kwargs)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], timings[name], fell_back = future.result()
+                    if fell_back:
+                        fallbacks.append(name)
+        logger.info("Stage timings: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()))
+        return results, timings, fallbacks
@@ -1,63 +1,117 @@
 import os
+import threading
 from typing import Optional
-from fastapi import Depends
-import git
-import faiss
-from transformers import AutoTokenizer, AutoModel
-import torch
-from sentence_transformers import SentenceTransformer
-from github import Github
-import pandas as pd
-from jinja2 import Environment, FileSystemLoader
 from dotenv import load_dotenv
 import logging
 
+from ai_agents.models.pipeline_config import PipelineConfig
+from ai_agents.models.registry import ModelRegistry, get_registry
+from ai_agents.utils.metrics import CACHE_HITS
+
 logger = logging.getLogger(__name__)
 
 # Load .env file
 load_dotenv()
 
 class AgentManager:
-    def __init__(self):
+    def __init__(self, registry: Optional[ModelRegistry] = None):
         self.agents = {}
         self.temp_dir = "temp_repos"
         self.faiss_index_path = "faiss_index"
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.faiss_index_path, exist_ok=True)
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            logger.error("GITHUB_TOKEN not found in environment")
-            raise ValueError("GITHUB_TOKEN environment variable is required")
-        self.g = Github(github_token)
+        self.registry = registry or get_registry()
+        self.g = self.registry.github_client
         logger.info("AgentManager initialized")
 
-    async def analyze(self, github_link: str):
+    @staticmethod
+    def _to_response(analysis: dict, repo_url: str) -> dict:
+        from ai_agents.agents.report_generator import ReportGenerator
+        from ai_agents.models.report_store import ReportStore
+
+        report_id = ReportStore.report_id(repo_url, analysis.get("commit_hash"), PipelineConfig.PIPELINE_VERSION)
+        return {
+            "originality_score": analysis.get("originality_score", 85.0),
+            "verdict": analysis.get("verdict", "Original"),
+            "similar_projects": analysis.get("similar_projects", []),
+            "copied_blocks": [
+                {
+                    "target_block": block.get("target_block", ""),
+                    "distance": block.get("distance", 1.0),
+                    "similar_to": block.get("similar_to", "Unknown"),
+                    "target_file": block.get("target_file"),
+                    "target_lines": block.get("target_lines"),
+                    "similar_repo": block.get("similar_repo"),
+                    "similar_file": block.get("similar_file"),
+                    "similar_lines": block.get("similar_lines"),
+                    "match_type": block.get("match_type")
+                } for block in analysis.get("copied_blocks", [])
+            ],
+            "idea_summary": analysis.get("idea_summary", "No summary available"),
+            "report_url": analysis.get("report_url") or ReportGenerator.report_url(report_id),
+            "stage_timings": analysis.get("stage_timings")
+        }
+
+    def run_analysis(self, github_link: str, force: bool = False):
         from ai_agents.agents import run_full_analysis
-        from ai_agents.utils.github_api import validate_github_link
+        from ai_agents.utils.github_api import validate_github_link, normalize_repo_url, remote_head
 
         if not validate_github_link(github_link):
             raise ValueError("Invalid GitHub repository URL")
 
+        # A cheap `git ls-remote` tells us whether this exact commit was already analyzed
+        repo_url = normalize_repo_url(github_link)
+        version = PipelineConfig.PIPELINE_VERSION
+        head = None
+        if not force:
+            head = remote_head(github_link)
+            cached = self.registry.result_store.get(repo_url, head, version) if head else None
+            if cached is not None:
+                CACHE_HITS.labels(cache="result").inc()
+                logger.info(f"Serving stored analysis of {repo_url}@{head[:12]}")
+                # Stage timings were measured for the run that stored it, not this request
+                return self._to_response(dict(cached, stage_timings=None), repo_url)
+
         try:
-            analysis = run_full_analysis(github_link)
+            analysis = run_full_analysis(github_link, self.registry)
             logger.info(f"Analysis completed for {github_link}: {analysis}")
-            return {
-                "originality_score": analysis.get("originality_score", 85.0),
-                "verdict": analysis.get("verdict", "Original"),
-                "similar_projects": analysis.get("similar_projects", []),
-                "copied_blocks": [
-                    {
-                        "target_block": block.get("target_block", ""),
-                        "distance": block.get("distance", 1.0),
-                        "similar_to": block.get("similar_to", "Unknown")
-                    } for block in analysis.get("copied_blocks", [])
-                ],
-                "idea_summary": analysis.get("idea_summary", "No summary available"),
-                "report_url": analysis.get("report_url", "http://localhost:8000/static/report.txt")
-            }
         except Exception as e:
             logger.error(f"Analysis failed for {github_link}: {str(e)}")
             raise
 
+        commit_hash = analysis.get("commit_hash") or head
+        if analysis.get("degraded_stages"):
+            # A rate limit or outage must not be served as this commit's result until it expires
+            logger.warning(f"Not storing analysis of {repo_url}: degraded stages {analysis['degraded_stages']}")
+        elif commit_hash and commit_hash != "unknown":
+            self.registry.result_store.put(repo_url, commit_hash, version, analysis)
+        return self._to_response(analysis, repo_url)
+
+_agent_manager: Optional[AgentManager] = None
+_agent_manager_lock = threading.Lock()
+
 def get_agent_manager():
-    return AgentManager()
\ No newline at end of file
+    # A single AgentManager per process; it only holds references into the registry
+    global _agent_manager
+    if _agent_manager is None:
+        with _agent_manager_lock:
+            if _agent_manager is None:
+                _agent_manager = AgentManager()
+    return _agent_manager
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    from .jobs import JobManager
+
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager(
+                    get_agent_manager(),
+                    max_workers=PipelineConfig.ANALYSIS_WORKERS,
+                    max_pending=PipelineConfig.JOB_QUEUE_LIMIT
+                )
+    return _job_manager
@@ -0,0 +1,100 @@
+# backend/app/jobs.py
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+import logging
+
+from ai_agents.models.pipeline_config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when too many analyses are already waiting for a worker."""
+
+class JobManager:
+    """Runs analyses on a bounded thread pool and tracks their status by job id.
+
+    Threads (not processes) are used so every job shares the models held by
+    the process-wide registry.
+    """
+    def __init__(self, agent_manager, max_workers: int = 2, max_pending: int = 32,
+                 history_size: Optional[int] = None):
+        self.agent_manager = agent_manager
+        self.max_pending = max_pending
+        self.history_size = history_size or PipelineConfig.JOB_HISTORY_SIZE
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+
+    def _prune(self):
+        # Forget the oldest finished jobs once the history is full
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("completed", "failed")]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            self._jobs.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+    def submit(self, github_link: str, force: bool = False) -> str:
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} analyses already pending")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "github_link": github_link,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None
+            }
+            self._prune()
+            self._futures[job_id] = self.executor.submit(self._run, job_id, github_link, force)
+        logger.info(f"Queued analysis job {job_id} for {github_link}")
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        # Each transition is applied under the lock, so get() never sees half of one
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _run(self, job_id: str, github_link: str, force: bool) -> Dict:
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = self.agent_manager.run_analysis(github_link, force=force)
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {str(e)}")
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            raise
+        self._update(job_id, status="completed", result=result, finished_at=time.time())
+        return result
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    async def wait(self, job_id: str) -> Dict:
+        """Await a job's result without blocking the event loop"""
+        with self._lock:
+            future = self._futures[job_id]
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        # Jobs that never reached a worker would otherwise stay "queued" forever
+        now = time.time()
+        with self._lock:
+            for job_id, future in self._futures.items():
+                if future.cancelled():
+                    self._jobs[job_id].update(status="failed", error="Cancelled at server shutdown", finished_at=now)
@@ -1,16 +1,42 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from .models import GitHubLink, AnalysisResult
-from .dependencies import get_agent_manager, AgentManager
+from fastapi.responses import FileResponse, JSONResponse, Response
+from contextlib import asynccontextmanager
+from .models import GitHubLink, AnalysisResult, JobCreated, JobStatus
+from .dependencies import get_job_manager
+from .jobs import JobManager, JobQueueFull
+from ai_agents.models.registry import get_registry
+from ai_agents.models.report_store import REPORT_ID
+from ai_agents.utils.github_api import validate_github_link
+from ai_agents.utils.metrics import metrics_available, render_metrics
 from fastapi import Depends
+import asyncio
 import os
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Project Uniqueness Checker API", description="API to analyze GitHub projects for originality")
+def _log_warm_up_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Model registry warm-up failed: {str(task.exception())}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and clients once per process, off the event loop, so /health
+    # keeps answering while /ready reports progress
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(get_registry().warm_up))
+    app.state.warm_up_task.add_done_callback(_log_warm_up_result)
+    yield
+    get_job_manager().shutdown()
+    get_registry().report_store.shutdown()
+
+app = FastAPI(
+    title="Project Uniqueness Checker API",
+    description="API to analyze GitHub projects for originality",
+    lifespan=lifespan
+)
 
 # CORS middleware
 app.add_middleware(
@@ -25,20 +51,82 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "../../static")), name="static")
 
 @app.post("/analyze", response_model=AnalysisResult)
-async def analyze_project(github_link: GitHubLink, agent_manager: AgentManager = Depends(get_agent_manager)):
+async def analyze_project(github_link: GitHubLink, job_manager: JobManager = Depends(get_job_manager)):
+    # Thin wrapper over the job API: submit, then wait for the result without blocking the loop
     logger.info(f"Received request to analyze: {github_link.github_link}")
     try:
-        result = await agent_manager.analyze(github_link.github_link)
+        job_id = job_manager.submit(github_link.github_link, force=github_link.force)
+        result = await job_manager.wait(job_id)
         logger.info(f"Analysis result: {result}")
         return AnalysisResult(**result)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}")
     except Exception as e:
         logger.error(f"Error analyzing project: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing project: {str(e)}")
 
+@app.post("/jobs", response_model=JobCreated, status_code=202)
+async def create_job(github_link: GitHubLink, job_manager: JobManager = Depends(get_job_manager)):
+    if not validate_github_link(github_link.github_link):
+        raise HTTPException(status_code=400, detail="Invalid GitHub repository URL")
+    try:
+        job_id = job_manager.submit(github_link.github_link, force=github_link.force)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}")
+    return JobCreated(job_id=job_id, status="queued")
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return JobStatus(**job)
+
+@app.get("/reports/{report_id}")
+async def get_report(report_id: str):
+    # The PDF is converted on first request (if the background queue has not already)
+    # and kept on disk; without wkhtmltopdf the HTML, or the bare text, is served instead
+    store = get_registry().report_store
+    if not REPORT_ID.match(report_id) or not store.exists(report_id):
+        raise HTTPException(status_code=404, detail=f"Unknown report {report_id}")
+    if store.exists(report_id, "report.html"):
+        try:
+            pdf_path = await asyncio.wrap_future(store.request_pdf(report_id))
+            return FileResponse(pdf_path, media_type="application/pdf", filename=f"report-{report_id}.pdf",
+                                content_disposition_type="inline")
+        except Exception as e:
+            logger.error(f"Error generating PDF for report {report_id}: {str(e)}")
+            return FileResponse(store.path(report_id, "report.html"), media_type="text/html")
+    return FileResponse(store.path(report_id, "report.txt"), media_type="text/plain")
+
+@app.get("/reports/{report_id}/html")
+async def get_report_html(report_id: str):
+    store = get_registry().report_store
+    if not REPORT_ID.match(report_id) or not store.exists(report_id, "report.html"):
+        raise HTTPException(status_code=404, detail=f"No HTML for report {report_id}")
+    return FileResponse(store.path(report_id, "report.html"), media_type="text/html")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    registry = get_registry()
+    if registry.warm_up_error is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": registry.warm_up_error})
+    if not registry.is_ready:
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+    return {"status": "ready"}
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus scrape endpoint: stage latency histograms and pipeline counters
+    if not metrics_available():
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=3000, reload=True)
@@ -1,14 +1,17 @@
 # backend/app/models.py
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 class GitHubLink(BaseModel):
     github_link: str
+    # Re-run the analysis even if this commit was analyzed recently
+    force: bool = False
 
     class Config:
         json_schema_extra = {
             "example": {
-                "github_link": "https://github.com/user/repo"
+                "github_link": "https://github.com/user/repo",
+                "force": False
             }
         }
 
@@ -16,6 +19,14 @@ class CopiedBlock(BaseModel):
     target_block: str
     distance: float
     similar_to: str
+    # Where the block and its match live, as [start_line, end_line]
+    target_file: Optional[str] = None
+    target_lines: Optional[List[int]] = None
+    similar_repo: Optional[str] = None
+    similar_file: Optional[str] = None
+    similar_lines: Optional[List[int]] = None
+    # "fingerprint" for near-verbatim copies, "embedding" for dense matches
+    match_type: Optional[str] = None
 
 class AnalysisResult(BaseModel):
     originality_score: float
@@ -24,6 +35,8 @@ class AnalysisResult(BaseModel):
     copied_blocks: List[CopiedBlock]
     idea_summary: str
     report_url: str
+    # Seconds per pipeline stage for the run that produced this result
+    stage_timings: Optional[Dict[str, float]] = None
 
     class Config:
         json_schema_extra = {
@@ -39,6 +52,20 @@ class AnalysisResult(BaseModel):
                     }
                 ],
                 "idea_summary": "AI chatbot for students",
-                "report_url": "http://localhost:8000/static/report.pdf"
+                "report_url": "http://localhost:8000/reports/0f8e2c1d9a7b4c3e5f6a7b8c9d0e1f2a"
             }
-        }
\ No newline at end of file
+        }
+
+class JobCreated(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    github_link: str
+    status: str
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,84 @@
+# benchmarks/bench_ann.py
+"""Recall@k and query latency of the HNSW and IVF-PQ tiers against exact flat search.
+
+Vectors are drawn around random cluster centres, like embeddings of code
+that shares idioms. Each tier is forced by its size thresholds and swept
+over efSearch or nprobe; recall is the share of the flat top-k recovered.
+
+    python -m benchmarks.bench_ann --sizes 50000 200000 --dim 384 --k 10
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from ai_agents.models.ann_index import AnnIndex
+
+def clustered_vectors(count: int, dim: int, clusters: int, spread: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=count)
+    return centres[assignments] + spread * rng.standard_normal((count, dim)).astype(np.float32)
+
+def index_bytes(index: AnnIndex) -> int:
+    return os.path.getsize(index._path(index.generation, "faiss"))
+
+def measure(index: AnnIndex, queries: np.ndarray, truth: np.ndarray, k: int, **search_args) -> Dict:
+    start = time.perf_counter()
+    _, ids = index.search(queries, k, **search_args)
+    seconds = time.perf_counter() - start
+    recall = np.mean([len(np.intersect1d(found, expected)) / k for found, expected in zip(ids, truth)])
+    return {"recall_at_k": float(recall), "ms_per_query": seconds * 1000 / len(queries)}
+
+def run(sizes: List[int], dim: int, k: int, queries: int, ef_search: List[int], nprobe: List[int],
+        refine_factor: int) -> Dict:
+    results = {}
+    for size in sizes:
+        vectors = clustered_vectors(size + queries, dim, clusters=max(10, size // 500), spread=0.6, seed=size)
+        corpus, probe = vectors[:size], vectors[size:]
+        tiers = {
+            "flat": {"hnsw_min": size + 1, "ivfpq_min": size + 1},
+            "hnsw": {"hnsw_min": 0, "ivfpq_min": size + 1},
+            "ivfpq": {"hnsw_min": 0, "ivfpq_min": 0}
+        }
+        report = {}
+        truth = None
+        with tempfile.TemporaryDirectory() as root:
+            for tier, thresholds in tiers.items():
+                start = time.perf_counter()
+                index = AnnIndex(root, tier, dim, label="bench", refine_factor=refine_factor, **thresholds)
+                index.add(range(size), corpus)
+                build_seconds = time.perf_counter() - start
+                entry = {"build_seconds": build_seconds, "index_bytes": index_bytes(index)}
+                if tier == "flat":
+                    # Exact search is the ground truth the other tiers are scored against
+                    start = time.perf_counter()
+                    _, truth = index.search(probe, k)
+                    entry["ms_per_query"] = (time.perf_counter() - start) * 1000 / queries
+                elif tier == "hnsw":
+                    entry["sweep"] = {ef: measure(index, probe, truth, k, ef_search=ef) for ef in ef_search}
+                else:
+                    entry["sweep"] = {n: measure(index, probe, truth, k, nprobe=n) for n in nprobe}
+                report[tier] = entry
+        results[size] = report
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000])
+    arg_parser.add_argument("--dim", type=int, default=384)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    arg_parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    arg_parser.add_argument("--refine-factor", type=int, default=10, help="IVF-PQ candidates re-ranked exactly, per result")
+    args = arg_parser.parse_args()
+    results = run(args.sizes, args.dim, args.k, args.queries, args.ef_search, args.nprobe, args.refine_factor)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
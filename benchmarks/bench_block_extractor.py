@@ -0,0 +1,115 @@
+# benchmarks/bench_block_extractor.py
+"""Block extraction time of the old regex patterns versus the linear-time extractor.
+
+Realistic files are generated by benchmarks.synthetic; the adversarial inputs
+(long identifier runs, unclosed braces, modifier soup) are the shapes that make
+the lazy `[\\s\\S]*?\\}` and nested `(?:\\w+\\s+)+` patterns scan super-linearly, plus
+unclosed regex literal classes, which would have the extractor rescan a line per `/`.
+Each legacy run happens in a child process that is killed after --timeout seconds.
+
+    python -m benchmarks.bench_block_extractor --sizes 2000 8000 32000 --timeout 20
+"""
+import argparse
+import multiprocessing
+import random
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from ai_agents.utils.block_extractor import extract_blocks
+from benchmarks.synthetic import c_function, java_class, js_function
+
+# The patterns CodeParser used before the extractor replaced them
+LEGACY_PATTERNS = {
+    'js': [
+        r'(function\s+\w+\s*\([^)]*\)\s*\{[\s\S]*?\})',
+        r'(const|let|var)\s+(\w+)\s*=\s*(?:function\s*)?\([^)]*\)\s*(?:=>)?\s*\{[\s\S]*?\}',
+        r'(class\s+\w+(?:\s+extends\s+\w+)?\s*\{[\s\S]*?\})'
+    ],
+    'java': [
+        r'((?:public|protected|private|static|final)?\s+(?:\w+\s+)*\w+\s+\w+\s*\([^)]*\)\s*(?:throws\s+[\w,\s]+)?\s*\{[\s\S]*?\})',
+        r'((?:public|protected|private)?\s+(?:abstract|final|static)?\s*class\s+\w+(?:\s+extends\s+\w+)?(?:\s+implements\s+[\w,\s]+)?\s*\{[\s\S]*?\})'
+    ],
+    'c': [
+        r'((?:\w+\s+)+\w+\s*\([^)]*\)\s*\{[\s\S]*?\})',
+        r'(typedef\s+struct\s*\{[\s\S]*?\}\s*\w+\s*;)',
+        r'(class\s+\w+(?:\s*:\s*(?:public|private|protected)\s+\w+)?\s*\{[\s\S]*?\}\s*;?)'
+    ]
+}
+
+def legacy_extract(code: str, language: str) -> List[str]:
+    return [match.group(0) for pattern in LEGACY_PATTERNS[language] for match in re.finditer(pattern, code)]
+
+def _repeat_to(unit: str, size: int) -> str:
+    return unit * max(1, size // len(unit))
+
+def _generated(make: Callable[[random.Random], str], size: int) -> str:
+    rng = random.Random(0)
+    parts, total = [], 0
+    while total < size:
+        parts.append(make(rng))
+        total += len(parts[-1]) + 1
+    return "\n".join(parts)
+
+# name -> (language, generator of roughly `size` characters)
+INPUTS = {
+    "js_realistic": ("js", lambda size: _generated(lambda rng: js_function(rng, rng.randint(3, 30)), size)),
+    "java_realistic": ("java", lambda size: _generated(lambda rng: java_class(rng, 4, rng.randint(3, 20)), size)),
+    "c_realistic": ("c", lambda size: _generated(lambda rng: c_function(rng, rng.randint(3, 30)), size)),
+    "c_identifier_run": ("c", lambda size: _repeat_to("unsigned ", size) + "f("),
+    "js_unclosed": ("js", lambda size: _repeat_to("function f(a) {\n  a = a + 1;\n", size)),
+    "java_modifier_soup": ("java", lambda size: _repeat_to("public static final ", size) + "int f() {"),
+    # Unclosed regex character classes on one line: every `/` could start a literal
+    "js_unclosed_regex_class": ("js", lambda size: _repeat_to("x=/[", size)),
+}
+
+def _legacy_worker(code: str, language: str, queue):
+    start = time.perf_counter()
+    blocks = legacy_extract(code, language)
+    queue.put((time.perf_counter() - start, len(blocks)))
+
+def time_legacy(code: str, language: str, timeout: float) -> Optional[Dict]:
+    """Run the legacy regexes in a child process; None if it exceeded `timeout`"""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_legacy_worker, args=(code, language, queue), daemon=True)
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    seconds, blocks = queue.get()
+    return {"seconds": seconds, "blocks": blocks}
+
+def run(sizes: List[int], timeout: float) -> Dict:
+    results = {}
+    for name, (language, make) in INPUTS.items():
+        for size in sizes:
+            code = make(size)
+            start = time.perf_counter()
+            blocks = extract_blocks(code, language)
+            seconds = time.perf_counter() - start
+            results[f"{name}/{size}"] = {
+                "chars": len(code),
+                "extractor": {"seconds": seconds, "blocks": len(blocks)},
+                "legacy": time_legacy(code, language, timeout)
+            }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000])
+    arg_parser.add_argument("--timeout", type=float, default=20.0)
+    args = arg_parser.parse_args()
+
+    results = run(args.sizes, args.timeout)
+    print(f"{'input':<28}{'chars':>8}{'extractor s':>13}{'blocks':>8}{'legacy s':>11}{'blocks':>8}")
+    for name, row in results.items():
+        legacy = row["legacy"]
+        legacy_seconds = f"{legacy['seconds']:.3f}" if legacy else f">{args.timeout:g}"
+        legacy_blocks = legacy["blocks"] if legacy else "-"
+        print(f"{name:<28}{row['chars']:>8}{row['extractor']['seconds']:>13.4f}{row['extractor']['blocks']:>8}"
+              f"{legacy_seconds:>11}{legacy_blocks:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_block_store.py
+"""Random-access latency of block texts: the mmap'd BlockStore versus a SQLite text column.
+
+Both stores hold the same synthetic blocks; lookups draw random ids, as
+FAISS hits do. The block store's cost should stay flat as the corpus grows.
+
+    python -m benchmarks.bench_block_store --sizes 10000 100000 500000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List
+
+from ai_agents.models.block_store import BlockStore
+from benchmarks.synthetic import python_blocks
+
+def run(sizes: List[int], lookups: int, batch: int) -> Dict:
+    results = {}
+    templates = python_blocks(500, max_lines=30)
+    rng = random.Random(0)
+    for size in sizes:
+        texts = [templates[i % len(templates)] + f"\n# {i}" for i in range(size)]
+        with tempfile.TemporaryDirectory() as root:
+            start = time.perf_counter()
+            store = BlockStore(root)
+            store.append(range(size), texts)
+            store_write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            db = sqlite3.connect(os.path.join(root, "blocks.sqlite"))
+            db.execute("CREATE TABLE blocks (id INTEGER PRIMARY KEY, block TEXT NOT NULL)")
+            db.executemany("INSERT INTO blocks VALUES (?, ?)", enumerate(texts))
+            db.commit()
+            sqlite_write = time.perf_counter() - start
+
+            queries = [[rng.randrange(size) for _ in range(batch)] for _ in range(lookups // batch)]
+            start = time.perf_counter()
+            for ids in queries:
+                store.get_many(ids)
+            store_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for ids in queries:
+                db.execute(f"SELECT id, block FROM blocks WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall()
+            sqlite_seconds = time.perf_counter() - start
+            db.close()
+        results[size] = {
+            "block_store_write_seconds": store_write,
+            "sqlite_write_seconds": sqlite_write,
+            "block_store_us_per_lookup": store_seconds * 1e6 / (len(queries) * batch),
+            "sqlite_us_per_lookup": sqlite_seconds * 1e6 / (len(queries) * batch)
+        }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    arg_parser.add_argument("--lookups", type=int, default=20000)
+    arg_parser.add_argument("--batch", type=int, default=50, help="ids per lookup call, like one compare()")
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.sizes, args.lookups, args.batch), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_embedding.py
+"""Blocks/sec of batched CodeBERT embedding versus the block-at-a-time path.
+
+    python -m benchmarks.bench_embedding --blocks 500 --batch-sizes 8 32 64
+    python -m benchmarks.bench_embedding --tiny   # offline, random small model
+"""
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+from ai_agents.agents.code_parser import CodeParser
+from ai_agents.models.registry import get_registry
+from benchmarks.synthetic import python_blocks
+
+def embed_one_by_one(parser: CodeParser, blocks: List[str]) -> List[np.ndarray]:
+    """The original parse_code loop: one unpadded forward pass per block"""
+    embeddings = []
+    for block in blocks:
+        inputs = parser.tokenizer(block, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        inputs = {k: v.to(parser.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = parser.model(**inputs)
+            embeddings.append(outputs.last_hidden_state.mean(dim=1).cpu().numpy())
+    return embeddings
+
+def run(blocks: int, batch_sizes: List[int], tiny: bool = False) -> Dict:
+    registry = get_registry()
+    if tiny:
+        from benchmarks.tiny_models import install_tiny_codebert
+        install_tiny_codebert(registry)
+    parser = CodeParser(registry)
+    corpus = python_blocks(blocks)
+
+    start = time.perf_counter()
+    baseline = embed_one_by_one(parser, corpus)
+    baseline_seconds = time.perf_counter() - start
+    results = {
+        "blocks": len(corpus),
+        "one_by_one": {"seconds": baseline_seconds, "blocks_per_sec": len(corpus) / baseline_seconds},
+        "batched": {}
+    }
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        records = parser.embed_blocks(corpus, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        drift = max(float(np.abs(r["embedding"] - b).max()) for r, b in zip(records, baseline))
+        results["batched"][batch_size] = {
+            "seconds": seconds,
+            "blocks_per_sec": len(records) / seconds,
+            "speedup": baseline_seconds / seconds,
+            "max_abs_diff": drift
+        }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--blocks", type=int, default=300)
+    arg_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    arg_parser.add_argument("--tiny", action="store_true", help="use a random small RoBERTa (offline)")
+    args = arg_parser.parse_args()
+
+    results = run(args.blocks, args.batch_sizes, tiny=args.tiny)
+    print(f"{'path':<14}{'blocks/sec':>12}{'speedup':>10}{'max |diff|':>14}")
+    print(f"{'one-by-one':<14}{results['one_by_one']['blocks_per_sec']:>12.1f}{1.0:>10.2f}{0.0:>14.2e}")
+    for batch_size, row in results["batched"].items():
+        print(f"{'batch=' + str(batch_size):<14}{row['blocks_per_sec']:>12.1f}{row['speedup']:>10.2f}{row['max_abs_diff']:>14.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_embedding_backends.py
+"""Latency, throughput and parity of the embedding backends against fp32 PyTorch.
+
+Every backend embeds the same blocks in length-sorted batches; cosine drift
+is measured per block against the fp32 vectors. The run fails (exit code 1)
+when a backend's worst-case drift exceeds --max-drift, so it doubles as the
+parity check for a new backend or model.
+
+    python -m benchmarks.bench_embedding_backends --tiny --blocks 300
+    python -m benchmarks.bench_embedding_backends --backends torch onnx --max-drift 0.01
+"""
+import argparse
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from ai_agents.models.embedding_backend import BACKENDS, create_backend
+from ai_agents.models.pipeline_config import PipelineConfig
+from benchmarks.synthetic import python_blocks
+
+def _batches(tokenizer, blocks: List[str], batch_size: int):
+    encodings = tokenizer(blocks, truncation=True, max_length=512)
+    order = sorted(range(len(blocks)), key=lambda i: len(encodings["input_ids"][i]))
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        features = [{name: encodings[name][i] for name in ("input_ids", "attention_mask")} for i in rows]
+        padded = tokenizer.pad(features, padding=True, return_tensors="np")
+        yield rows, padded["input_ids"], padded["attention_mask"]
+
+def embed_all(backend, tokenizer, blocks: List[str], batch_size: int) -> Dict:
+    vectors = np.zeros((len(blocks), 0), dtype=np.float32)
+    latencies = []
+    start = time.perf_counter()
+    for rows, input_ids, attention_mask in _batches(tokenizer, blocks, batch_size):
+        batch_start = time.perf_counter()
+        pooled = backend.embed(input_ids, attention_mask)
+        latencies.append(time.perf_counter() - batch_start)
+        if vectors.shape[1] == 0:
+            vectors = np.zeros((len(blocks), pooled.shape[1]), dtype=np.float32)
+        vectors[rows] = pooled
+    seconds = time.perf_counter() - start
+    return {"vectors": vectors, "seconds": seconds, "latencies": latencies}
+
+def run(blocks: int, batch_size: int, backends: List[str], tiny: bool) -> Dict:
+    if tiny:
+        from benchmarks.tiny_models import tiny_codebert
+        tokenizer, model = tiny_codebert()
+        model_id = "tiny-roberta"
+    else:
+        from transformers import AutoModel, AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(PipelineConfig.CODEBERT_MODEL)
+        model = AutoModel.from_pretrained(PipelineConfig.CODEBERT_MODEL).eval()
+        model_id = PipelineConfig.CODEBERT_MODEL
+    import torch
+    corpus = python_blocks(blocks)
+
+    results = {}
+    reference = None
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for name in ["torch"] + [b for b in backends if b != "torch"]:
+            start = time.perf_counter()
+            backend = create_backend(name, model, torch.device("cpu"), model_id, onnx_dir=onnx_dir)
+            setup = time.perf_counter() - start
+            # One warm-up batch so lazy initialisation is not timed
+            embed_all(backend, tokenizer, corpus[:batch_size], batch_size)
+            run_result = embed_all(backend, tokenizer, corpus, batch_size)
+            vectors = run_result["vectors"]
+            if reference is None:
+                reference = vectors
+            cosine = (vectors * reference).sum(axis=1) / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+            )
+            results[name] = {
+                "setup_seconds": setup,
+                "blocks_per_sec": len(corpus) / run_result["seconds"],
+                "p50_batch_ms": float(np.percentile(run_result["latencies"], 50) * 1000),
+                "p95_batch_ms": float(np.percentile(run_result["latencies"], 95) * 1000),
+                "max_cosine_drift": float((1 - cosine).max()),
+                "mean_cosine_drift": float((1 - cosine).mean())
+            }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--blocks", type=int, default=300)
+    arg_parser.add_argument("--batch-size", type=int, default=32)
+    arg_parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    arg_parser.add_argument("--tiny", action="store_true", help="use a random small RoBERTa (offline)")
+    arg_parser.add_argument("--max-drift", type=float, default=0.02, help="fail above this 1 - cosine")
+    args = arg_parser.parse_args()
+
+    results = run(args.blocks, args.batch_size, args.backends, args.tiny)
+    print(f"{'backend':<12}{'setup s':>9}{'blocks/sec':>12}{'p50 ms':>9}{'p95 ms':>9}{'max drift':>12}{'mean drift':>12}")
+    for name, row in results.items():
+        print(f"{name:<12}{row['setup_seconds']:>9.2f}{row['blocks_per_sec']:>12.1f}{row['p50_batch_ms']:>9.1f}"
+              f"{row['p95_batch_ms']:>9.1f}{row['max_cosine_drift']:>12.2e}{row['mean_cosine_drift']:>12.2e}")
+    failed = [name for name, row in results.items() if row["max_cosine_drift"] > args.max_drift]
+    if failed:
+        print(f"Cosine drift above {args.max_drift} for: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
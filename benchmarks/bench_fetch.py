@@ -0,0 +1,47 @@
+# benchmarks/bench_fetch.py
+"""Bytes transferred and wall time of a sparse RepoFetcher clone versus a full clone.
+
+    python -m benchmarks.bench_fetch --source-files 200 --binary-mb 50
+"""
+import argparse
+import tempfile
+import time
+from typing import Dict
+
+from ai_agents.agents.repo_fetcher import RepoFetcher
+from benchmarks.fixtures import make_bare_repo, directory_bytes
+
+def run(source_files: int, binary_mb: int, commits: int) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        url = make_bare_repo(root, source_files=source_files, binary_mb=binary_mb, commits=commits)
+        for mode in ("full", "sparse"):
+            fetcher = RepoFetcher(temp_dir=f"{root}/clones_{mode}", mode=mode)
+            start = time.perf_counter()
+            metadata = fetcher.fetch_repo(url)
+            seconds = time.perf_counter() - start
+            clone_path = metadata["path"]
+            results[mode] = {
+                "seconds": seconds,
+                # Objects git had to receive, and what ended up in the working tree
+                "object_bytes": directory_bytes(clone_path, ".git/objects"),
+                "checkout_bytes": directory_bytes(clone_path) - directory_bytes(clone_path, ".git"),
+                "source_files": len(metadata["files"])
+            }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--source-files", type=int, default=100)
+    arg_parser.add_argument("--binary-mb", type=int, default=30)
+    arg_parser.add_argument("--commits", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    results = run(args.source_files, args.binary_mb, args.commits)
+    print(f"{'mode':<8}{'seconds':>10}{'objects MB':>12}{'checkout MB':>13}{'files':>7}")
+    for mode, row in results.items():
+        print(f"{mode:<8}{row['seconds']:>10.2f}{row['object_bytes'] / 1e6:>12.2f}"
+              f"{row['checkout_bytes'] / 1e6:>13.2f}{row['source_files']:>7}")
+
+if __name__ == "__main__":
+    main()
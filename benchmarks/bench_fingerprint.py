@@ -0,0 +1,78 @@
+# benchmarks/bench_fingerprint.py
+"""Precision, recall and lookup latency of the winnowing fingerprint index.
+
+A donor repository is indexed and a suspect repository, with
+--duplicate-fraction of its functions copied from the donor, is matched
+against it. Identifiers are renamed in every suspect block first, which
+normalization should see through.
+
+    python -m benchmarks.bench_fingerprint --files 400 --k 25 --window 10
+"""
+import argparse
+import json
+import re
+import tempfile
+import time
+from typing import Dict, List
+
+from ai_agents.models.fingerprint_index import FingerprintIndex
+from ai_agents.utils.block_extractor import extract_files
+from benchmarks.synthetic import synthetic_repo
+
+def disguise(code: str) -> str:
+    """Rename identifiers drawn from part of the synthetic vocabulary"""
+    return re.sub(r"\b(data|value|items|result|count|user|config|score)\b", lambda m: f"{m.group()}_v2", code)
+
+def functions(files: List[Dict]) -> List[Dict]:
+    return [b for b in extract_files([(f["path"], f["name"], f["content"]) for f in files]) if b["kind"] == "function"]
+
+def run(files: int, duplicate_fraction: float, k: int, window: int, threshold: float,
+        min_prints: int, common_blocks: int) -> Dict:
+    donor = functions(synthetic_repo(files, seed=1))
+    suspect = functions(synthetic_repo(files, duplicate_fraction=duplicate_fraction, donor_seed=1, seed=0))
+    donor_texts = {b["block"] for b in donor}
+    truth = [b["block"] in donor_texts for b in suspect]
+    queries = [disguise(b["block"]) for b in suspect]
+
+    with tempfile.TemporaryDirectory() as root:
+        index = FingerprintIndex(f"{root}/fingerprints.sqlite", k=k, window=window)
+        start = time.perf_counter()
+        index.add("donor", range(1, len(donor) + 1), [b["block"] for b in donor])
+        index_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = index.match(queries, exclude_repo="suspect", min_prints=min_prints, max_block_frequency=common_blocks)
+        match_seconds = time.perf_counter() - start
+
+    predicted = [m is not None and m["overlap"] >= threshold for m in matches]
+    true_positives = sum(p and t for p, t in zip(predicted, truth))
+    return {
+        "donor_blocks": len(donor),
+        "suspect_blocks": len(suspect),
+        "copied_blocks": sum(truth),
+        "reported": sum(predicted),
+        "precision": true_positives / max(1, sum(predicted)),
+        "recall": true_positives / max(1, sum(truth)),
+        "undecided": sum(m is None for m in matches),
+        "index_seconds": index_seconds,
+        "match_seconds": match_seconds,
+        "match_ms_per_block": match_seconds * 1000 / max(1, len(queries))
+    }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--files", type=int, default=200)
+    arg_parser.add_argument("--duplicate-fraction", type=float, default=0.3)
+    arg_parser.add_argument("--k", type=int, default=25)
+    arg_parser.add_argument("--window", type=int, default=10)
+    arg_parser.add_argument("--threshold", type=float, default=0.8)
+    arg_parser.add_argument("--min-prints", type=int, default=4)
+    arg_parser.add_argument("--common-blocks", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    results = run(args.files, args.duplicate_fraction, args.k, args.window, args.threshold,
+                  args.min_prints, args.common_blocks)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_incremental.py
+"""Incremental re-analysis against a forced full rerun of the same commit.
+
+A suspect repository, partly copied from a donor already in the corpus, is
+analyzed; then files are changed, deleted and added, and the new commit is
+analyzed incrementally from the manifest and once more with an empty
+manifest. The two results (scores, verdicts, copied blocks) and the
+suspect's corpus rows (text, location and vector) must be identical;
+otherwise the check exits with status 1.
+
+    python -m benchmarks.bench_incremental --tiny
+    python -m benchmarks.bench_incremental --files 200
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.bench_suite import configure, make_registry
+from benchmarks.fake_services import FakeGitHub, FakeGroq
+from benchmarks.fixtures import commit_changes, make_bare_repo
+from benchmarks.synthetic import synthetic_repo
+
+# Fields of run_full_analysis()'s result that must not depend on how the commit was parsed
+COMPARED = ("originality_score", "verdict", "similar_projects", "copied_blocks", "idea_summary", "commit_hash")
+
+class _ParseLog(logging.Handler):
+    """Collects CodeParser's "Parsed N of M files changed since ..." lines"""
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord):
+        if record.getMessage().startswith("Parsed "):
+            self.lines.append(record.getMessage())
+
+def corpus_rows(registry, repo_key: str) -> List[tuple]:
+    """The repository's corpus blocks with their vectors, in an id-independent order"""
+    corpus = registry.corpus_index
+    ids = corpus.repo_ids(repo_key)
+    blocks = corpus.get_blocks(ids.tolist())
+    index = corpus.index
+    rows = []
+    for block_id, block in blocks.items():
+        vector = index.vectors[np.searchsorted(index.ids, block_id)]
+        rows.append((block["commit"], block["file"], block["start_line"], block["end_line"],
+                     block["block"], vector.tobytes()))
+    return sorted(rows)
+
+def differences(incremental: Dict, full: Dict) -> List[str]:
+    found = [] if incremental["parse_log"] else ["the second commit was not parsed incrementally"]
+    found += [f"{key}: {incremental['result'].get(key)!r} != {full['result'].get(key)!r}"
+             for key in COMPARED if incremental["result"].get(key) != full["result"].get(key)]
+    if incremental["rows"] != full["rows"]:
+        found.append(f"corpus rows: {len(incremental['rows'])} incremental, {len(full['rows'])} full, "
+                     f"{len(set(incremental['rows']) ^ set(full['rows']))} differing")
+    return found
+
+def run(files: int, changed: int, tiny: bool, seed: int = 0) -> Dict:
+    from ai_agents.agents import CodeParser, run_full_analysis
+    from ai_agents.models.file_manifest import FileManifest
+    from ai_agents.utils.github_api import repo_full_name
+
+    workdir = tempfile.mkdtemp(prefix="reporadar_incremental_")
+    cwd = os.getcwd()
+    try:
+        configure(workdir)
+        layout = dict(file_count=files, languages=["python", "js", "java", "c"], donor_seed=seed + 1)
+        donor = synthetic_repo(seed=seed + 1, **layout)
+        suspect = synthetic_repo(duplicate_fraction=0.3, seed=seed, **layout)
+        # Later versions of the suspect's files, and new files, drawn from another seed
+        later = synthetic_repo(duplicate_fraction=0.3, seed=seed + 2, **dict(layout, file_count=files + 1))
+        with FakeGitHub() as github, FakeGroq() as groq:
+            registry = make_registry(github, groq, tiny)
+            parser = CodeParser(registry)
+            parser.store_embeddings(parser.parse_repository(donor), "bench/donor", "donor")
+            repo_url = make_bare_repo(workdir, binary_mb=0, commits=1, name="suspect", files=suspect)
+            repo_key = repo_full_name(repo_url)
+            run_full_analysis(repo_url, registry)
+
+            # Change the first files, delete the last one and add one
+            modified = [dict(f, content=g["content"]) for f, g in zip(suspect[:changed], later[:changed])]
+            added = [dict(later[-1], path=later[-1]["path"].replace(later[-1]["name"], f"added_{later[-1]['name']}"))]
+            commit_changes(workdir, "suspect", write=modified + added, delete=[suspect[-1]["path"]])
+
+            runs = {}
+            parser_logger = logging.getLogger("ai_agents.agents.code_parser")
+            level = parser_logger.level
+            parser_logger.setLevel(logging.INFO)
+            for mode in ("incremental", "full"):
+                if mode == "full":
+                    # An empty manifest makes the same commit parse every file
+                    registry.register("file_manifest", FileManifest(os.path.join(workdir, "analysis_cache", "full.sqlite")))
+                parse_log = _ParseLog()
+                parser_logger.addHandler(parse_log)
+                try:
+                    result = run_full_analysis(repo_url, registry)
+                finally:
+                    parser_logger.removeHandler(parse_log)
+                runs[mode] = {"result": result, "rows": corpus_rows(registry, repo_key), "parse_log": parse_log.lines}
+            parser_logger.setLevel(level)
+        return {
+            "files": files,
+            "changed": len(modified) + len(added) + 1,
+            "runs": {
+                mode: {
+                    "parse_seconds": analysis["result"]["stage_timings"].get("parse"),
+                    "parse_log": analysis["parse_log"],
+                    "originality_score": analysis["result"]["originality_score"],
+                    "copied_blocks": len(analysis["result"]["copied_blocks"]),
+                    "corpus_rows": len(analysis["rows"])
+                } for mode, analysis in runs.items()
+            },
+            "differences": differences(runs["incremental"], runs["full"])
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--files", type=int, default=24)
+    arg_parser.add_argument("--changed", type=int, default=2, help="files modified between the two commits")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--tiny", action="store_true", help="use a small random model and a hashing sentence encoder")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args.files, args.changed, args.tiny, args.seed)
+    print(f"{results['changed']} of {results['files']} files changed; "
+          f"{' '.join(results['runs']['incremental']['parse_log']) or 'no incremental parse'}")
+    print(f"{'mode':<13}{'parse s':>9}{'score':>8}{'copied':>8}{'rows':>7}")
+    for mode, row in results["runs"].items():
+        print(f"{mode:<13}{row['parse_seconds']:>9.2f}{row['originality_score']:>8.2f}"
+              f"{row['copied_blocks']:>8}{row['corpus_rows']:>7}")
+    if results["differences"]:
+        print("Incremental result differs from a full rerun:\n  " + "\n  ".join(results["differences"]))
+        sys.exit(1)
+    print("Incremental result matches a full rerun")
+
+if __name__ == "__main__":
+    main()
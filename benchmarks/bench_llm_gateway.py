@@ -0,0 +1,78 @@
+# benchmarks/bench_llm_gateway.py
+"""LLMGateway against the local Groq stub: concurrency, coalescing, caching and retries.
+
+Every scenario runs from a pool of caller threads, as agents do, with
+--latency seconds per stub response.
+
+    python -m benchmarks.bench_llm_gateway --callers 16 --latency 0.2 --max-concurrency 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from ai_agents.utils.llm_gateway import LLMError, LLMGateway
+from benchmarks.fake_services import FakeGroq
+
+MODEL = "llama-3.3-70b-versatile"
+
+def messages(i: int) -> List[Dict]:
+    return [{"role": "user", "content": f"Summarize project {i} in one sentence."}]
+
+def fan_out(gateway: LLMGateway, prompts: List[int], callers: int, **kwargs) -> Dict:
+    def call(i: int):
+        try:
+            gateway.complete(messages(i), MODEL, max_tokens=20, **kwargs)
+            return True
+        except LLMError:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        ok = sum(pool.map(call, prompts))
+    return {"calls": len(prompts), "succeeded": ok, "seconds": time.perf_counter() - start}
+
+def scenario(root: str, name: str, callers: int, max_concurrency: int, latency: float, prompts: List[int],
+             failures: int = 0, failure_status: int = 429, deadline: float = None, repeat: int = 1) -> Dict:
+    with FakeGroq(latency=latency, failures=failures, failure_status=failure_status) as fake:
+        gateway = LLMGateway("bench", base_url=fake.url, cache_path=os.path.join(root, f"{name}.sqlite"),
+                             max_concurrency=max_concurrency, backoff_base=0.05)
+        try:
+            runs = [fan_out(gateway, prompts, callers, deadline=deadline) for _ in range(repeat)]
+        finally:
+            gateway.close()
+        return {"runs": runs, "upstream_requests": fake.requests, "stats": dict(gateway.stats)}
+
+def run(callers: int, latency: float, max_concurrency: int, failures: int) -> Dict:
+    with tempfile.TemporaryDirectory() as root:
+        return {
+            # Throughput is bounded by the semaphore: about callers / max_concurrency * latency
+            "distinct_prompts": scenario(root, "distinct", callers, max_concurrency, latency, list(range(callers))),
+            # One upstream request however many callers ask at once
+            "identical_prompts": scenario(root, "identical", callers, max_concurrency, latency, [0] * callers),
+            # The second pass is served from the on-disk cache
+            "cached": scenario(root, "cached", callers, max_concurrency, latency, list(range(callers)), repeat=2),
+            # Injected 429s and 503s are retried with backoff
+            "rate_limited": scenario(root, "rate_limited", callers, max_concurrency, latency, list(range(callers)),
+                                     failures=failures, failure_status=429),
+            "server_errors": scenario(root, "server_errors", callers, max_concurrency, latency, list(range(callers)),
+                                      failures=failures, failure_status=503),
+            # Deadlines shorter than the stub's latency fail fast instead of hanging
+            "deadline": scenario(root, "deadline", callers, max_concurrency, latency, list(range(callers)),
+                                 deadline=latency / 2)
+        }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--callers", type=int, default=16)
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="seconds per stub response")
+    arg_parser.add_argument("--max-concurrency", type=int, default=4)
+    arg_parser.add_argument("--failures", type=int, default=6, help="requests answered with 429 or 503 first")
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.callers, args.latency, args.max_concurrency, args.failures), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_parse_pool.py
+"""Block extraction throughput of the parse stage at 1/2/4/8 worker processes.
+
+1 worker parses in the calling thread, as PARSE_WORKERS=1 does. Pool start-up
+is timed separately. --consume-ms simulates per-block embedding work in the
+consumer, to show parsing overlapping with it rather than running before it.
+
+    python -m benchmarks.bench_parse_pool --files 400 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from ai_agents.utils.block_extractor import extract_files, iter_extracted_chunks
+from benchmarks.synthetic import c_function, java_class, js_function, python_function
+
+def make_files(count: int, functions_per_file: int = 20, seed: int = 0) -> List[Dict]:
+    """A mixed-language repository of `count` files"""
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            name, content = f"mod_{i}.py", "\n\n".join(python_function(rng, rng.randint(5, 40)) for _ in range(functions_per_file))
+        elif kind == 1:
+            name, content = f"app_{i}.js", "\n".join(js_function(rng, rng.randint(5, 40)) for _ in range(functions_per_file))
+        elif kind == 2:
+            name, content = f"Svc{i}.java", java_class(rng, functions_per_file, rng.randint(5, 30))
+        else:
+            name, content = f"lib_{i}.c", "\n".join(c_function(rng, rng.randint(5, 40)) for _ in range(functions_per_file))
+        files.append({"name": name, "path": f"src/{name}", "content": content})
+    return files
+
+def run(files: List[Dict], workers: List[int], chunk_size: int, consume_ms: float) -> Dict:
+    results = {}
+    for count in workers:
+        pool = None
+        startup = 0.0
+        if count > 1:
+            start = time.perf_counter()
+            pool = ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context("spawn"))
+            # Start every worker before timing the stage itself
+            list(pool.map(extract_files, [[]] * count))
+            startup = time.perf_counter() - start
+        try:
+            blocks = 0
+            start = time.perf_counter()
+            for chunk_blocks in iter_extracted_chunks(files, pool, chunk_size=chunk_size, in_flight=count * 2):
+                blocks += len(chunk_blocks)
+                if consume_ms:
+                    time.sleep(len(chunk_blocks) * consume_ms / 1000)
+            seconds = time.perf_counter() - start
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        results[count] = {
+            "seconds": seconds,
+            "startup_seconds": startup,
+            "blocks": blocks,
+            "files_per_second": len(files) / seconds,
+            "blocks_per_second": blocks / seconds
+        }
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--files", type=int, default=400)
+    arg_parser.add_argument("--functions-per-file", type=int, default=20)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--chunk-size", type=int, default=16)
+    arg_parser.add_argument("--consume-ms", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    files = make_files(args.files, args.functions_per_file)
+    results = run(files, args.workers, args.chunk_size, args.consume_ms)
+    baseline = results[args.workers[0]]["seconds"]
+    print(f"{'workers':<9}{'seconds':>9}{'startup s':>11}{'blocks':>8}{'files/s':>10}{'blocks/s':>10}{'speedup':>9}")
+    for count, row in results.items():
+        print(f"{count:<9}{row['seconds']:>9.2f}{row['startup_seconds']:>11.2f}{row['blocks']:>8}"
+              f"{row['files_per_second']:>10.1f}{row['blocks_per_second']:>10.0f}{baseline / row['seconds']:>9.2f}")
+
+if __name__ == "__main__":
+    main()
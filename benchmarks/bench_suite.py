@@ -0,0 +1,233 @@
+# benchmarks/bench_suite.py
+"""Offline benchmark suite: each agent on its own and a full run_full_analysis.
+
+A donor repository and a suspect repository are generated, with
+--duplicate-fraction of the suspect's functions copied from the donor.
+GitHub and Groq are served by the local fakes, so nothing leaves the machine.
+Results are written as JSON so runs can be compared.
+
+    python -m benchmarks.bench_suite --tiny --output results.json
+    python -m benchmarks.bench_suite --files 200 --languages python js --duplicate-fraction 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.fake_services import FakeGitHub, FakeGroq
+from benchmarks.fixtures import make_bare_repo
+from benchmarks.synthetic import LANGUAGES, synthetic_repo
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def timed(fn: Callable[[], Any], repeat: int, setup: Callable[[], None] = None) -> Tuple[Dict, Any]:
+    """Time `repeat` calls of fn, running `setup` untimed before each one"""
+    seconds = []
+    result = None
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+    return {
+        "runs": len(seconds),
+        "min": min(seconds),
+        "median": statistics.median(seconds),
+        "mean": statistics.fmean(seconds)
+    }, result
+
+def environment(args: argparse.Namespace) -> Dict:
+    import torch
+    from ai_agents.models.pipeline_config import PipelineConfig
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "model": "tiny" if args.tiny else PipelineConfig.CODEBERT_MODEL,
+        "embedding_backend": PipelineConfig.EMBEDDING_BACKEND,
+        "embedding_batch_size": PipelineConfig.EMBEDDING_BATCH_SIZE,
+        "parse_workers": PipelineConfig.PARSE_WORKERS,
+        "args": vars(args)
+    }
+
+def configure(workdir: str):
+    """Point every on-disk store at `workdir` and make it the working directory"""
+    from ai_agents.models.pipeline_config import PipelineConfig
+    PipelineConfig.FAISS_INDEX_PATH = os.path.join(workdir, "faiss_index")
+    PipelineConfig.IDEA_CORPUS_PATH = os.path.join(workdir, "idea_corpus")
+    PipelineConfig.EMBEDDING_CACHE_DIR = os.path.join(workdir, "embedding_cache")
+    PipelineConfig.EMBEDDING_ONNX_DIR = os.path.join(workdir, "onnx_cache")
+    PipelineConfig.RESULT_STORE_PATH = os.path.join(workdir, "analysis_cache", "results.sqlite")
+    PipelineConfig.MANIFEST_PATH = os.path.join(workdir, "analysis_cache", "manifests.sqlite")
+    PipelineConfig.GITHUB_CACHE_PATH = os.path.join(workdir, "github_cache", "responses.sqlite")
+    PipelineConfig.LLM_CACHE_PATH = os.path.join(workdir, "llm_cache", "completions.sqlite")
+    # ReportGenerator reads templates/ and writes static/ relative to the working directory
+    shutil.copytree(os.path.join(REPO_ROOT, "templates"), os.path.join(workdir, "templates"))
+    os.chdir(workdir)
+
+def make_registry(github: FakeGitHub, groq: FakeGroq, tiny: bool):
+    from ai_agents.models.corpus_index import CorpusIndex
+    from ai_agents.models.pipeline_config import PipelineConfig
+    from ai_agents.models.registry import ModelRegistry
+    from ai_agents.utils.github_client import GitHubClient
+    from ai_agents.utils.llm_gateway import LLMGateway
+
+    registry = ModelRegistry()
+    if tiny:
+        from benchmarks.tiny_models import install_tiny_models
+        _, model = install_tiny_models(registry)
+        # The corpus dimension follows the model's hidden size
+        registry.register("corpus_index", CorpusIndex(PipelineConfig.FAISS_INDEX_PATH,
+                                                      dimension=model.config.hidden_size))
+    registry.register("github_client", GitHubClient("bench", base_url=github.url,
+                                                    cache_path=PipelineConfig.GITHUB_CACHE_PATH))
+    registry.register("llm_gateway", LLMGateway("bench", base_url=groq.url, cache_path=PipelineConfig.LLM_CACHE_PATH))
+    return registry
+
+def micro(registry, donor: List[Dict], suspect: List[Dict], repeat: int) -> Dict:
+    from ai_agents.agents import CodeParser, CodeSimilarity, IdeaChecker, ReportGenerator, Scorer
+    from ai_agents.models.embedding_cache import EmbeddingCache
+
+    parser = CodeParser(registry)
+    results = {}
+    caches = iter(range(1 << 30))
+
+    def cold_cache():
+        parser.cache = EmbeddingCache(tempfile.mkdtemp(prefix=f"cache{next(caches)}_", dir="."))
+
+    # parse_code: extraction plus embedding, one file at a time
+    sample = suspect[:20]
+    parse_all = lambda: sum(len(parser.parse_code(f["content"], f["name"])) for f in sample)
+    stats, blocks = timed(parse_all, repeat, setup=cold_cache)
+    results["parse_code"] = dict(stats, files=len(sample), blocks=blocks)
+    stats, _ = timed(parse_all, repeat)
+    results["parse_code_warm_cache"] = dict(stats, files=len(sample), blocks=blocks)
+
+    # Embedding alone, on every leaf block of the suspect repository
+    texts = [b["block"] for b in parser.parse_repository(suspect) if not b.get("derived")]
+    stats, records = timed(lambda: parser.embed_blocks(texts), repeat, setup=cold_cache)
+    results["embedding"] = dict(stats, blocks=len(records), blocks_per_sec=len(records) / stats["median"])
+
+    # CodeSimilarity.compare against a corpus holding the donor repository
+    donor_blocks = parser.parse_repository(donor)
+    parser.store_embeddings(donor_blocks, "bench/donor", "donor")
+    suspect_blocks = parser.parse_repository(suspect)
+    donor_texts = {b["block"] for b in donor_blocks}
+    similarity = CodeSimilarity(registry)
+    stats, comparison = timed(lambda: similarity.compare(suspect_blocks, "suspect", repo_key="bench/suspect"), repeat)
+    results["compare"] = dict(
+        stats,
+        blocks=len(suspect_blocks),
+        corpus_vectors=registry.corpus_index.ntotal,
+        copied_blocks_true=sum(b["block"] in donor_texts for b in suspect_blocks),
+        copied_blocks_reported=len(comparison["copied_blocks"]),
+        similarity_score=comparison["similarity_score"]
+    )
+
+    idea_checker = IdeaChecker(registry)
+    summary = FakeGroq.REPLIES[0]
+    stats, idea = timed(lambda: idea_checker.check_idea(summary, "suspect"), repeat)
+    results["check_idea"] = dict(stats, idea_similarity_score=idea["idea_similarity_score"])
+
+    # The same check answered from an imported corpus of close variants, without live search
+    projects_path = os.path.abspath("projects.jsonl")
+    with open(projects_path, "w", encoding="utf-8") as f:
+        for i in range(2000):
+            f.write(json.dumps({"full_name": f"corpus{i}/idea-{i}", "description": f"{summary} Variant {i}."}) + "\n")
+    registry.idea_corpus.import_jsonl(projects_path, registry.sentence_model)
+    stats, corpus_idea = timed(lambda: idea_checker.check_idea(summary, "suspect"), repeat)
+    results["check_idea_corpus"] = dict(stats, corpus_projects=registry.idea_corpus.ntotal,
+                                        idea_similarity_score=corpus_idea["idea_similarity_score"])
+
+    analysis = {
+        "metadata": {"name": "suspect"},
+        "code_similarity": comparison,
+        "idea_summary": summary,
+        "idea_check": idea,
+        "contribution_credibility": {"credibility_score": 80.0}
+    }
+    scorer = Scorer()
+    calls = 1000
+    stats, originality = timed(lambda: [scorer.calculate_originality(analysis) for _ in range(calls)][-1], repeat)
+    results["calculate_originality"] = dict(stats, calls_per_run=calls, originality_score=originality["originality_score"])
+
+    analysis["originality"] = originality
+    report_generator = ReportGenerator(registry)
+    stats, report_url = timed(lambda: report_generator.generate_report(analysis), repeat)
+    results["report"] = dict(stats, report_url=report_url)
+    return results
+
+def end_to_end(registry, repo_url: str, repeat: int) -> Dict:
+    from ai_agents.agents import run_full_analysis
+
+    # The first run fills the embedding and GitHub caches; later runs reuse them
+    stats, result = timed(lambda: run_full_analysis(repo_url, registry), 1)
+    cold = dict(stats, stage_timings=result.get("stage_timings"), originality_score=result.get("originality_score"))
+    stats, result = timed(lambda: run_full_analysis(repo_url, registry), repeat)
+    warm = dict(stats, stage_timings=result.get("stage_timings"), originality_score=result.get("originality_score"))
+    return {"cold": cold, "warm": warm}
+
+def run(args: argparse.Namespace) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="reporadar_bench_")
+    cwd = os.getcwd()
+    try:
+        configure(workdir)
+        # Identical layout, so the suspect's copied functions come from this repository
+        layout = dict(file_count=args.files, languages=args.languages, functions_per_file=args.functions_per_file,
+                      min_lines=args.min_lines, max_lines=args.max_lines, donor_seed=args.seed + 1)
+        donor = synthetic_repo(seed=args.seed + 1, **layout)
+        suspect = synthetic_repo(duplicate_fraction=args.duplicate_fraction, seed=args.seed, **layout)
+        results = {"environment": environment(args)}
+        with FakeGitHub(latency=args.github_latency) as github, FakeGroq(latency=args.llm_latency) as groq:
+            registry = make_registry(github, groq, args.tiny)
+            results["micro"] = micro(registry, donor, suspect, args.repeat)
+            repo_url = make_bare_repo(workdir, binary_mb=0, commits=3, name="suspect", files=suspect)
+            results["end_to_end"] = end_to_end(registry, repo_url, args.repeat)
+            results["requests"] = {"github": github.requests, "groq": groq.requests}
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--files", type=int, default=40)
+    arg_parser.add_argument("--languages", nargs="+", choices=sorted(LANGUAGES), default=["python", "js", "java", "c"])
+    arg_parser.add_argument("--functions-per-file", type=int, default=6)
+    arg_parser.add_argument("--min-lines", type=int, default=3)
+    arg_parser.add_argument("--max-lines", type=int, default=40)
+    arg_parser.add_argument("--duplicate-fraction", type=float, default=0.2)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--github-latency", type=float, default=0.0, help="seconds added to each fake GitHub response")
+    arg_parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds added to each fake Groq response")
+    arg_parser.add_argument("--tiny", action="store_true", help="use a small random model and a hashing sentence encoder")
+    arg_parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+    text = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
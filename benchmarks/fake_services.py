@@ -0,0 +1,227 @@
+# benchmarks/fake_services.py
+"""Local stand-ins for external APIs so benchmarks run offline and repeatably."""
+import base64
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that time out or give up close the connection mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class _Server:
+    """Run a ThreadingHTTPServer on a free localhost port in a daemon thread."""
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        handler = type("Handler", (self.handler_class,), {"service": self})
+        self.httpd = _QuietHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _GitHubHandler(BaseHTTPRequestHandler):
+    service: "FakeGitHub"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        resource = "search" if self.path.startswith("/search/") else "core"
+        limit, remaining, reset = self.service.take(resource)
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("X-RateLimit-Limit", str(limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(int(reset)))
+        self.send_header("X-RateLimit-Resource", resource)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.service.count()
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:2] == ["search", "repositories"]:
+            per_page = int(query.get("per_page", 30))
+            return self._send(200, {"total_count": len(self.service.repos), "items": self.service.repos[:per_page]})
+        if len(parts) >= 3 and parts[0] == "repos":
+            full_name = f"{parts[1]}/{parts[2]}"
+            repo = self.service.repo(full_name)
+            if repo is None:
+                return self._send(404, {"message": "Not Found"})
+            if len(parts) == 3:
+                return self._send(200, repo)
+            if parts[3] == "readme":
+                content = base64.b64encode(repo["_readme"].encode("utf-8")).decode("ascii")
+                return self._send(200, {"encoding": "base64", "content": content})
+            if parts[3] == "commits":
+                per_page = int(query.get("per_page", 30))
+                page = int(query.get("page", 1))
+                commits = self.service.commits
+                chunk = commits[(page - 1) * per_page:page * per_page]
+                headers = {}
+                if page * per_page < len(commits):
+                    next_url = f"{self.service.url}/repos/{full_name}/commits?page={page + 1}&per_page={per_page}"
+                    headers["Link"] = f'<{next_url}>; rel="next"'
+                return self._send(200, chunk, headers)
+        return self._send(404, {"message": "Not Found"})
+
+class FakeGitHub(_Server):
+    """A tiny GitHub REST API: search, repo, readme and paginated commits.
+
+    Responses carry ETags (If-None-Match yields 304) and X-RateLimit-*
+    headers backed by per-resource counters, so the client's caching and
+    rate limiting can be exercised. `latency` adds a fixed delay per request.
+    """
+    handler_class = _GitHubHandler
+
+    def __init__(self, repo_count: int = 30, commit_count: int = 250, latency: float = 0.0,
+                 search_limit: int = 30, core_limit: int = 5000, seed: int = 0):
+        super().__init__()
+        rng = random.Random(seed)
+        self.latency = latency
+        self.repos = [
+            {
+                "name": f"project-{i}",
+                "full_name": f"owner{i}/project-{i}",
+                "html_url": f"https://github.com/owner{i}/project-{i}",
+                "description": f"A {rng.choice(['web', 'cli', 'ml', 'data'])} tool for {rng.choice(['students', 'teams', 'gamers'])} number {i}",
+                "_readme": f"# project-{i}\n\nThis project helps with task {i}.\n" * 5,
+                "stargazers_count": 1000 - i
+            } for i in range(repo_count)
+        ]
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.commits = [
+            {"sha": f"{i:040x}", "commit": {"author": {
+                "date": (start + timedelta(hours=rng.randint(0, 24 * 90))).isoformat().replace("+00:00", "Z")
+            }}} for i in range(commit_count)
+        ]
+        self._limits = {"search": search_limit, "core": core_limit}
+        self._used = {"search": 0, "core": 0}
+        self._reset = time.time() + 60
+
+    def repo(self, full_name: str) -> Optional[Dict]:
+        for repo in self.repos:
+            if repo["full_name"].lower() == full_name.lower():
+                return repo
+        return {"name": full_name.split("/")[1], "full_name": full_name,
+                "html_url": f"https://github.com/{full_name}", "description": "", "_readme": ""}
+
+    def take(self, resource: str):
+        with self._lock:
+            if time.time() >= self._reset:
+                self._used = {"search": 0, "core": 0}
+                self._reset = time.time() + 60
+            self._used[resource] += 1
+            limit = self._limits[resource]
+            return limit, max(0, limit - self._used[resource]), self._reset
+
+class _GroqHandler(BaseHTTPRequestHandler):
+    service: "FakeGroq"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.service.count()
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlparse(self.path).path.rstrip("/") != "/openai/v1/chat/completions":
+            return self._send(404, {"error": {"message": "Not Found"}})
+        if self.service.take_failure():
+            # Injected rate limit or outage; Retry-After 0 lets clients retry at once
+            return self._send(self.service.failure_status, {"error": {"message": "Injected failure"}},
+                              {"Retry-After": "0"} if self.service.failure_status == 429 else None)
+        request = json.loads(body or b"{}")
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        content = self.service.reply(prompt)
+        self._send(200, {
+            "id": f"chatcmpl-{self.service.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()),
+                      "total_tokens": len(prompt.split()) + len(content.split())}
+        })
+
+    def _send(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class FakeGroq(_Server):
+    """The Groq chat completions endpoint, answering with canned text.
+
+    The reply is picked deterministically from the prompt so identical
+    prompts get identical answers, and `usage` counts whitespace tokens.
+    Point a client at it with Groq(api_key=..., base_url=fake.url).
+    The first `failures` requests are answered with `failure_status`.
+    """
+    handler_class = _GroqHandler
+    REPLIES = [
+        "A command line tool that indexes source files and reports duplicated code between projects.",
+        "A web service that collects sensor data, stores it in a database and renders dashboards.",
+        "A machine learning library that trains text classifiers and exports them for serving.",
+    ]
+
+    def __init__(self, latency: float = 0.0, failures: int = 0, failure_status: int = 429):
+        super().__init__()
+        self.latency = latency
+        self.failures = failures
+        self.failure_status = failure_status
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.failures <= 0:
+                return False
+            self.failures -= 1
+            return True
+
+    def reply(self, prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        return self.REPLIES[digest[0] % len(self.REPLIES)]
@@ -0,0 +1,78 @@
+# benchmarks/fixtures.py
+import os
+import random
+import subprocess
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import python_function
+
+def _git(cwd: str, *args: str):
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def make_bare_repo(root: str, source_files: int = 50, binary_mb: int = 20, commits: int = 5,
+                   seed: int = 0, name: str = "fixture", files: Optional[List[Dict]] = None) -> str:
+    """Create a bare repository with source files, binary assets and some history.
+
+    Python modules are regenerated on every commit unless `files` ({"path",
+    "content"} records, e.g. from synthetic_repo) is given; those are
+    committed once and later commits only add assets. Partial clone is
+    enabled on it, like on GitHub. Returns a file:// URL that RepoFetcher
+    can clone.
+    """
+    rng = random.Random(seed)
+    work = os.path.join(root, f"{name}_work")
+    bare = os.path.join(root, f"{name}.git")
+    os.makedirs(work, exist_ok=True)
+    _git(work, "init", "-q")
+    with open(os.path.join(work, "README.md"), "w", encoding="utf-8") as f:
+        f.write(f"# {name}\n\nSynthetic repository used by the benchmarks.\n")
+    for file in files or []:
+        path = os.path.join(work, *file["path"].split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(file["content"])
+    for commit in range(commits):
+        for i in range(source_files if files is None else 0):
+            path = os.path.join(work, "src", f"pkg{i % 5}", f"module_{i}.py")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n\n".join(python_function(rng, rng.randint(3, 30)) for _ in range(4)))
+        assets = os.path.join(work, "assets")
+        os.makedirs(assets, exist_ok=True)
+        with open(os.path.join(assets, f"data_{commit}.bin"), "wb") as f:
+            f.write(rng.randbytes(binary_mb * 1024 * 1024 // max(1, commits)))
+        _git(work, "add", "-A")
+        _git(work, "commit", "-q", "-m", f"commit {commit}")
+    _git(root, "clone", "-q", "--bare", work, bare)
+    _git(bare, "config", "uploadpack.allowFilter", "true")
+    _git(bare, "config", "uploadpack.allowAnySHA1InWant", "true")
+    return "file://" + os.path.abspath(bare)
+
+def commit_changes(root: str, name: str = "fixture", write: Optional[List[Dict]] = None,
+                   delete: Optional[List[str]] = None, message: str = "change") -> None:
+    """Commit changes to the work tree of make_bare_repo(root, name=name) and push them.
+
+    `write` holds {"path", "content"} records to add or overwrite; `delete`
+    lists paths to remove.
+    """
+    work = os.path.join(root, f"{name}_work")
+    for file in write or []:
+        path = os.path.join(work, *file["path"].split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(file["content"])
+    for path in delete or []:
+        os.remove(os.path.join(work, *path.split("/")))
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", message)
+    _git(work, "push", "-q", os.path.join(root, f"{name}.git"), "HEAD")
+
+def directory_bytes(path: str, subdir: Optional[str] = None) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(os.path.join(path, subdir) if subdir else path):
+        for file in files:
+            total += os.path.getsize(os.path.join(dirpath, file))
+    return total
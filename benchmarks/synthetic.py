@@ -0,0 +1,136 @@
+# benchmarks/synthetic.py
+import random
+from typing import Dict, List, Sequence
+
+_WORDS = [
+    "data", "value", "items", "result", "count", "index", "user", "config",
+    "buffer", "score", "total", "record", "path", "node", "cache", "token",
+]
+
+def _name(rng: random.Random) -> str:
+    return "_".join(rng.sample(_WORDS, 2))
+
+def _python_statement(rng: random.Random) -> str:
+    lhs, rhs, attr = rng.sample(_WORDS, 3)
+    n = rng.randint(0, 999)
+    return rng.choice([
+        f"{lhs} = {rhs} + {n}",
+        f"{lhs} = [x * {n} for x in {rhs}]",
+        f"if {lhs} > {n}:\n        {rhs} = {lhs} - 1",
+        f"{lhs} = {rhs}.get('{attr}', {n})",
+        f"for x in {rhs}:\n        {lhs} += x",
+        f"{lhs} = len({rhs}) * {n} // ({attr} or 1)",
+        f"{lhs}.{attr}({rhs}, key={n})",
+    ])
+
+def python_function(rng: random.Random, n_lines: int) -> str:
+    """Generate a syntactically valid Python function with roughly n_lines of body"""
+    args = ", ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+    lines = [f"def {_name(rng)}({args}):"]
+    for _ in range(max(1, n_lines)):
+        lines.append(f"    {_python_statement(rng)}")
+    lines.append(f"    return {rng.choice(_WORDS)}")
+    return "\n".join(lines)
+
+def python_blocks(count: int, min_lines: int = 2, max_lines: int = 60, seed: int = 0) -> List[str]:
+    """Generate `count` Python functions with a wide spread of lengths"""
+    rng = random.Random(seed)
+    return [python_function(rng, rng.randint(min_lines, max_lines)) for _ in range(count)]
+
+def js_function(rng: random.Random, n_lines: int) -> str:
+    """Generate a JavaScript function with strings, a regex literal and a nested callback"""
+    args = ", ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+    lines = [f"function {_name(rng)}({args}) {{"]
+    for _ in range(max(1, n_lines)):
+        lhs, rhs, attr = rng.sample(_WORDS, 3)
+        n = rng.randint(0, 999)
+        lines.append("  " + rng.choice([
+            f"const {lhs}_{n % 100} = {rhs}.replace(/[{{}}]+/g, \"}}\") + `{n}`;",
+            f"let {lhs} = {rhs}.filter((x) => x.{attr} > {n});",
+            f"if ({lhs} === null) {{ {rhs}.push({n}); }}",
+            f"const {lhs}_{n % 100} = await fetch(`/api/{attr}/${{{rhs}}}`);",
+            f"{lhs}.{attr} = Object.keys({rhs}).length + {n};",
+        ]))
+    lines.append(f"  return [{rng.choice(_WORDS)}].map((x) => {{ return x; }});")
+    lines.append("}")
+    return "\n".join(lines)
+
+def java_method(rng: random.Random, n_lines: int) -> str:
+    """Generate a Java method of roughly n_lines, indented for a class body"""
+    lines = [f"    public int {_name(rng)}(int {rng.choice(_WORDS)}) throws Exception {{"]
+    for _ in range(max(1, n_lines)):
+        lhs, rhs, attr = rng.sample(_WORDS, 3)
+        n = rng.randint(0, 999)
+        lines.append("        " + rng.choice([
+            f"int {lhs} = {rhs}.length() + {n}; // {{ brace in comment",
+            f"for (int i = 0; i < {n}; i++) {{ {lhs} += {rhs}[i]; }}",
+            f"if ({lhs} != null && {lhs}.{attr}()) {{ return {n}; }}",
+            f"List<String> {lhs} = new ArrayList<>({rhs}.{attr}());",
+            f"{lhs} = Math.max({rhs}, {n}) * {attr};",
+        ]))
+    lines.append("        return 0;")
+    lines.append("    }")
+    return "\n".join(lines)
+
+def java_class(rng: random.Random, methods: int, n_lines: int) -> str:
+    """Generate a Java class with `methods` methods of roughly n_lines each"""
+    name = _name(rng).title().replace('_', '')
+    body = [java_method(rng, n_lines) for _ in range(methods)]
+    return "\n".join([f"public class {name} {{"] + body + ["}"])
+
+def c_function(rng: random.Random, n_lines: int) -> str:
+    """Generate a C function with char literals and a preprocessor line"""
+    lines = ["#define LIMIT 100", f"static int {_name(rng)}(const char *{rng.choice(_WORDS)}) {{"]
+    for _ in range(max(1, n_lines)):
+        lhs, rhs, attr = rng.sample(_WORDS, 3)
+        n = rng.randint(0, 999)
+        lines.append("    " + rng.choice([
+            f"int {lhs} = {rhs}[0] == '{{' ? {n} : LIMIT;",
+            f"while ({lhs} < {n}) {{ {lhs} += {rhs}; }}",
+            f"memcpy({lhs}, {rhs}, sizeof({attr}) * {n});",
+            f"if (!{lhs}) return -{n};",
+            f"{lhs}->{attr} = {rhs} & 0x{n:x};",
+        ]))
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines)
+
+# language -> (file extension, function generator)
+LANGUAGES = {
+    "python": (".py", python_function),
+    "js": (".js", js_function),
+    "java": (".java", java_method),
+    "c": (".c", c_function),
+}
+
+def synthetic_repo(file_count: int = 40, languages: Sequence[str] = ("python", "js", "java", "c"),
+                   functions_per_file: int = 6, min_lines: int = 3, max_lines: int = 40,
+                   duplicate_fraction: float = 0.0, donor_seed: int = 1000, seed: int = 0) -> List[Dict]:
+    """Generate the {"name", "path", "content"} source files of a repository.
+
+    File i is written in languages[i % len(languages)]. Each function is,
+    with probability `duplicate_fraction`, copied verbatim from the
+    repository that synthetic_repo(..., seed=donor_seed) generates with the
+    same layout. So a donor/suspect pair has a known amount of plagiarism.
+    """
+    own = random.Random(seed)
+    donor = random.Random(donor_seed)
+    decide = random.Random(seed * 7919 + 17)
+    files = []
+    for i in range(file_count):
+        language = languages[i % len(languages)]
+        extension, make = LANGUAGES[language]
+        functions = []
+        for _ in range(functions_per_file):
+            own_function = make(own, own.randint(min_lines, max_lines))
+            # The donor stream advances on every slot to stay aligned with the donor repository
+            donor_function = make(donor, donor.randint(min_lines, max_lines))
+            functions.append(donor_function if decide.random() < duplicate_fraction else own_function)
+        if language == "java":
+            name = f"Service{i}"
+            content = "\n".join([f"public class {name} {{"] + functions + ["}"])
+        else:
+            name = f"module_{i}"
+            content = "\n\n".join(functions)
+        files.append({"name": f"{name}{extension}", "path": f"src/{language}/{name}{extension}", "content": content})
+    return files
@@ -0,0 +1,81 @@
+# benchmarks/tiny_models.py
+from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaModel
+from tokenizers import ByteLevelBPETokenizer
+import hashlib
+import numpy as np
+import re
+import torch
+from typing import List, Union
+
+from benchmarks.synthetic import python_blocks
+
+def tiny_codebert(hidden_size: int = 64, layers: int = 2, seed: int = 0):
+    """Build a small, randomly initialised RoBERTa and a BPE tokenizer trained offline.
+
+    Used instead of microsoft/codebert-base when benchmarks must run without
+    network access; throughput numbers are then relative, not absolute.
+    """
+    torch.manual_seed(seed)
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        python_blocks(200, seed=seed),
+        vocab_size=2000,
+        special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=bpe._tokenizer,
+        bos_token="<s>", eos_token="</s>", unk_token="<unk>",
+        pad_token="<pad>", mask_token="<mask>", model_max_length=512
+    )
+    config = RobertaConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=hidden_size,
+        num_hidden_layers=layers,
+        num_attention_heads=4,
+        intermediate_size=hidden_size * 4,
+        max_position_embeddings=514,
+        pad_token_id=tokenizer.pad_token_id
+    )
+    model = RobertaModel(config)
+    model.eval()
+    return tokenizer, model
+
+def install_tiny_codebert(registry, **kwargs):
+    """Register the tiny model in place of CodeBERT on a ModelRegistry"""
+    tokenizer, model = tiny_codebert(**kwargs)
+    model.to(registry.device)
+    registry.register("codebert_tokenizer", tokenizer)
+    registry.register("codebert_model", model)
+    return tokenizer, model
+
+class HashingSentenceEncoder:
+    """A SentenceTransformer stand-in: L2-normalised bag of hashed words.
+
+    Deterministic across processes and instant to load, so idea checks and
+    repository search can be benchmarked offline. Similar texts still land
+    close together, which is all the agents rely on.
+    """
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts: Union[str, List[str]], convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+def install_tiny_models(registry, **kwargs):
+    """Register the tiny code model and the hashing sentence encoder"""
+    tokenizer, model = install_tiny_codebert(registry, **kwargs)
+    registry.register("sentence_model", HashingSentenceEncoder())
+    return tokenizer, model